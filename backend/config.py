@@ -10,6 +10,10 @@ class Settings(BaseSettings):
     NEO4J_URI: str = "neo4j://neo4j:7687" # Set via GitLab secret
     NEO4J_USER: str = "neo4j" # Set via GitLab secret
     NEO4J_PASSWORD: str = ""  # Set via GitLab secret
+    NEO4J_MAX_CONNECTION_POOL_SIZE: int = 50  # Bolt connections per shared driver
+    NEO4J_MAX_CONNECTION_LIFETIME_SECONDS: int = 3600
+    NEO4J_CONNECTION_ACQUISITION_TIMEOUT_SECONDS: float = 60.0
+    NEO4J_QUERY_TIMEOUT_SECONDS: float = 30.0  # Per read transaction in anomaly detection
 
     # PostgreSQL Configuration (override with environment variables)
     POSTGRES_SERVER: str = "db" # Set via GitLab secret
@@ -83,6 +87,19 @@ class Settings(BaseSettings):
     ALERT_ESCALATION_NO_RESOLUTION_MINUTES: int = 30  # Escalate if not resolved
     ALERT_MAX_ESCALATIONS: int = 2  # Maximum escalation count
 
+    # Staff Location History
+    STAFF_LOCATION_RETENTION_DAYS: int = 30  # Older history is pruned; the newest row per staff is kept
+
+    # Audit Log Configuration (written in batches by a background thread)
+    AUDIT_QUEUE_MAX_SIZE: int = 20000  # Entries beyond this are dropped
+    AUDIT_BATCH_SIZE: int = 500  # Max rows per INSERT batch
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0  # Max time an entry waits to be written
+    # Demo (is_mock) entries stay in memory unless enabled. In-memory entries are
+    # only visible to the worker that ran the demo, so leave this off only with a
+    # single API worker; enable it for multi-worker deployments.
+    PERSIST_MOCK_AUDIT: bool = False
+    MOCK_AUDIT_BUFFER_SIZE: int = 1000  # Most recent demo entries kept in memory, per demo alert
+
     # Notification Configuration
     ALERT_NOTIFICATION_MAX_RETRIES: int = 3
     ALERT_NOTIFICATION_RETRY_BACKOFF: list = [10, 60, 300]  # Seconds between retries
@@ -96,6 +113,13 @@ class Settings(BaseSettings):
     SMS_ENABLED: bool = True
     PUSH_ENABLED: bool = True
     NOTIFICATION_MOCK_MODE: bool = True  # If True, don't actually send notifications
+    NOTIFICATION_SEND_WORKERS: int = 16  # Concurrent provider sends per queue batch
+    NOTIFICATION_SEND_TIMEOUT_SECONDS: float = 30.0  # Time allowed per provider call before marking it failed
+    NOTIFICATION_SEND_MANY_MAX_MESSAGES: int = 20  # Messages per batched email/push call, so one fits the timeout
+    NOTIFICATION_STATUS_CACHE_TTL_SECONDS: int = 5  # Redis TTL for queue status counts
+    NOTIFICATION_BUFFER_MAX_SIZE: int = 10000  # Beyond this, NORMAL/LOW notifications are dropped
+    NOTIFICATION_BUFFER_BATCH_SIZE: int = 200  # Max rows per background INSERT batch
+    NOTIFICATION_BUFFER_FLUSH_INTERVAL_SECONDS: float = 0.05  # Max time a buffered row waits
 
     # Email Configuration (SMTP)
     SMTP_HOST: str = "smtp.gmail.com"
@@ -120,7 +144,7 @@ class Settings(BaseSettings):
     DATABASE_POOL_SIZE: int = 10
     DATABASE_MAX_OVERFLOW: int = 20
     DATABASE_POOL_TIMEOUT: int = 30
-    DATABASE_POOL_RECYCLE: int = 3600
+    DATABASE_POOL_RECYCLE: int = 1800  # Below common firewall/LB idle timeouts
 
     model_config = ConfigDict(
         env_file=".env",
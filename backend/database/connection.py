@@ -23,6 +23,10 @@ engine = create_engine(
     pool_timeout=settings.DATABASE_POOL_TIMEOUT,
     pool_recycle=settings.DATABASE_POOL_RECYCLE,
     pool_pre_ping=True,  # Enable connection health checks
+    # Hand out the most recently used connection first, so background threads
+    # that wake up occasionally (demo scheduler, audit writer) reuse a warm
+    # connection and surplus idle ones age out via pool_recycle
+    pool_use_lifo=True,
 )
 
 # Session factory
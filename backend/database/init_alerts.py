@@ -402,6 +402,8 @@ def seed_demo_staff_locations(db: Session):
             source="demo_seed",
         )
         db.add(location)
+        staff.current_zone_id = loc_data["zone_id"]
+        staff.current_zone_updated_at = datetime.utcnow()
 
     db.commit()
     logger.info(f"Seeded locations for {len(demo_staff)} demo staff")
@@ -1,6 +1,10 @@
 # backend/app/main.py
+import asyncio
+import atexit
 import logging
+import queue
 from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -15,9 +19,31 @@ logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL),
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
+# Route root log records through a queue so request and background threads
+# (demo scheduler, audit writer) never block on handler I/O
+_log_queue = queue.SimpleQueue()
+_root_logger = logging.getLogger()
+_log_listener = QueueListener(_log_queue, *_root_logger.handlers, respect_handler_level=True)
+_root_logger.handlers = [QueueHandler(_log_queue)]
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logger = logging.getLogger(__name__)
 
 
+def _ensure_zone_capacities() -> None:
+    """Backfill missing Zone capacities the anomaly queries rely on"""
+    try:
+        from services.anomaly_detection import AnomalyDetectionService
+        updated = AnomalyDetectionService(
+            settings.NEO4J_URI, settings.NEO4J_USER, settings.NEO4J_PASSWORD
+        ).ensure_zone_capacities()
+        if updated:
+            logger.info(f"Set default capacity on {updated} zones")
+    except Exception as e:
+        logger.warning(f"Could not verify zone capacities: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler for startup/shutdown events"""
@@ -33,6 +59,11 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Failed to initialize alert system: {e}")
 
+    # Runs in a worker thread without holding up startup: a slow or
+    # unreachable Neo4j (and the driver's retries) must not delay routes
+    # that never touch it
+    app.state.zone_capacity_task = asyncio.create_task(asyncio.to_thread(_ensure_zone_capacities))
+
     yield
 
     # Shutdown
@@ -18,9 +18,10 @@ from sqlalchemy import (
     Enum,
     Index,
     CheckConstraint,
+    func,
 )
 from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 import uuid
 
 from database.connection import Base
@@ -122,6 +123,11 @@ class StaffProfile(Base):
     on_duty = Column(Boolean, default=False)
     max_concurrent_assignments = Column(Integer, default=3)
 
+    # Latest reported location, copied from the newest staff_locations row so
+    # proximity queries don't have to search the history
+    current_zone_id = Column(String(50), nullable=True)
+    current_zone_updated_at = Column(DateTime, nullable=True)
+
     # Contact preferences (JSON: {email: bool, sms: bool, push: bool})
     contact_preferences = Column(JSON, default=lambda: {"email": True, "sms": False, "push": True})
 
@@ -130,7 +136,12 @@ class StaffProfile(Base):
 
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Stamped by the database, including on bulk UPDATE statements
+    updated_at = Column(
+        DateTime,
+        server_default=func.timezone("utc", func.now()),
+        onupdate=func.timezone("utc", func.now()),
+    )
 
     # Relationships
     locations = relationship("StaffLocation", back_populates="staff", cascade="all, delete-orphan")
@@ -141,6 +152,10 @@ class StaffProfile(Base):
     __table_args__ = (
         Index("ix_staff_profiles_on_duty", "on_duty"),
         Index("ix_staff_profiles_role", "role"),
+        Index("ix_staff_profiles_role_on_duty", "role", "on_duty"),
+        # (name, id) keyset pagination of the staff list
+        Index("ix_staff_profiles_name_id", "name", "id"),
+        Index("ix_staff_profiles_current_zone", "current_zone_id"),
     )
 
     def __repr__(self):
@@ -169,7 +184,9 @@ class StaffLocation(Base):
     staff = relationship("StaffProfile", back_populates="locations")
 
     __table_args__ = (
-        Index("ix_staff_locations_staff_timestamp", "staff_id", "timestamp"),
+        # Newest-first reads of one staff member's locations
+        Index("ix_staff_locations_staff_timestamp", "staff_id", timestamp.desc()),
+        Index("ix_staff_locations_zone_timestamp", "zone_id", timestamp.desc()),
     )
 
     def __repr__(self):
@@ -252,6 +269,10 @@ class Alert(Base):
         Index("ix_alerts_status_severity", "status", "severity"),
         Index("ix_alerts_created_at_desc", "created_at"),
         Index("ix_alerts_assigned_to_status", "assigned_to", "status"),
+        # Partial indexes: workload counts only touch active alerts and
+        # resolution stats only resolved ones, whatever the history size
+        Index("ix_alerts_active_assigned_to", "assigned_to", postgresql_where=(status != AlertStatus.RESOLVED)),
+        Index("ix_alerts_resolved_by", "resolved_by", postgresql_where=(status == AlertStatus.RESOLVED)),
         CheckConstraint(
             "escalation_count >= 0",
             name="check_escalation_count_positive"
@@ -311,8 +332,8 @@ class AlertAuditLog(Base):
     actor_id = Column(UUID(as_uuid=True), ForeignKey("staff_profiles.id"), nullable=True)  # NULL for system actions
     actor_type = Column(Enum(ActorType), nullable=False, default=ActorType.SYSTEM)
 
-    # Change details (JSON)
-    details = Column(JSON, default=dict)
+    # Change details (JSONB; NULL when an action carries no details)
+    details = Column(JSONB(none_as_null=True), nullable=True)
     # Expected structure:
     # {
     #     "previous_state": {...},
@@ -327,16 +348,18 @@ class AlertAuditLog(Base):
     # Demo flag
     is_mock = Column(Boolean, default=False)
 
-    # Timestamp (immutable)
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Timestamp (immutable) - naive UTC like the rest of the schema; the
+    # database fills it in when an insert omits it
+    timestamp = Column(DateTime, server_default=func.timezone("utc", func.now()), nullable=False)
 
     # Relationships
     alert = relationship("Alert", back_populates="audit_logs")
     actor_staff = relationship("StaffProfile", back_populates="audit_logs", foreign_keys=[actor_id])
 
     __table_args__ = (
-        Index("ix_audit_logs_alert_timestamp", "alert_id", "timestamp"),
-        Index("ix_audit_logs_actor_timestamp", "actor_id", "timestamp"),
+        # Trailing id supports (timestamp, id) keyset pagination
+        Index("ix_audit_logs_alert_timestamp", "alert_id", "timestamp", "id"),
+        Index("ix_audit_logs_actor_timestamp", "actor_id", "timestamp", "id"),
         Index("ix_audit_logs_action", "action"),
     )
 
@@ -386,6 +409,8 @@ class NotificationQueue(Base):
     __table_args__ = (
         Index("ix_notification_queue_status_scheduled", "status", "scheduled_at"),
         Index("ix_notification_queue_recipient_status", "recipient_id", "status"),
+        # Matches process_queue's claim order (priority DESC, created_at ASC)
+        Index("ix_notification_queue_status_priority_created", "status", priority.desc(), "created_at"),
     )
 
     def __repr__(self):
@@ -471,7 +496,12 @@ class DemoScenario(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
-    timeline_events = relationship("DemoTimelineEvent", back_populates="scenario", cascade="all, delete-orphan")
+    timeline_events = relationship(
+        "DemoTimelineEvent",
+        back_populates="scenario",
+        cascade="all, delete-orphan",
+        order_by="DemoTimelineEvent.step_number",
+    )
 
     def __repr__(self):
         return f"<DemoScenario(id={self.id}, name={self.name})>"
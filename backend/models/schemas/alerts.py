@@ -491,6 +491,7 @@ class NotificationQueueStatusResponse(BaseModel):
     pending: int
     failed: int
     sent_today: int
+    dropped: int = 0
     providers_enabled: List[str]
 
 
@@ -4,6 +4,7 @@ Provides REST endpoints for alert management.
 """
 
 import logging
+from datetime import datetime
 from typing import Optional, List
 from uuid import UUID
 
@@ -11,7 +12,13 @@ from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from sqlalchemy.orm import Session
 
 from database import get_db
-from services.alerts import AlertService, AuditService, AssignmentEngine, run_escalation_check
+from services.alerts import (
+    AlertService,
+    AuditService,
+    AssignmentEngine,
+    run_escalation_check,
+    clear_zone_adjacency_cache,
+)
 from models.db.alerts import AlertSeverity, AlertStatus
 from models.schemas.alerts import (
     AlertCreate,
@@ -484,12 +491,16 @@ async def get_alert_audit_trail(
     alert_id: UUID,
     limit: int = Query(50, ge=1, le=100, description="Maximum results"),
     offset: int = Query(0, ge=0, description="Results to skip"),
+    before_ts: Optional[datetime] = Query(None, description="Cursor: timestamp of the last entry seen"),
+    before_id: Optional[UUID] = Query(None, description="Cursor: id of the last entry seen"),
     db: Session = Depends(get_db),
 ):
     """
     Get the complete audit trail for an alert.
 
     Returns all actions taken on the alert in reverse chronological order.
+    Pass the timestamp and id of the last entry seen as before_ts/before_id
+    to page without OFFSET.
     """
     # First verify alert exists
     service = AlertService(db)
@@ -498,8 +509,16 @@ async def get_alert_audit_trail(
         raise HTTPException(status_code=404, detail="Alert not found")
 
     audit_service = AuditService(db)
-    logs = audit_service.get_alert_audit_trail(alert_id, limit=limit, offset=offset)
-    total = audit_service.get_audit_count(alert_id)
+    logs = audit_service.get_alert_audit_trail(
+        alert_id,
+        limit=limit,
+        offset=offset,
+        before_ts=before_ts,
+        before_id=before_id,
+        is_mock=alert.is_mock,
+    )
+    use_cursor = before_ts is not None and before_id is not None
+    total = audit_service.get_audit_count(alert_id, is_mock=alert.is_mock)
 
     # Convert to response format
     from models.db.alerts import StaffProfile
@@ -519,7 +538,7 @@ async def get_alert_audit_trail(
             actor_id=log.actor_id,
             actor_type=log.actor_type,
             actor_name=actor_name,
-            details=log.details,
+            details=log.details or {},
             ip_address=log.ip_address,
             is_mock=log.is_mock,
             timestamp=log.timestamp,
@@ -530,7 +549,7 @@ async def get_alert_audit_trail(
         total=total,
         offset=offset,
         limit=limit,
-        has_more=(offset + len(logs)) < total,
+        has_more=len(logs) == limit if use_cursor else (offset + len(logs)) < total,
     )
 
 
@@ -634,6 +653,19 @@ async def trigger_escalation_check(
     }
 
 
+@router.post("/assignment/zones/refresh", status_code=200)
+async def refresh_zone_adjacency():
+    """
+    Drop cached zone adjacency.
+
+    Call this (e.g. from a webhook) after zones or their connections change
+    so assignment picks up the new topology immediately.
+    """
+    clear_zone_adjacency_cache()
+
+    return {"message": "Zone adjacency cache cleared"}
+
+
 @router.get("/assignment/candidates/{zone_id}")
 async def get_assignment_candidates(
     zone_id: str,
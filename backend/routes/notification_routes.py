@@ -32,8 +32,9 @@ async def get_queue_status(
     """
     Get the current status of the notification queue.
 
-    Returns counts of pending, failed, and sent notifications,
-    plus the list of enabled notification providers.
+    Returns counts of pending, failed, and sent notifications, the number
+    dropped because the write buffer was full, and the list of enabled
+    notification providers.
     """
     service = NotificationService(db)
     status = service.get_queue_status()
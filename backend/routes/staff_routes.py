@@ -4,14 +4,22 @@ Provides REST endpoints for staff profile and location management.
 """
 
 import logging
+from datetime import datetime
 from typing import Optional, List
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
 
 from database import get_db
-from services.alerts import StaffService, AlertService, NotificationService, AssignmentEngine
+from services.alerts import (
+    StaffService,
+    AlertService,
+    NotificationService,
+    AssignmentEngine,
+    run_notification_queue,
+    run_location_retention,
+)
 from models.db.alerts import AlertStatus, ActorType
 from models.schemas.alerts import (
     StaffProfileCreate,
@@ -27,12 +35,19 @@ from models.schemas.alerts import (
 
 logger = logging.getLogger(__name__)
 
+# Handlers are plain functions: StaffService works on a blocking Session, so
+# FastAPI runs them in its threadpool rather than stalling the event loop
 router = APIRouter(prefix="/api/v1/staff", tags=["staff"])
 
 
-def staff_to_response(staff, db: Session) -> StaffProfileResponse:
-    """Convert StaffProfile model to StaffProfileResponse schema"""
-    service = StaffService(db)
+def staff_to_response(staff, db: Session, service: Optional[StaffService] = None) -> StaffProfileResponse:
+    """
+    Convert StaffProfile model to StaffProfileResponse schema.
+
+    Pass the caller's service when converting a list so the active
+    assignment counts are loaded once for all rows.
+    """
+    service = service or StaffService(db)
     active_count = service.get_active_assignment_count(staff.id)
 
     return StaffProfileResponse(
@@ -58,7 +73,7 @@ def staff_to_response(staff, db: Session) -> StaffProfileResponse:
 # =============================================================================
 
 @router.post("", response_model=StaffProfileResponse, status_code=201)
-async def create_staff(
+def create_staff(
     staff_data: StaffProfileCreate,
     db: Session = Depends(get_db),
 ):
@@ -75,15 +90,22 @@ async def create_staff(
 
 
 @router.get("", response_model=List[StaffProfileResponse])
-async def list_staff(
+def list_staff(
     role: Optional[StaffRoleEnum] = Query(None, description="Filter by role"),
     on_duty: Optional[bool] = Query(None, description="Filter by on-duty status"),
     is_mock: Optional[bool] = Query(None, description="Filter by mock flag"),
     limit: int = Query(50, ge=1, le=100, description="Maximum results"),
     offset: int = Query(0, ge=0, description="Results to skip"),
+    after_name: Optional[str] = Query(None, description="Cursor: name of the last staff member seen"),
+    after_id: Optional[UUID] = Query(None, description="Cursor: id of the last staff member seen"),
     db: Session = Depends(get_db),
 ):
-    """List all staff with optional filters"""
+    """
+    List all staff with optional filters, ordered by name.
+
+    Pass the name and id of the last staff member seen as after_name/after_id
+    to page without OFFSET.
+    """
     service = StaffService(db)
     staff_list, total = service.get_all_staff(
         role=role,
@@ -91,13 +113,15 @@ async def list_staff(
         is_mock=is_mock,
         limit=limit,
         offset=offset,
+        after_name=after_name,
+        after_id=after_id,
     )
 
-    return [staff_to_response(s, db) for s in staff_list]
+    return [staff_to_response(s, db, service) for s in staff_list]
 
 
 @router.get("/available", response_model=List[StaffProfileResponse])
-async def list_available_staff(
+def list_available_staff(
     role: Optional[StaffRoleEnum] = Query(None, description="Filter by role"),
     db: Session = Depends(get_db),
 ):
@@ -111,11 +135,11 @@ async def list_available_staff(
     service = StaffService(db)
     staff_list = service.get_available_staff(role=role)
 
-    return [staff_to_response(s, db) for s in staff_list]
+    return [staff_to_response(s, db, service) for s in staff_list]
 
 
 @router.get("/by-email/{email}", response_model=StaffProfileResponse)
-async def get_staff_by_email(
+def get_staff_by_email(
     email: str,
     db: Session = Depends(get_db),
 ):
@@ -130,7 +154,7 @@ async def get_staff_by_email(
 
 
 @router.get("/{staff_id}", response_model=StaffProfileResponse)
-async def get_staff(
+def get_staff(
     staff_id: UUID,
     db: Session = Depends(get_db),
 ):
@@ -145,7 +169,7 @@ async def get_staff(
 
 
 @router.patch("/{staff_id}", response_model=StaffProfileResponse)
-async def update_staff(
+def update_staff(
     staff_id: UUID,
     update_data: StaffProfileUpdate,
     db: Session = Depends(get_db),
@@ -161,7 +185,7 @@ async def update_staff(
 
 
 @router.delete("/{staff_id}", status_code=204)
-async def delete_staff(
+def delete_staff(
     staff_id: UUID,
     db: Session = Depends(get_db),
 ):
@@ -180,7 +204,7 @@ async def delete_staff(
 # =============================================================================
 
 @router.post("/{staff_id}/duty", response_model=StaffProfileResponse)
-async def update_duty_status(
+def update_duty_status(
     staff_id: UUID,
     on_duty: bool = Query(..., description="New on-duty status"),
     db: Session = Depends(get_db),
@@ -200,7 +224,7 @@ async def update_duty_status(
 # =============================================================================
 
 @router.post("/{staff_id}/location", response_model=StaffLocationResponse)
-async def update_location(
+def update_location(
     staff_id: UUID,
     location_data: StaffLocationUpdate,
     db: Session = Depends(get_db),
@@ -224,7 +248,7 @@ async def update_location(
 
 
 @router.get("/{staff_id}/location", response_model=Optional[StaffLocationResponse])
-async def get_current_location(
+def get_current_location(
     staff_id: UUID,
     db: Session = Depends(get_db),
 ):
@@ -253,12 +277,19 @@ async def get_current_location(
 
 
 @router.get("/{staff_id}/location/history", response_model=List[StaffLocationResponse])
-async def get_location_history(
+def get_location_history(
     staff_id: UUID,
     limit: int = Query(20, ge=1, le=100, description="Maximum results"),
+    before_ts: Optional[datetime] = Query(None, description="Cursor: timestamp of the last location seen"),
+    before_id: Optional[UUID] = Query(None, description="Cursor: id of the last location seen"),
     db: Session = Depends(get_db),
 ):
-    """Get a staff member's recent location history"""
+    """
+    Get a staff member's recent location history, newest first.
+
+    Pass the timestamp and id of the last location seen as before_ts/before_id
+    to fetch older entries.
+    """
     service = StaffService(db)
 
     # Verify staff exists
@@ -266,7 +297,12 @@ async def get_location_history(
     if not staff:
         raise HTTPException(status_code=404, detail="Staff not found")
 
-    locations = service.get_location_history(staff_id, limit=limit)
+    locations = service.get_location_history(
+        staff_id,
+        limit=limit,
+        before_ts=before_ts,
+        before_id=before_id,
+    )
 
     return [
         StaffLocationResponse(
@@ -282,12 +318,30 @@ async def get_location_history(
     ]
 
 
+@router.post("/locations/prune", status_code=200)
+def prune_location_history(
+    db: Session = Depends(get_db),
+):
+    """
+    Prune staff location history older than STAFF_LOCATION_RETENTION_DAYS.
+
+    Each staff member's newest location is kept. In production, this would
+    typically be run by a background scheduler.
+    """
+    deleted = run_location_retention(db)
+
+    return {
+        "message": "Location history pruned",
+        "deleted": deleted,
+    }
+
+
 # =============================================================================
 # ZONE-BASED QUERIES
 # =============================================================================
 
 @router.get("/zone/{zone_id}", response_model=List[StaffProfileResponse])
-async def get_staff_in_zone(
+def get_staff_in_zone(
     zone_id: str,
     db: Session = Depends(get_db),
 ):
@@ -295,7 +349,7 @@ async def get_staff_in_zone(
     service = StaffService(db)
     staff_list = service.get_staff_in_zone(zone_id)
 
-    return [staff_to_response(s, db) for s in staff_list]
+    return [staff_to_response(s, db, service) for s in staff_list]
 
 
 # =============================================================================
@@ -303,7 +357,7 @@ async def get_staff_in_zone(
 # =============================================================================
 
 @router.get("/{staff_id}/stats")
-async def get_staff_statistics(
+def get_staff_statistics(
     staff_id: UUID,
     db: Session = Depends(get_db),
 ):
@@ -322,7 +376,7 @@ async def get_staff_statistics(
 # =============================================================================
 
 @router.get("/{staff_id}/dashboard")
-async def get_staff_dashboard(
+def get_staff_dashboard(
     staff_id: UUID,
     db: Session = Depends(get_db),
 ):
@@ -392,7 +446,7 @@ async def get_staff_dashboard(
 
 
 @router.get("/{staff_id}/alerts")
-async def get_staff_alerts(
+def get_staff_alerts(
     staff_id: UUID,
     status: Optional[AlertStatusEnum] = Query(None, description="Filter by status"),
     active_only: bool = Query(True, description="Only show active (non-resolved) alerts"),
@@ -443,7 +497,7 @@ async def get_staff_alerts(
 
 
 @router.post("/{staff_id}/alerts/{alert_id}/start-investigation")
-async def start_investigation(
+def start_investigation(
     staff_id: UUID,
     alert_id: UUID,
     notes: Optional[str] = Query(None, description="Initial investigation notes"),
@@ -496,9 +550,10 @@ async def start_investigation(
 
 
 @router.post("/{staff_id}/alerts/{alert_id}/request-backup")
-async def request_backup(
+def request_backup(
     staff_id: UUID,
     alert_id: UUID,
+    background_tasks: BackgroundTasks,
     reason: str = Query(..., description="Reason for requesting backup"),
     db: Session = Depends(get_db),
 ):
@@ -564,8 +619,8 @@ async def request_backup(
         is_critical=True,
     )
 
-    # Process the notification immediately
-    notification_service.process_queue(batch_size=5)
+    # Deliver the notification right after the response is sent
+    background_tasks.add_task(run_notification_queue, batch_size=5)
 
     return {
         "message": "Backup requested successfully",
@@ -580,7 +635,7 @@ async def request_backup(
 
 
 @router.post("/{staff_id}/alerts/{alert_id}/add-note")
-async def staff_add_note(
+def staff_add_note(
     staff_id: UUID,
     alert_id: UUID,
     note: str = Query(..., min_length=1, description="Note content"),
@@ -620,7 +675,7 @@ async def staff_add_note(
 
 
 @router.post("/{staff_id}/go-off-duty")
-async def go_off_duty(
+def go_off_duty(
     staff_id: UUID,
     reassign_alerts: bool = Query(True, description="Reassign active alerts to other staff"),
     db: Session = Depends(get_db),
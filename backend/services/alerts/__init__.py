@@ -1,18 +1,26 @@
 # Alert system services package
 from .alert_service import AlertService
-from .staff_service import StaffService
+from .staff_service import StaffService, run_location_retention
 from .audit_service import AuditService
-from .assignment_engine import AssignmentEngine, EscalationChecker, run_escalation_check
-from .notification_service import NotificationService
+from .assignment_engine import (
+    AssignmentEngine,
+    EscalationChecker,
+    run_escalation_check,
+    clear_zone_adjacency_cache,
+)
+from .notification_service import NotificationService, run_notification_queue
 from .demo_service import DemoService
 
 __all__ = [
     "AlertService",
     "StaffService",
+    "run_location_retention",
     "AuditService",
     "AssignmentEngine",
     "EscalationChecker",
     "run_escalation_check",
+    "clear_zone_adjacency_cache",
     "NotificationService",
+    "run_notification_queue",
     "DemoService",
 ]
@@ -6,7 +6,7 @@ Handles alert CRUD operations, status transitions, and lifecycle management.
 import logging
 from datetime import datetime
 from typing import Optional, Dict, Any, List, Tuple
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, or_, desc
@@ -74,7 +74,10 @@ class AlertService:
         # Convert location schema to dict
         location_dict = alert_data.location.model_dump()
 
+        # Assign the id up front so the audit entry can reference it without
+        # flushing the INSERT early; it goes out with the commit below
         alert = Alert(
+            id=uuid4(),
             anomaly_id=alert_data.anomaly_id,
             anomaly_type=alert_data.anomaly_type,
             title=alert_data.title,
@@ -90,7 +93,6 @@ class AlertService:
         )
 
         self.db.add(alert)
-        self.db.flush()
 
         # Log the creation
         self.audit_service.log_alert_created(
@@ -126,15 +128,19 @@ class AlertService:
         Returns:
             The alert or None if not found
         """
-        query = self.db.query(Alert)
+        if not include_assignments:
+            # Served from the identity map when already loaded in this session
+            return self.db.get(Alert, alert_id)
 
-        if include_assignments:
-            query = query.options(
+        return (
+            self.db.query(Alert)
+            .options(
                 joinedload(Alert.assignments),
                 joinedload(Alert.assigned_staff),
             )
-
-        return query.filter(Alert.id == alert_id).first()
+            .filter(Alert.id == alert_id)
+            .first()
+        )
 
     def get_alerts(
         self,
@@ -3,14 +3,23 @@ Assignment Engine for automatically assigning alerts to staff.
 Implements proximity-based assignment with workload balancing and skill matching.
 """
 
+import heapq
 import logging
+import threading
+import time
+from array import array
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any, Tuple
+from functools import lru_cache
+from itertools import groupby
+from typing import Optional, List, Dict, Any, Tuple, Callable, FrozenSet, Iterator
 from uuid import UUID
 from collections import defaultdict
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc
+import numpy as np
+
+from sqlalchemy.orm import Session, Query
+from sqlalchemy import func, and_, desc, insert
 
 from models.db.alerts import (
     Alert,
@@ -30,6 +39,9 @@ from config import settings
 
 logger = logging.getLogger(__name__)
 
+# (role, exclude_ids) -> available staff; see AssignmentEngine.lookup_available_staff
+StaffLookup = Callable[[Optional[StaffRole], FrozenSet[UUID]], List[StaffProfile]]
+
 
 # Zone adjacency map - defines which zones are adjacent and their distances
 # This can be loaded from Neo4j or configured statically
@@ -48,6 +60,106 @@ ZONE_ADJACENCY = {
     "ROOM_A2": ["ROOM_A1"],
 }
 
+
+def _build_adjacency_csr(adjacency: Dict[str, List[str]]):
+    """
+    Flatten an adjacency map into CSR form for integer-based BFS.
+
+    Returns (zone_names, zone_index, indptr, indices) where the neighbours of
+    zone i are indices[indptr[i]:indptr[i + 1]], in their original order.
+    """
+    zone_names = list(adjacency)
+    for neighbours in adjacency.values():
+        for zone in neighbours:
+            if zone not in adjacency and zone not in zone_names:
+                zone_names.append(zone)
+    zone_index = {zone: i for i, zone in enumerate(zone_names)}
+
+    indptr = array("i", [0])
+    indices = array("i")
+    for zone in zone_names:
+        indices.extend(zone_index[adj] for adj in adjacency.get(zone, []))
+        indptr.append(len(indices))
+
+    return zone_names, zone_index, indptr, indices
+
+
+# CSR view of ZONE_ADJACENCY used by the static BFS
+_zone_names, _zone_index, _indptr, _indices = _build_adjacency_csr(ZONE_ADJACENCY)
+
+
+@lru_cache(maxsize=128)
+def _static_adjacent_zones(zone_id: str, max_distance: int) -> Tuple[str, ...]:
+    """BFS over the static map; memoized since ZONE_ADJACENCY never changes at runtime"""
+    start = _zone_index.get(zone_id)
+    if start is None or zone_id not in ZONE_ADJACENCY:
+        return ()
+
+    visited = bytearray(len(_zone_names))
+    visited[start] = 1
+    result = []
+    current_level = [start]
+
+    for distance in range(1, max_distance + 1):
+        next_level = []
+        for zone in current_level:
+            for adjacent in _indices[_indptr[zone]:_indptr[zone + 1]]:
+                if not visited[adjacent]:
+                    visited[adjacent] = 1
+                    next_level.append(adjacent)
+                    result.append(_zone_names[adjacent])
+        current_level = next_level
+        if not current_level:
+            break
+
+    return tuple(result)
+
+
+# Neo4j adjacency results keyed by (zone_id, max_distance) -> (expires_at, zones).
+# Campus topology rarely changes, so results are shared across engine instances.
+_NEO4J_ADJACENCY_CACHE_TTL_SECONDS = 3600
+_NEO4J_ADJACENCY_CACHE_MAX_SIZE = 512
+_neo4j_adjacency_cache: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+_neo4j_adjacency_cache_lock = threading.Lock()
+
+def clear_zone_adjacency_cache() -> None:
+    """Drop the shared Neo4j adjacency cache, e.g. after the zone topology changes"""
+    with _neo4j_adjacency_cache_lock:
+        _neo4j_adjacency_cache.clear()
+
+
+# Nearest available staff considered per assignment
+_MAX_CANDIDATES = 20
+
+# Fast path: an in-zone candidate below this workload ratio whose role is among
+# the top preferred roles for the alert type is assigned without full scoring
+_FAST_PATH_MAX_WORKLOAD = 0.5
+_FAST_PATH_TOP_ROLES = 2
+
+# Proximity score by zone distance (index 3 covers distance 3+)
+_PROXIMITY_SCORES = (0.0, 0.33, 0.67, 1.0)
+
+# Score multiplier for supervisors/admins on critical alerts
+_CRITICAL_SENIOR_MULTIPLIER = 0.8
+
+# Candidates above this workload ratio are demoted so one nearby staff member
+# doesn't absorb every alert in a zone until they hit max capacity
+_WORKLOAD_HEADROOM_THRESHOLD = 0.8
+_WORKLOAD_HEADROOM_PENALTY = 0.3
+
+# Candidates scoring within this margin of the best are treated as tied and
+# picked in random order
+_TIE_BREAK_EPSILON = 0.05
+
+# Current assignee role -> roles to escalate to (in order of preference)
+_ESCALATION_TARGETS: Dict[StaffRole, Tuple[StaffRole, ...]] = {
+    StaffRole.SECURITY: (StaffRole.SUPERVISOR, StaffRole.ADMIN),
+    StaffRole.SUPERVISOR: (StaffRole.ADMIN,),
+    StaffRole.LAB_SUPERVISOR: (StaffRole.SUPERVISOR, StaffRole.ADMIN),
+}
+# Used when there is no current assignee or their role has no entry above
+_DEFAULT_ESCALATION_TARGETS = (StaffRole.SUPERVISOR, StaffRole.ADMIN)
+
 # Role-based skill matching for alert types
 ROLE_SKILL_MATCH = {
     # Alert anomaly type -> preferred roles (in order of preference)
@@ -65,6 +177,12 @@ ROLE_SKILL_MATCH = {
     "default": [StaffRole.SECURITY, StaffRole.SUPERVISOR, StaffRole.ADMIN],
 }
 
+# Alert anomaly type -> {role: normalized preference position (0 = best match)}
+ROLE_SKILL_POSITION = {
+    alert_type: {role: i / len(roles) for i, role in enumerate(roles)}
+    for alert_type, roles in ROLE_SKILL_MATCH.items()
+}
+
 
 class AssignmentEngine:
     """
@@ -84,6 +202,10 @@ class AssignmentEngine:
         self.audit_service = AuditService(db)
         self.notification_service = NotificationService(db)
 
+    def clear_cache(self) -> None:
+        """Drop cached zone adjacency, e.g. after the zone topology changes"""
+        clear_zone_adjacency_cache()
+
     def assign_alert(
         self,
         alert: Alert,
@@ -126,12 +248,25 @@ class AssignmentEngine:
             logger.warning(f"No available staff for alert {alert.id}")
             return None
 
-        # Score and rank candidates
+        # Fast path - a lightly loaded, well-matched staff member already in the zone
+        in_zone_staff = self._find_in_zone_candidate(candidates, alert.anomaly_type)
+        if in_zone_staff:
+            self._do_assignment(
+                alert=alert,
+                staff=in_zone_staff,
+                reason="auto",
+                proximity_score=_PROXIMITY_SCORES[0],
+            )
+            logger.info(f"Auto-assigned alert {alert.id} to in-zone staff {in_zone_staff.name} (zone={zone_id})")
+            return in_zone_staff
+
+        # Score and rank candidates - only the best one is needed here
         scored_candidates = self._score_candidates(
             candidates=candidates,
             zone_id=zone_id,
             alert_type=alert.anomaly_type,
             severity=alert.severity,
+            top_k=1,
         )
 
         # Select best candidate (lowest score)
@@ -193,36 +328,44 @@ class AssignmentEngine:
         )
 
         # Select top N candidates
-        assigned_staff = []
-        for i, (staff, score, details) in enumerate(scored_candidates[:max_assignees]):
-            if i == 0:
-                # Primary assignee
-                self._do_assignment(
-                    alert=alert,
-                    staff=staff,
-                    reason="critical_primary",
-                    proximity_score=details.get("proximity_score"),
-                )
-            else:
-                # Additional assignees - create assignment records but don't change alert.assigned_to
-                assignment = AlertAssignment(
-                    alert_id=alert.id,
-                    staff_id=staff.id,
-                    assignment_reason="critical_backup",
-                    proximity_score=details.get("proximity_score"),
-                    is_active=True,
-                )
-                self.db.add(assignment)
+        top_candidates = scored_candidates[:max_assignees]
+        primary_staff, _, primary_details = top_candidates[0]
+        backups = top_candidates[1:]
 
-                # Send notifications to backup staff as well
-                self.notification_service.notify_staff_of_assignment(
-                    staff=staff,
-                    alert=alert,
-                    is_critical=True,
-                )
+        # Primary assignee - notified together with the backups below
+        self._do_assignment(
+            alert=alert,
+            staff=primary_staff,
+            reason="critical_primary",
+            proximity_score=primary_details.get("proximity_score"),
+            send_notification=False,
+        )
 
-            assigned_staff.append(staff)
+        if backups:
+            # Additional assignees - create assignment records but don't change alert.assigned_to
+            self.db.execute(
+                insert(AlertAssignment),
+                [
+                    {
+                        "alert_id": alert.id,
+                        "staff_id": staff.id,
+                        "assignment_reason": "critical_backup",
+                        "proximity_score": details.get("proximity_score"),
+                        "is_active": True,
+                    }
+                    for staff, _, details in backups
+                ],
+            )
+
+        assigned_staff = [staff for staff, _, _ in top_candidates]
 
+        # Queue notifications for everyone in one batch, committed with the backups
+        self.notification_service.notify_staff_batch(
+            staff_list=assigned_staff,
+            alert=alert,
+            is_critical=True,
+            commit=False,
+        )
         self.db.commit()
 
         logger.info(
@@ -236,6 +379,8 @@ class AssignmentEngine:
         self,
         alert: Alert,
         current_assignee: Optional[UUID] = None,
+        staff_lookup: Optional[StaffLookup] = None,
+        current_role: Optional[StaffRole] = None,
     ) -> Optional[StaffProfile]:
         """
         Find an appropriate escalation target for an alert.
@@ -248,39 +393,50 @@ class AssignmentEngine:
         Args:
             alert: The alert to escalate
             current_assignee: Current staff assigned (to exclude)
+            staff_lookup: Optional (role, exclude_ids) -> available staff callable,
+                used by the escalation checker to share lookups across a run
+            current_role: Role of the current assignee, if already known
+                (saves looking the assignee up)
 
         Returns:
             The escalation target, or None if no one available
         """
-        exclude_ids = [current_assignee] if current_assignee else []
+        lookup = staff_lookup or self.lookup_available_staff
+        exclude_ids = frozenset([current_assignee]) if current_assignee else frozenset()
 
         # Determine target role based on current assignee
-        target_roles = [StaffRole.SUPERVISOR, StaffRole.ADMIN]
-
-        if current_assignee:
+        if current_assignee and current_role is None:
             current_staff = self.staff_service.get_staff(current_assignee)
-            if current_staff:
-                if current_staff.role == StaffRole.SECURITY:
-                    target_roles = [StaffRole.SUPERVISOR, StaffRole.ADMIN]
-                elif current_staff.role == StaffRole.SUPERVISOR:
-                    target_roles = [StaffRole.ADMIN]
-                elif current_staff.role == StaffRole.LAB_SUPERVISOR:
-                    target_roles = [StaffRole.SUPERVISOR, StaffRole.ADMIN]
+            current_role = current_staff.role if current_staff else None
+
+        target_roles = _ESCALATION_TARGETS.get(current_role, _DEFAULT_ESCALATION_TARGETS)
 
         # Find available staff with target roles
         for role in target_roles:
-            available = self.staff_service.get_available_staff(
-                role=role,
-                exclude_ids=exclude_ids,
-            )
+            available = lookup(role, exclude_ids)
             if available:
                 # Return the first available (they're already filtered by availability)
                 return available[0]
 
         # Last resort - any available staff
-        all_available = self.staff_service.get_available_staff(exclude_ids=exclude_ids)
+        all_available = lookup(None, exclude_ids)
         return all_available[0] if all_available else None
 
+    def lookup_available_staff(
+        self,
+        role: Optional[StaffRole],
+        exclude_ids: FrozenSet[UUID],
+    ) -> List[StaffProfile]:
+        """
+        Get available staff for a role, excluding the given IDs.
+
+        Takes hashable arguments so callers can memoize it per run.
+        """
+        return self.staff_service.get_available_staff(
+            role=role,
+            exclude_ids=list(exclude_ids),
+        )
+
     def _get_candidates(
         self,
         zone_id: str,
@@ -296,21 +452,43 @@ class AssignmentEngine:
         # Get adjacent zones
         adjacent_zones = self._get_adjacent_zones(zone_id, max_distance=3)
 
-        # Get staff in or near the zone
-        candidates = self.staff_service.get_nearby_staff(
+        # Get available (not at max capacity) staff in or near the zone
+        return self.staff_service.get_nearby_staff(
             zone_id=zone_id,
             adjacent_zones=adjacent_zones,
             exclude_ids=exclude_ids,
             on_duty_only=True,
+            available_only=True,
+            limit=_MAX_CANDIDATES,
         )
 
-        # Filter by availability (not at max capacity)
-        available_candidates = []
-        for staff, current_zone, distance in candidates:
-            if self.staff_service.is_available_for_assignment(staff.id):
-                available_candidates.append((staff, current_zone, distance))
+    def _find_in_zone_candidate(
+        self,
+        candidates: List[Tuple[StaffProfile, str, int]],
+        alert_type: Optional[str],
+    ) -> Optional[StaffProfile]:
+        """
+        Find a lightly loaded, well-matched staff member already in the alert's zone.
+
+        Returns None when no in-zone candidate qualifies and full scoring is needed.
+        """
+        preferred_roles = ROLE_SKILL_MATCH.get(alert_type, ROLE_SKILL_MATCH["default"])[:_FAST_PATH_TOP_ROLES]
+        in_zone = [
+            staff for staff, _, zone_distance in candidates
+            if zone_distance == 0 and staff.role in preferred_roles
+        ]
+        if not in_zone:
+            return None
+
+        active_counts = self.staff_service.get_active_assignment_counts(s.id for s in in_zone)
 
-        return available_candidates
+        best_staff, best_workload = None, _FAST_PATH_MAX_WORKLOAD
+        for staff in in_zone:
+            workload = self._workload_ratio(active_counts.get(staff.id, 0), staff.max_concurrent_assignments)
+            if workload < best_workload:
+                best_staff, best_workload = staff, workload
+
+        return best_staff
 
     def _score_candidates(
         self,
@@ -318,6 +496,7 @@ class AssignmentEngine:
         zone_id: str,
         alert_type: Optional[str],
         severity: AlertSeverity,
+        top_k: Optional[int] = None,
     ) -> List[Tuple[StaffProfile, float, Dict[str, Any]]]:
         """
         Score and rank candidates for assignment.
@@ -327,41 +506,144 @@ class AssignmentEngine:
         Score = (proximity_weight * proximity_score) +
                 (workload_weight * workload_score) +
                 (skill_weight * skill_score)
+
+        Candidates are scored nearest-first, one zone-distance bucket at a time
+        with NumPy. When top_k is given, a heap keeps the top_k best totals and
+        farther buckets are skipped (including their workload query) once the
+        proximity term alone - a lower bound on the total - can no longer beat
+        the heap. Staff above the workload headroom threshold are penalized,
+        and near-ties are broken randomly.
         """
-        scored = []
+        if not candidates:
+            return []
 
-        for staff, current_zone, zone_distance in candidates:
-            # Calculate individual scores (0-1, lower is better)
-            proximity_score = self._calculate_proximity_score(zone_distance)
-            workload_score = self._calculate_workload_score(staff)
-            skill_score = self._calculate_skill_score(staff, alert_type)
-
-            # Calculate weighted total
-            total_score = (
-                settings.ALERT_WEIGHT_PROXIMITY * proximity_score +
-                settings.ALERT_WEIGHT_WORKLOAD * workload_score +
-                settings.ALERT_WEIGHT_SKILL_MATCH * skill_score
-            )
+        ordered = sorted(candidates, key=lambda c: c[2])
+        buckets = [list(bucket) for _, bucket in groupby(ordered, key=lambda c: c[2])]
+
+        # Every bucket gets scored without top_k, so fetch all workloads at once
+        active_counts = (
+            None if top_k
+            else self.staff_service.get_active_assignment_counts(s.id for s, _, _ in ordered)
+        )
+        bound_multiplier = (
+            _CRITICAL_SENIOR_MULTIPLIER if severity == AlertSeverity.CRITICAL else 1.0
+        )
+
+        scored_candidates = []
+        bucket_scores = []
+        best_totals: List[float] = []  # negated, so best_totals[0] is the worst kept
+        for bucket in buckets:
+            if top_k and len(best_totals) >= top_k:
+                # Workload, skill and penalty terms are >= 0; the margin keeps
+                # anything that could fall in the tie-break band
+                lower_bound = (
+                    settings.ALERT_WEIGHT_PROXIMITY
+                    * self._calculate_proximity_score(bucket[0][2])
+                    * bound_multiplier
+                )
+                if lower_bound > -best_totals[0] + _TIE_BREAK_EPSILON:
+                    break
+
+            scores = self._score_bucket(bucket, alert_type, severity, active_counts)
+            scored_candidates.extend(bucket)
+            bucket_scores.append(scores)
 
-            # Severity bonus - reduce score for supervisors/admins on critical alerts
-            if severity == AlertSeverity.CRITICAL:
-                if staff.role in [StaffRole.SUPERVISOR, StaffRole.ADMIN]:
-                    total_score *= 0.8  # 20% bonus
+            if top_k:
+                for value in scores[0]:
+                    if len(best_totals) < top_k:
+                        heapq.heappush(best_totals, -value)
+                    elif -value > best_totals[0]:
+                        heapq.heapreplace(best_totals, -value)
 
+        total, proximity, workload, skill = (np.concatenate(parts) for parts in zip(*bucket_scores))
+
+        scored = []
+        for i in self._rank_scores(total, top_k):
+            staff, current_zone, zone_distance = scored_candidates[i]
             details = {
-                "proximity_score": proximity_score,
-                "workload_score": workload_score,
-                "skill_score": skill_score,
+                "proximity_score": float(proximity[i]),
+                "workload_score": float(workload[i]),
+                "skill_score": float(skill[i]),
                 "current_zone": current_zone,
                 "zone_distance": zone_distance,
             }
+            scored.append((staff, float(total[i]), details))
+
+        return scored
+
+    def _score_bucket(
+        self,
+        bucket: List[Tuple[StaffProfile, str, int]],
+        alert_type: Optional[str],
+        severity: AlertSeverity,
+        active_counts: Optional[Dict[UUID, int]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Score candidates sharing one zone distance.
+
+        Returns (total, proximity, workload, skill) arrays aligned with bucket.
+        """
+        staff_list = [staff for staff, _, _ in bucket]
+        skill_positions = ROLE_SKILL_POSITION.get(alert_type or "default", ROLE_SKILL_POSITION["default"])
+        if active_counts is None:
+            active_counts = self.staff_service.get_active_assignment_counts(s.id for s in staff_list)
+
+        # Calculate individual scores (0-1, lower is better)
+        proximity = np.full(len(bucket), self._calculate_proximity_score(bucket[0][2]))
+        workload = np.array([
+            self._workload_ratio(active_counts.get(s.id, 0), s.max_concurrent_assignments)
+            for s in staff_list
+        ])
+        skill = np.array([skill_positions.get(s.role, 1.0) for s in staff_list])
+
+        # Calculate weighted total
+        total = (
+            settings.ALERT_WEIGHT_PROXIMITY * proximity +
+            settings.ALERT_WEIGHT_WORKLOAD * workload +
+            settings.ALERT_WEIGHT_SKILL_MATCH * skill
+        )
 
-            scored.append((staff, total_score, details))
+        # Severity bonus - reduce score for supervisors/admins on critical alerts
+        if severity == AlertSeverity.CRITICAL:
+            senior = np.array([s.role in (StaffRole.SUPERVISOR, StaffRole.ADMIN) for s in staff_list])
+            total[senior] *= _CRITICAL_SENIOR_MULTIPLIER  # 20% bonus
 
-        # Sort by score (ascending - lower is better)
-        scored.sort(key=lambda x: x[1])
+        # Headroom penalty - demote staff close to their capacity
+        total[workload > _WORKLOAD_HEADROOM_THRESHOLD] += _WORKLOAD_HEADROOM_PENALTY
 
-        return scored
+        return total, proximity, workload, skill
+
+    @staticmethod
+    def _rank_scores(total: np.ndarray, top_k: Optional[int]) -> np.ndarray:
+        """
+        Indices of the top_k lowest scores in ascending order.
+
+        Scores within _TIE_BREAK_EPSILON of the best come first in random
+        order, spreading repeat alerts across equally good candidates.
+        """
+        k = min(top_k or len(total), len(total))
+
+        in_band = total <= total.min() + _TIE_BREAK_EPSILON
+        tied = np.random.permutation(np.flatnonzero(in_band))
+        if k <= len(tied):
+            return tied[:k]
+
+        rest = np.flatnonzero(~in_band)
+        needed = k - len(tied)
+        if needed < len(rest):
+            rest = rest[np.argpartition(total[rest], needed - 1)[:needed]]
+        # Sort by score (ascending - lower is better), ties keep candidate order
+        rest = rest[np.lexsort((rest, total[rest]))]
+
+        return np.concatenate([tied, rest])
+
+    @staticmethod
+    def _workload_ratio(current: int, max_assignments: int) -> float:
+        """Workload score (0-1, lower is better) from active vs max assignments"""
+        if max_assignments == 0:
+            return 1.0
+
+        return min(current / max_assignments, 1.0)
 
     def _calculate_proximity_score(self, zone_distance: int) -> float:
         """
@@ -372,14 +654,7 @@ class AssignmentEngine:
         Distance 2 = 0.67
         Distance 3+ = 1.0
         """
-        if zone_distance == 0:
-            return 0.0
-        elif zone_distance == 1:
-            return 0.33
-        elif zone_distance == 2:
-            return 0.67
-        else:
-            return 1.0
+        return _PROXIMITY_SCORES[min(zone_distance, 3)]
 
     def _calculate_workload_score(self, staff: StaffProfile) -> float:
         """
@@ -388,12 +663,7 @@ class AssignmentEngine:
         Based on current assignments relative to max capacity.
         """
         current = self.staff_service.get_active_assignment_count(staff.id)
-        max_assignments = staff.max_concurrent_assignments
-
-        if max_assignments == 0:
-            return 1.0
-
-        return min(current / max_assignments, 1.0)
+        return self._workload_ratio(current, staff.max_concurrent_assignments)
 
     def _calculate_skill_score(
         self,
@@ -408,70 +678,62 @@ class AssignmentEngine:
         if not alert_type:
             alert_type = "default"
 
-        preferred_roles = ROLE_SKILL_MATCH.get(alert_type, ROLE_SKILL_MATCH["default"])
-
-        try:
-            # Position in preference list (0 = best match)
-            position = preferred_roles.index(staff.role)
-            # Normalize to 0-1
-            return position / len(preferred_roles)
-        except ValueError:
-            # Role not in preferred list
-            return 1.0
+        # Normalized position in preference list (0 = best match),
+        # roles not in the preferred list score 1.0
+        positions = ROLE_SKILL_POSITION.get(alert_type, ROLE_SKILL_POSITION["default"])
+        return positions.get(staff.role, 1.0)
 
     def _get_adjacent_zones(self, zone_id: str, max_distance: int = 3) -> List[str]:
         """
         Get zones adjacent to the given zone, ordered by distance.
 
-        Uses BFS to find zones up to max_distance away.
+        Uses BFS to find zones up to max_distance away. Neo4j results are
+        cached with a TTL across engines (see clear_zone_adjacency_cache) and
+        the static map's are memoized. If Neo4j fails, the static map is used
+        for this call only, so a transient error is not cached.
         """
         if self.neo4j_driver:
-            return self._get_adjacent_zones_from_neo4j(zone_id, max_distance)
+            try:
+                return self._get_adjacent_zones_from_neo4j(zone_id, max_distance)
+            except Exception as e:
+                logger.error(f"Error getting adjacent zones from Neo4j: {e}")
 
         # Fall back to static map
         return self._get_adjacent_zones_static(zone_id, max_distance)
 
     def _get_adjacent_zones_static(self, zone_id: str, max_distance: int) -> List[str]:
         """Get adjacent zones from static map using BFS"""
-        if zone_id not in ZONE_ADJACENCY:
-            return []
-
-        visited = {zone_id}
-        result = []
-        current_level = [zone_id]
-
-        for distance in range(1, max_distance + 1):
-            next_level = []
-            for zone in current_level:
-                for adjacent in ZONE_ADJACENCY.get(zone, []):
-                    if adjacent not in visited:
-                        visited.add(adjacent)
-                        next_level.append(adjacent)
-                        result.append(adjacent)
-            current_level = next_level
-            if not current_level:
-                break
-
-        return result
+        return list(_static_adjacent_zones(zone_id, max_distance))
 
     def _get_adjacent_zones_from_neo4j(self, zone_id: str, max_distance: int) -> List[str]:
-        """Get adjacent zones from Neo4j graph"""
-        try:
-            with self.neo4j_driver.session() as session:
-                # Use variable-length path to find zones within max_distance
-                result = session.run("""
-                    MATCH path = (start:Zone {zone_id: $zone_id})-[:CONNECTED_TO*1..3]-(end:Zone)
-                    WHERE start <> end
-                    WITH end, length(path) as distance
-                    ORDER BY distance
-                    RETURN DISTINCT end.zone_id as zone_id, min(distance) as distance
-                    ORDER BY distance
-                """, zone_id=zone_id, max_distance=max_distance)
-
-                return [record["zone_id"] for record in result]
-        except Exception as e:
-            logger.error(f"Error getting adjacent zones from Neo4j: {e}")
-            return self._get_adjacent_zones_static(zone_id, max_distance)
+        """Get adjacent zones from Neo4j graph (cached with a TTL); raises if the query fails"""
+        max_distance = int(max_distance)
+        cache_key = (zone_id, max_distance)
+        now = time.monotonic()
+
+        with _neo4j_adjacency_cache_lock:
+            cached = _neo4j_adjacency_cache.get(cache_key)
+        if cached and cached[0] > now:
+            return list(cached[1])
+
+        with self.neo4j_driver.session() as session:
+            # Variable-length bounds cannot be parameters, so the validated
+            # integer is templated into the pattern
+            result = session.run(f"""
+                MATCH path = (start:Zone {{zone_id: $zone_id}})-[:CONNECTED_TO*1..{max_distance}]-(end:Zone)
+                WHERE start <> end
+                RETURN end.zone_id as zone_id, min(length(path)) as distance
+                ORDER BY distance, zone_id
+            """, zone_id=zone_id)
+
+            zones = [record["zone_id"] for record in result]
+
+        with _neo4j_adjacency_cache_lock:
+            if len(_neo4j_adjacency_cache) >= _NEO4J_ADJACENCY_CACHE_MAX_SIZE:
+                _neo4j_adjacency_cache.clear()
+            _neo4j_adjacency_cache[cache_key] = (now + _NEO4J_ADJACENCY_CACHE_TTL_SECONDS, zones)
+
+        return list(zones)
 
     def _do_assignment(
         self,
@@ -481,7 +743,18 @@ class AssignmentEngine:
         proximity_score: Optional[float] = None,
         send_notification: bool = True,
     ):
-        """Perform the actual assignment and send notifications"""
+        """Perform the actual assignment and queue notifications"""
+        # Queue notifications first so the assignment commit persists them too;
+        # delivery happens later when the queue is processed
+        if send_notification:
+            is_critical = alert.severity == AlertSeverity.CRITICAL
+            self.notification_service.notify_staff_batch(
+                staff_list=[staff],
+                alert=alert,
+                is_critical=is_critical,
+                commit=False,
+            )
+
         self.alert_service.assign_alert(
             alert_id=alert.id,
             staff_id=staff.id,
@@ -489,18 +762,29 @@ class AssignmentEngine:
             reason=reason,
             proximity_score=proximity_score,
         )
+        self.staff_service.invalidate_counts()
 
-        # Send notifications if enabled
         if send_notification:
-            is_critical = alert.severity == AlertSeverity.CRITICAL
-            self.notification_service.notify_staff_of_assignment(
-                staff=staff,
-                alert=alert,
-                is_critical=is_critical,
-            )
             logger.info(f"Notifications queued for {staff.name} regarding alert {alert.id}")
 
 
+# Alerts are loaded this many rows at a time during escalation checks
+_ESCALATION_BATCH_SIZE = 200
+
+# Columns needed to decide on an escalation; the full row is only loaded
+# by AlertService.escalate_alert once a target has been found
+_ESCALATION_COLUMNS = (Alert.id, Alert.assigned_to, Alert.severity, StaffProfile.role)
+
+
+@dataclass(frozen=True)
+class EscalationCandidate:
+    """Lightweight view of an alert being checked for escalation"""
+    id: UUID
+    assigned_to: Optional[UUID]
+    severity: AlertSeverity
+    assigned_role: Optional[StaffRole]
+
+
 class EscalationChecker:
     """
     Background task to check for alerts that need escalation.
@@ -529,10 +813,16 @@ class EscalationChecker:
             "max_reached": 0,
         }
 
+        # Alerts sharing an assignee resolve to the same (role, exclude set) key,
+        # so memoize availability lookups for the duration of this run; every
+        # escalation changes someone's load, so the memo is cleared after each
+        staff_lookup = lru_cache(maxsize=None)(self.assignment_engine.lookup_available_staff)
+
         # Find alerts needing escalation due to no acknowledgment
         ack_threshold = now - timedelta(minutes=settings.ALERT_ESCALATION_NO_ACK_MINUTES)
         unacked_alerts = (
-            self.db.query(Alert)
+            self.db.query(*_ESCALATION_COLUMNS)
+            .outerjoin(StaffProfile, StaffProfile.id == Alert.assigned_to)
             .filter(
                 Alert.status == AlertStatus.ASSIGNED,
                 Alert.assigned_at < ack_threshold,
@@ -540,36 +830,39 @@ class EscalationChecker:
                 Alert.escalation_count < settings.ALERT_MAX_ESCALATIONS,
                 Alert.is_mock == False,
             )
-            .all()
         )
 
-        for alert in unacked_alerts:
-            escalated = self._escalate_alert(
+        for alert in self._iter_in_batches(unacked_alerts):
+            escalated = self._try_escalate_alert(
                 alert,
                 reason=f"No acknowledgment after {settings.ALERT_ESCALATION_NO_ACK_MINUTES} minutes",
+                staff_lookup=staff_lookup,
             )
             if escalated:
+                staff_lookup.cache_clear()
                 escalated_counts["no_acknowledgment"] += 1
 
         # Find alerts needing escalation due to no resolution
         resolution_threshold = now - timedelta(minutes=settings.ALERT_ESCALATION_NO_RESOLUTION_MINUTES)
         unresolved_alerts = (
-            self.db.query(Alert)
+            self.db.query(*_ESCALATION_COLUMNS)
+            .outerjoin(StaffProfile, StaffProfile.id == Alert.assigned_to)
             .filter(
                 Alert.status.in_([AlertStatus.ACKNOWLEDGED, AlertStatus.INVESTIGATING]),
                 Alert.acknowledged_at < resolution_threshold,
                 Alert.escalation_count < settings.ALERT_MAX_ESCALATIONS,
                 Alert.is_mock == False,
             )
-            .all()
         )
 
-        for alert in unresolved_alerts:
-            escalated = self._escalate_alert(
+        for alert in self._iter_in_batches(unresolved_alerts):
+            escalated = self._try_escalate_alert(
                 alert,
                 reason=f"No resolution after {settings.ALERT_ESCALATION_NO_RESOLUTION_MINUTES} minutes",
+                staff_lookup=staff_lookup,
             )
             if escalated:
+                staff_lookup.cache_clear()
                 escalated_counts["no_resolution"] += 1
 
         # Log alerts that have reached max escalations
@@ -588,7 +881,49 @@ class EscalationChecker:
 
         return escalated_counts
 
-    def _escalate_alert(self, alert: Alert, reason: str) -> bool:
+    def _iter_in_batches(self, query: Query) -> Iterator[EscalationCandidate]:
+        """
+        Yield candidates from an _ESCALATION_COLUMNS query in id order,
+        _ESCALATION_BATCH_SIZE rows at a time.
+
+        Uses keyset pagination rather than a streaming cursor, since each
+        escalation commits and a server-side cursor would not survive that.
+        """
+        last_id = None
+        while True:
+            batch_query = query.order_by(Alert.id)
+            if last_id is not None:
+                batch_query = batch_query.filter(Alert.id > last_id)
+            batch = batch_query.limit(_ESCALATION_BATCH_SIZE).all()
+            if not batch:
+                return
+
+            last_id = batch[-1].id
+            yield from (EscalationCandidate(*row) for row in batch)
+
+            if len(batch) < _ESCALATION_BATCH_SIZE:
+                return
+
+    def _try_escalate_alert(
+        self,
+        alert: EscalationCandidate,
+        reason: str,
+        staff_lookup: Optional[StaffLookup] = None,
+    ) -> bool:
+        """Escalate a single alert, rolling back and logging on failure"""
+        try:
+            return self._escalate_alert(alert, reason=reason, staff_lookup=staff_lookup)
+        except Exception as e:
+            logger.error(f"Failed to escalate alert {alert.id}: {e}")
+            self.db.rollback()
+            return False
+
+    def _escalate_alert(
+        self,
+        alert: EscalationCandidate,
+        reason: str,
+        staff_lookup: Optional[StaffLookup] = None,
+    ) -> bool:
         """
         Escalate a single alert.
 
@@ -598,6 +933,8 @@ class EscalationChecker:
         target = self.assignment_engine.find_escalation_target(
             alert=alert,
             current_assignee=alert.assigned_to,
+            staff_lookup=staff_lookup,
+            current_role=alert.assigned_role,
         )
 
         if not target:
@@ -610,6 +947,7 @@ class EscalationChecker:
             escalate_to=target.id,
             reason=reason,
         )
+        self.assignment_engine.staff_service.invalidate_counts()
 
         logger.info(f"Escalated alert {alert.id} to {target.name}: {reason}")
 
@@ -4,27 +4,130 @@ Provides immutable audit logging for compliance and investigation.
 """
 
 import logging
+import threading
+import uuid
+from collections import deque
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, event, or_
+from sqlalchemy.orm import Query, Session
 
 from models.db.alerts import (
     AlertAuditLog,
     AuditAction,
     ActorType,
 )
+from config import settings
+from .batch_writer import BatchWriter
 
 logger = logging.getLogger(__name__)
 
+# Key in Session.info holding audit rows waiting for their transaction to commit
+_PENDING_KEY = "pending_audit_logs"
+
+# Committed audit rows waiting to be written by the background writer
+_audit_writer = BatchWriter(
+    AlertAuditLog,
+    name="audit-log",
+    max_size=settings.AUDIT_QUEUE_MAX_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval_seconds=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+)
+
+# Committed demo (is_mock) audit rows per alert, kept in memory instead of the
+# database unless PERSIST_MOCK_AUDIT is set. Only the process that ran the
+# demo step has them, hence the single-worker requirement noted in config.
+_MOCK_AUDIT_MAX_ALERTS = 16
+_mock_audit_buffers: Dict[UUID, "deque[Dict[str, Any]]"] = {}
+_mock_audit_lock = threading.Lock()
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_committed_audit_logs(session: Session) -> None:
+    """Hand audit rows to the writer once the action they describe is committed"""
+    entries = session.info.pop(_PENDING_KEY, None)
+    if not entries:
+        return
+
+    if not settings.PERSIST_MOCK_AUDIT:
+        mock_entries = [entry for entry in entries if entry["is_mock"]]
+        if mock_entries:
+            with _mock_audit_lock:
+                for entry in mock_entries:
+                    buffer = _mock_audit_buffers.get(entry["alert_id"])
+                    if buffer is None:
+                        if len(_mock_audit_buffers) >= _MOCK_AUDIT_MAX_ALERTS:
+                            # Forget the demo alert seen longest ago
+                            del _mock_audit_buffers[next(iter(_mock_audit_buffers))]
+                        buffer = _mock_audit_buffers[entry["alert_id"]] = deque(
+                            maxlen=settings.MOCK_AUDIT_BUFFER_SIZE
+                        )
+                    buffer.append(entry)
+            entries = [entry for entry in entries if not entry["is_mock"]]
+            if not entries:
+                return
+
+    for entry in entries:
+        if not _audit_writer.offer(entry):
+            logger.warning(
+                f"Audit queue full, dropped entry: alert={entry['alert_id']}, "
+                f"action={entry['action'].value} (total dropped={_audit_writer.dropped})"
+            )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_audit_logs(session: Session) -> None:
+    """Rolled-back actions never happened, so drop their audit rows"""
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _clean_details(**details: Any) -> Dict[str, Any]:
+    """Build an audit details dict, leaving out fields that were not given"""
+    return {key: value for key, value in details.items() if value is not None}
+
+
+def _page_mock_entries(
+    entries: List[Dict[str, Any]],
+    limit: int,
+    offset: int,
+    before_ts: Optional[datetime],
+    before_id: Optional[UUID],
+) -> List[AlertAuditLog]:
+    """In-memory counterpart of AuditService._paginate for buffered demo rows"""
+    entries = sorted(entries, key=lambda e: (e["timestamp"], e["id"]), reverse=True)
+    if before_ts is not None and before_id is not None:
+        entries = [e for e in entries if (e["timestamp"], e["id"]) < (before_ts, before_id)]
+    elif offset:
+        entries = entries[offset:]
+    # Transient (never added to a session) so callers can read them like rows
+    return [AlertAuditLog(**e) for e in entries[:limit]]
+
 
 class AuditService:
-    """Service for managing alert audit logs"""
+    """
+    Service for managing alert audit logs.
+
+    Entries are written asynchronously: log_action records them against the
+    current transaction, and once it commits a background thread inserts
+    them in batches.
+    """
 
     def __init__(self, db: Session):
         self.db = db
 
+    @staticmethod
+    def clear_mock_buffer(alert_id: UUID) -> None:
+        """Forget one demo alert's in-memory audit entries (e.g. when its demo stops)"""
+        with _mock_audit_lock:
+            _mock_audit_buffers.pop(alert_id, None)
+
+    @staticmethod
+    def flush_sync() -> None:
+        """Write all committed-but-queued audit entries now (tests, shutdown)"""
+        _audit_writer.flush()
+
     def log_action(
         self,
         alert_id: UUID,
@@ -35,10 +138,13 @@ class AuditService:
         ip_address: Optional[str] = None,
         user_agent: Optional[str] = None,
         is_mock: bool = False,
-    ) -> AlertAuditLog:
+    ) -> Dict[str, Any]:
         """
         Log an action on an alert.
 
+        The entry is written after the session's current transaction commits,
+        and discarded if it rolls back.
+
         Args:
             alert_id: The alert being acted upon
             action: The type of action being performed
@@ -50,29 +156,61 @@ class AuditService:
             is_mock: Whether this is a demo/mock action
 
         Returns:
-            The created audit log entry
+            The audit log entry values
         """
-        audit_log = AlertAuditLog(
-            alert_id=alert_id,
-            action=action,
-            actor_id=actor_id,
-            actor_type=actor_type,
-            details=details or {},
-            ip_address=ip_address,
-            user_agent=user_agent,
-            is_mock=is_mock,
-            timestamp=datetime.utcnow(),
-        )
+        return self.log_actions_bulk([{
+            "alert_id": alert_id,
+            "action": action,
+            "actor_id": actor_id,
+            "actor_type": actor_type,
+            "details": details,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "is_mock": is_mock,
+        }])[0]
 
-        self.db.add(audit_log)
-        self.db.flush()
+    def log_actions_bulk(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Log several actions at once; they are inserted together in one batch.
 
-        logger.info(
-            f"Audit log created: alert={alert_id}, action={action.value}, "
-            f"actor={actor_id}, actor_type={actor_type.value}"
-        )
+        Args:
+            entries: One dict per action, with the same keys as log_action's
+                arguments (alert_id and action are required)
 
-        return audit_log
+        Returns:
+            The audit log entry values, in order
+        """
+        # One stamp for the whole batch. Rows are written asynchronously, so
+        # the action time is captured here rather than left to the database
+        # default, which would record the (later) write time instead.
+        now = datetime.utcnow()
+        audit_logs = [
+            {
+                "id": uuid.uuid4(),
+                "alert_id": entry["alert_id"],
+                "action": entry["action"],
+                "actor_id": entry.get("actor_id"),
+                "actor_type": entry.get("actor_type", ActorType.SYSTEM),
+                "details": entry.get("details") or None,
+                "ip_address": entry.get("ip_address"),
+                "user_agent": entry.get("user_agent"),
+                "is_mock": entry.get("is_mock", False),
+                "timestamp": now,
+            }
+            for entry in entries
+        ]
+
+        self.db.info.setdefault(_PENDING_KEY, []).extend(audit_logs)
+
+        if logger.isEnabledFor(logging.INFO):
+            for audit_log in audit_logs:
+                logger.info(
+                    "Audit log created: alert=%s, action=%s, actor=%s, actor_type=%s",
+                    audit_log["alert_id"], audit_log["action"].value,
+                    audit_log["actor_id"], audit_log["actor_type"].value,
+                )
+
+        return audit_logs
 
     def log_alert_created(
         self,
@@ -82,7 +220,7 @@ class AuditService:
         details: Optional[Dict[str, Any]] = None,
         is_mock: bool = False,
         **kwargs
-    ) -> AlertAuditLog:
+    ) -> Dict[str, Any]:
         """Log alert creation"""
         return self.log_action(
             alert_id=alert_id,
@@ -104,21 +242,18 @@ class AuditService:
         proximity_score: Optional[float] = None,
         is_mock: bool = False,
         **kwargs
-    ) -> AlertAuditLog:
+    ) -> Dict[str, Any]:
         """Log alert assignment"""
-        details = {
-            "assigned_to": str(assigned_to),
-            "reason": reason,
-        }
-        if proximity_score is not None:
-            details["proximity_score"] = proximity_score
-
         return self.log_action(
             alert_id=alert_id,
             action=AuditAction.ASSIGNED,
             actor_id=assigned_by,
             actor_type=actor_type,
-            details=details,
+            details=_clean_details(
+                assigned_to=str(assigned_to),
+                reason=reason,
+                proximity_score=proximity_score,
+            ),
             is_mock=is_mock,
             **kwargs
         )
@@ -129,7 +264,7 @@ class AuditService:
         acknowledged_by: UUID,
         is_mock: bool = False,
         **kwargs
-    ) -> AlertAuditLog:
+    ) -> Dict[str, Any]:
         """Log alert acknowledgment"""
         return self.log_action(
             alert_id=alert_id,
@@ -150,21 +285,18 @@ class AuditService:
         notes: Optional[str] = None,
         is_mock: bool = False,
         **kwargs
-    ) -> AlertAuditLog:
+    ) -> Dict[str, Any]:
         """Log status change"""
-        details = {
-            "previous_status": previous_status,
-            "new_status": new_status,
-        }
-        if notes:
-            details["notes"] = notes
-
         return self.log_action(
             alert_id=alert_id,
             action=AuditAction.STATUS_CHANGED,
             actor_id=changed_by,
             actor_type=actor_type,
-            details=details,
+            details=_clean_details(
+                previous_status=previous_status,
+                new_status=new_status,
+                notes=notes or None,
+            ),
             is_mock=is_mock,
             **kwargs
         )
@@ -176,7 +308,7 @@ class AuditService:
         added_by: UUID,
         is_mock: bool = False,
         **kwargs
-    ) -> AlertAuditLog:
+    ) -> Dict[str, Any]:
         """Log note addition"""
         return self.log_action(
             alert_id=alert_id,
@@ -197,7 +329,7 @@ class AuditService:
         actor_type: ActorType = ActorType.STAFF,
         is_mock: bool = False,
         **kwargs
-    ) -> AlertAuditLog:
+    ) -> Dict[str, Any]:
         """Log alert resolution"""
         return self.log_action(
             alert_id=alert_id,
@@ -222,7 +354,7 @@ class AuditService:
         actor_type: ActorType = ActorType.SYSTEM,
         is_mock: bool = False,
         **kwargs
-    ) -> AlertAuditLog:
+    ) -> Dict[str, Any]:
         """Log alert escalation"""
         return self.log_action(
             alert_id=alert_id,
@@ -247,7 +379,7 @@ class AuditService:
         reason: str,
         is_mock: bool = False,
         **kwargs
-    ) -> AlertAuditLog:
+    ) -> Dict[str, Any]:
         """Log alert reassignment"""
         return self.log_action(
             alert_id=alert_id,
@@ -273,21 +405,18 @@ class AuditService:
         reason: Optional[str] = None,
         is_mock: bool = False,
         **kwargs
-    ) -> AlertAuditLog:
+    ) -> Dict[str, Any]:
         """Log severity change"""
-        details = {
-            "previous_severity": previous_severity,
-            "new_severity": new_severity,
-        }
-        if reason:
-            details["reason"] = reason
-
         return self.log_action(
             alert_id=alert_id,
             action=AuditAction.SEVERITY_CHANGED,
             actor_id=changed_by,
             actor_type=actor_type,
-            details=details,
+            details=_clean_details(
+                previous_severity=previous_severity,
+                new_severity=new_severity,
+                reason=reason or None,
+            ),
             is_mock=is_mock,
             **kwargs
         )
@@ -299,7 +428,7 @@ class AuditService:
         backup_staff_id: UUID,
         is_mock: bool = False,
         **kwargs
-    ) -> AlertAuditLog:
+    ) -> Dict[str, Any]:
         """Log backup request"""
         return self.log_action(
             alert_id=alert_id,
@@ -316,6 +445,9 @@ class AuditService:
         alert_id: UUID,
         limit: int = 100,
         offset: int = 0,
+        before_ts: Optional[datetime] = None,
+        before_id: Optional[UUID] = None,
+        is_mock: bool = False,
     ) -> List[AlertAuditLog]:
         """
         Get the complete audit trail for an alert.
@@ -323,22 +455,28 @@ class AuditService:
         Args:
             alert_id: The alert to get audit trail for
             limit: Maximum number of entries to return
-            offset: Number of entries to skip
+            offset: Number of entries to skip (ignored when a cursor is given)
+            before_ts: Keyset cursor - timestamp of the last entry already seen
+            before_id: Keyset cursor - id of the last entry already seen
+            is_mock: Whether the alert is a demo alert, whose trail is read
+                from memory unless PERSIST_MOCK_AUDIT is set
 
         Returns:
             List of audit log entries ordered by timestamp descending
         """
-        return (
-            self.db.query(AlertAuditLog)
-            .filter(AlertAuditLog.alert_id == alert_id)
-            .order_by(AlertAuditLog.timestamp.desc())
-            .offset(offset)
-            .limit(limit)
-            .all()
-        )
+        if is_mock and not settings.PERSIST_MOCK_AUDIT:
+            return _page_mock_entries(
+                self._mock_entries_for(alert_id), limit, offset, before_ts, before_id
+            )
 
-    def get_audit_count(self, alert_id: UUID) -> int:
+        query = self.db.query(AlertAuditLog).filter(AlertAuditLog.alert_id == alert_id)
+        return self._paginate(query, limit, offset, before_ts, before_id)
+
+    def get_audit_count(self, alert_id: UUID, is_mock: bool = False) -> int:
         """Get total count of audit entries for an alert"""
+        if is_mock and not settings.PERSIST_MOCK_AUDIT:
+            return len(self._mock_entries_for(alert_id))
+
         return (
             self.db.query(AlertAuditLog)
             .filter(AlertAuditLog.alert_id == alert_id)
@@ -350,13 +488,46 @@ class AuditService:
         actor_id: UUID,
         limit: int = 100,
         offset: int = 0,
+        before_ts: Optional[datetime] = None,
+        before_id: Optional[UUID] = None,
     ) -> List[AlertAuditLog]:
-        """Get all actions performed by a specific actor"""
+        """Get all actions performed by a specific actor (same paging as get_alert_audit_trail)"""
+        query = self.db.query(AlertAuditLog).filter(AlertAuditLog.actor_id == actor_id)
+        return self._paginate(query, limit, offset, before_ts, before_id)
+
+    @staticmethod
+    def _mock_entries_for(alert_id: UUID) -> List[Dict[str, Any]]:
+        """Snapshot the buffered demo entries for one alert"""
+        with _mock_audit_lock:
+            return list(_mock_audit_buffers.get(alert_id, ()))
+
+    def _paginate(
+        self,
+        query: Query,
+        limit: int,
+        offset: int,
+        before_ts: Optional[datetime],
+        before_id: Optional[UUID],
+    ) -> List[AlertAuditLog]:
+        """
+        Page newest-first, seeking past a (timestamp, id) cursor when given.
+
+        The cursor form reads only the requested rows from the
+        (filter column, timestamp, id) index, however deep the page is.
+        """
+        if before_ts is not None and before_id is not None:
+            query = query.filter(
+                or_(
+                    AlertAuditLog.timestamp < before_ts,
+                    and_(AlertAuditLog.timestamp == before_ts, AlertAuditLog.id < before_id),
+                )
+            )
+        elif offset:
+            query = query.offset(offset)
+
         return (
-            self.db.query(AlertAuditLog)
-            .filter(AlertAuditLog.actor_id == actor_id)
-            .order_by(AlertAuditLog.timestamp.desc())
-            .offset(offset)
+            query
+            .order_by(AlertAuditLog.timestamp.desc(), AlertAuditLog.id.desc())
             .limit(limit)
             .all()
         )
@@ -0,0 +1,174 @@
+"""
+Background batch writer shared by the audit log and the notification queue.
+Rows are queued in memory and inserted by a daemon thread in batches.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Queued after the last row to tell the writer thread to finish and exit
+_STOP = object()
+
+
+class BatchWriter:
+    """
+    Insert queued rows into a table from a background thread.
+
+    Rows wait at most flush_interval_seconds and are written up to
+    batch_size at a time in a short-lived session. At interpreter exit the
+    writer is told to stop and joined, so the batch it is writing is not
+    lost, and anything still queued is written from the exiting thread.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        name: str,
+        max_size: int,
+        batch_size: int,
+        flush_interval_seconds: float,
+        on_written: Optional[Callable[[], None]] = None,
+    ):
+        self.model = model
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.on_written = on_written
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_size)
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+
+        atexit.register(self.stop)
+
+    @property
+    def dropped(self) -> int:
+        """Rows dropped because the queue was full"""
+        return self._dropped
+
+    def full(self) -> bool:
+        return self._queue.full()
+
+    def record_dropped(self) -> int:
+        """Count a row dropped because the queue was full; returns the new total"""
+        with self._dropped_lock:
+            self._dropped += 1
+            return self._dropped
+
+    def offer(self, row: Dict[str, Any]) -> bool:
+        """Queue a row without blocking; False (and counted as dropped) if the queue is full"""
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.record_dropped()
+            return False
+
+        self._ensure_thread()
+        return True
+
+    def flush(self) -> None:
+        """Write everything currently queued from the calling thread"""
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    row = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if row is not _STOP:
+                    batch.append(row)
+            if not batch:
+                return
+            self._write_batch(batch)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Let the writer finish its current batch and exit, then write the rest here"""
+        self._stopping.set()
+        with self._thread_lock:
+            thread = self._thread
+
+        if thread is not None and thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                logger.warning(f"{self.name} writer did not take the stop signal")
+            thread.join(timeout)
+
+        self.flush()
+
+    def _ensure_thread(self) -> None:
+        """Start the background writer thread on first use"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if self._stopping.is_set():
+            return
+
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f"{self.name}-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Write queued rows in batches of up to batch_size until told to stop"""
+        while True:
+            row = self._queue.get()
+            if row is _STOP:
+                return
+
+            batch = [row]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stop = True
+                    break
+                batch.append(row)
+
+            self._write_batch(batch)
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """Insert a batch in a short-lived session, retrying row by row if it fails"""
+        db = SessionLocal()
+        try:
+            # executemany INSERT - batched into multi-row statements by the driver
+            db.execute(insert(self.model), batch)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            if len(batch) == 1:
+                logger.error(f"{self.name}: failed to write row for alert {batch[0].get('alert_id')}: {e}")
+                return
+            # One bad row (e.g. its alert was deleted meanwhile) shouldn't lose the rest
+            logger.warning(f"{self.name}: batch of {len(batch)} failed, retrying rows individually: {e}")
+            for row in batch:
+                self._write_batch([row])
+            return
+        finally:
+            db.close()
+
+        if self.on_written is not None:
+            self.on_written()
@@ -9,8 +9,12 @@ from typing import Optional, List, Dict, Any
 from uuid import UUID
 import threading
 import time
+from dataclasses import dataclass
 
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session, selectinload
+
+from database import SessionLocal
 
 from models.db.alerts import (
     Alert,
@@ -24,13 +28,24 @@ from models.db.alerts import (
 from models.schemas.alerts import AlertCreate, AlertStatusEnum, ResolutionTypeEnum
 from .alert_service import AlertService
 from .staff_service import StaffService
-from .notification_service import NotificationService
+from .notification_service import NotificationService, run_notification_queue
 from .assignment_engine import AssignmentEngine
 from .audit_service import AuditService
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True, frozen=True)
+class TimelineEvent:
+    """Detached copy of a DemoTimelineEvent, safe to use from background threads"""
+    step_number: int
+    delay_seconds: float
+    action: str
+    description: str
+    narration_text: Optional[str]
+    action_data: Dict[str, Any]
+
+
 class DemoState:
     """Holds the current state of a running demo"""
 
@@ -38,22 +53,48 @@ class DemoState:
         self.scenario_id: Optional[str] = None
         self.scenario_name: Optional[str] = None
         self.alert_id: Optional[UUID] = None
+        # Last loaded copy of the demo alert; steps merge it into their session
+        # instead of re-selecting it (see DemoService._load_demo_alert)
+        self.cached_alert: Optional[Alert] = None
         self.current_step: int = 0
         self.total_steps: int = 0
         self.started_at: Optional[datetime] = None
+        self.started_monotonic: Optional[float] = None
         self.paused: bool = False
         self.speed: float = 1.0
         self.auto_advance: bool = True
-        # Store event data as dicts to avoid SQLAlchemy session issues
-        self.timeline_events: List[Dict[str, Any]] = []
-        self._advance_timer: Optional[threading.Timer] = None
+        # Detached event records to avoid SQLAlchemy session issues
+        self.timeline_events: List[TimelineEvent] = []
+        # time.monotonic() at which each step is due (see plan_deadlines)
+        self.step_deadlines: List[float] = []
+        # time.monotonic() at which the scheduler thread runs the next step
+        self.next_step_at: Optional[float] = None
+        # Cached to_dict() fields that don't depend on the clock, rebuilt
+        # lazily after invalidate()
+        self._static: Optional[Dict[str, Any]] = None
+        self._has_next_step: bool = False
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert state to dictionary for API response"""
+        if self._static is None:
+            self._static = self._build_static()
+
+        now = time.monotonic()
         elapsed = 0
-        if self.started_at and not self.paused:
-            elapsed = (datetime.utcnow() - self.started_at).total_seconds() * self.speed
+        if self.started_monotonic is not None and not self.paused:
+            elapsed = (now - self.started_monotonic) * self.speed
 
+        return {
+            **self._static,
+            "elapsed_seconds": elapsed,
+            "next_step_in_seconds": (
+                max(0.0, self.next_step_at - now)
+                if self._has_next_step and self.next_step_at is not None and not self.paused else None
+            ),
+        }
+
+    def _build_static(self) -> Dict[str, Any]:
+        """Build the part of the payload that only changes on state transitions"""
         current_event = None
         next_event = None
         if self.timeline_events:
@@ -61,6 +102,7 @@ class DemoState:
                 current_event = self.timeline_events[self.current_step - 1]
             if self.current_step < len(self.timeline_events):
                 next_event = self.timeline_events[self.current_step]
+        self._has_next_step = next_event is not None
 
         return {
             "scenario_id": self.scenario_id,
@@ -68,28 +110,60 @@ class DemoState:
             "alert_id": str(self.alert_id) if self.alert_id else None,
             "current_step": self.current_step,
             "total_steps": self.total_steps,
-            "current_status": current_event["action"] if current_event else None,
-            "elapsed_seconds": elapsed,
+            "current_status": current_event.action if current_event else None,
             "speed": self.speed,
             "paused": self.paused,
             "auto_advance": self.auto_advance,
-            "next_step_description": next_event["description"] if next_event else None,
-            "next_step_in_seconds": (
-                (next_event["delay_seconds"] - elapsed) / self.speed
-                if next_event and not self.paused else None
-            ),
+            "next_step_description": next_event.description if next_event else None,
         }
 
+    def invalidate(self):
+        """Drop the cached payload; call after changing any field it shows"""
+        self._static = None
+
+    def plan_deadlines(self):
+        """
+        Compute monotonic deadlines for the timeline, counting from now.
+
+        Remaining steps keep their spacing relative to the last executed
+        step, scaled by the current speed. Called on start and whenever the
+        timing changes (resume, manual advance, speed change).
+        """
+        now = time.monotonic()
+        base = self.timeline_events[self.current_step - 1].delay_seconds if self.current_step > 0 else 0
+        self.step_deadlines = [
+            now + (event.delay_seconds - base) / self.speed
+            for event in self.timeline_events
+        ]
+
+    def cancel_next_step(self):
+        """Unschedule the pending auto-advance step"""
+        self.next_step_at = None
+        _demo_wakeup.set()
+
     def reset(self):
         """Reset the demo state"""
-        if self._advance_timer:
-            self._advance_timer.cancel()
+        self.cancel_next_step()
         self.__init__()
 
 
 # Global demo state (in production, use Redis or database)
 _demo_state = DemoState()
+# Guards _demo_state fields only; held briefly, never across DB calls
 _demo_lock = threading.Lock()
+# Serializes step execution and start/stop (DB work). Always acquired before
+# _demo_lock, never while holding it.
+_demo_step_lock = threading.RLock()
+
+# A single scheduler thread auto-advances the running demo. Anything that
+# changes the schedule sets _demo_wakeup so it re-reads next_step_at instead
+# of sleeping out a stale delay.
+_demo_wakeup = threading.Event()
+_demo_worker: Optional[threading.Thread] = None
+# Set after a step runs; the scheduler thread then delivers the queued
+# notifications, so back-to-back steps share one pass over the queue
+_demo_notifications_pending = threading.Event()
+_DEMO_NOTIFICATION_BATCH = 50
 
 
 class DemoService:
@@ -120,8 +194,38 @@ class DemoService:
         return query.order_by(DemoScenario.display_order).all()
 
     def get_scenario(self, scenario_id: str) -> Optional[DemoScenario]:
-        """Get a specific scenario by ID"""
-        return self.db.query(DemoScenario).filter(DemoScenario.id == scenario_id).first()
+        """Get a specific scenario by ID, with its timeline events (ordered by step)"""
+        return (
+            self.db.query(DemoScenario)
+            .options(selectinload(DemoScenario.timeline_events))
+            .filter(DemoScenario.id == scenario_id)
+            .first()
+        )
+
+    def _load_timeline(self, scenario_id: str) -> List[TimelineEvent]:
+        """
+        Load a scenario's timeline as detached records, ordered by step.
+
+        Selects the columns directly, so no ORM instances are built (and
+        nothing is left tied to the session for background threads to trip on).
+        """
+        rows = (
+            self.db.query(
+                DemoTimelineEvent.step_number,
+                DemoTimelineEvent.delay_seconds,
+                DemoTimelineEvent.action,
+                DemoTimelineEvent.description,
+                DemoTimelineEvent.narration_text,
+                DemoTimelineEvent.action_data,
+            )
+            .filter(DemoTimelineEvent.scenario_id == scenario_id)
+            .order_by(DemoTimelineEvent.step_number)
+            .all()
+        )
+        return [
+            TimelineEvent(step, delay, action, description, narration, action_data or {})
+            for step, delay, action, description, narration, action_data in rows
+        ]
 
     def get_state(self) -> Dict[str, Any]:
         """Get current demo state"""
@@ -147,72 +251,74 @@ class DemoService:
         """
         global _demo_state
 
-        scenario = self.get_scenario(scenario_id)
+        scenario = self.db.get(DemoScenario, scenario_id)
         if not scenario:
             raise ValueError(f"Scenario '{scenario_id}' not found")
 
-        # Stop any existing demo
-        self.stop_demo()
+        timeline_events = self._load_timeline(scenario_id)
 
-        with _demo_lock:
-            # Initialize state
-            _demo_state.scenario_id = scenario.id
-            _demo_state.scenario_name = scenario.name
-            _demo_state.speed = speed or scenario.default_speed
-            _demo_state.auto_advance = auto_advance if auto_advance is not None else scenario.auto_advance
-            # Convert ORM objects to dicts to avoid session issues in background threads
-            _demo_state.timeline_events = [
-                {
-                    "step_number": e.step_number,
-                    "delay_seconds": e.delay_seconds,
-                    "action": e.action,
-                    "description": e.description,
-                    "narration_text": e.narration_text,
-                    "action_data": e.action_data or {},
-                }
-                for e in sorted(scenario.timeline_events, key=lambda x: x.step_number)
-            ]
-            _demo_state.total_steps = len(_demo_state.timeline_events)
-            _demo_state.current_step = 0
-            _demo_state.started_at = datetime.utcnow()
-            _demo_state.paused = False
+        with _demo_step_lock:
+            # Stop any existing demo
+            self.stop_demo()
 
             # Create the alert from template
             alert = self._create_demo_alert(scenario)
-            _demo_state.alert_id = alert.id
+
+            with _demo_lock:
+                # Initialize state
+                _demo_state.scenario_id = scenario.id
+                _demo_state.scenario_name = scenario.name
+                _demo_state.speed = speed or scenario.default_speed
+                _demo_state.auto_advance = auto_advance if auto_advance is not None else scenario.auto_advance
+                _demo_state.timeline_events = timeline_events
+                _demo_state.total_steps = len(timeline_events)
+                _demo_state.current_step = 0
+                _demo_state.started_at = datetime.utcnow()
+                _demo_state.started_monotonic = time.monotonic()
+                _demo_state.paused = False
+                _demo_state.alert_id = alert.id
+                _demo_state.cached_alert = alert
+                _demo_state.invalidate()
 
             # Execute first step (create)
             self._execute_step(0)
 
-            # Schedule next step if auto-advance
-            if _demo_state.auto_advance and _demo_state.total_steps > 1:
-                self._schedule_next_step()
+            with _demo_lock:
+                _demo_state.plan_deadlines()
 
-            logger.info(f"Started demo scenario: {scenario.name}")
-            return _demo_state.to_dict()
+                # Schedule next step if auto-advance
+                if _demo_state.auto_advance and _demo_state.total_steps > 1:
+                    self._schedule_next_step()
+
+                logger.info("Started demo scenario: %s", scenario.name)
+                return _demo_state.to_dict()
 
     def stop_demo(self) -> Dict[str, Any]:
         """Stop the current demo"""
         global _demo_state
 
-        with _demo_lock:
-            if _demo_state._advance_timer:
-                _demo_state._advance_timer.cancel()
+        with _demo_step_lock:
+            with _demo_lock:
+                _demo_state.cancel_next_step()
+                alert_id = _demo_state.alert_id
+                result = _demo_state.to_dict()
+                _demo_state.reset()
 
             # Clean up the demo alert if it exists
-            if _demo_state.alert_id:
-                alert = self.alert_service.get_alert(_demo_state.alert_id)
+            if alert_id:
+                alert = self.alert_service.get_alert(alert_id)
                 if alert and alert.status != AlertStatus.RESOLVED:
                     # Mark as resolved
                     self.alert_service.resolve_alert(
-                        alert_id=_demo_state.alert_id,
+                        alert_id=alert_id,
                         resolved_by=None,
                         resolution_type=ResolutionTypeEnum.NO_ACTION_REQUIRED,
                         resolution_notes="Demo stopped",
                     )
 
-            result = _demo_state.to_dict()
-            _demo_state.reset()
+                # The demo's in-memory audit trail is not needed once it stops
+                AuditService.clear_mock_buffer(alert_id)
+
             logger.info("Demo stopped")
             return result
 
@@ -221,9 +327,9 @@ class DemoService:
         global _demo_state
 
         with _demo_lock:
-            if _demo_state._advance_timer:
-                _demo_state._advance_timer.cancel()
+            _demo_state.cancel_next_step()
             _demo_state.paused = True
+            _demo_state.invalidate()
             logger.info("Demo paused")
             return _demo_state.to_dict()
 
@@ -236,6 +342,8 @@ class DemoService:
                 raise ValueError("No demo to resume")
 
             _demo_state.paused = False
+            _demo_state.invalidate()
+            _demo_state.plan_deadlines()
 
             if _demo_state.auto_advance:
                 self._schedule_next_step()
@@ -247,25 +355,29 @@ class DemoService:
         """Manually advance to the next step"""
         global _demo_state
 
-        with _demo_lock:
-            if not _demo_state.scenario_id:
-                raise ValueError("No demo running")
+        with _demo_step_lock:
+            with _demo_lock:
+                if not _demo_state.scenario_id:
+                    raise ValueError("No demo running")
 
-            if _demo_state.current_step >= _demo_state.total_steps:
-                raise ValueError("Demo complete - no more steps")
+                if _demo_state.current_step >= _demo_state.total_steps:
+                    raise ValueError("Demo complete - no more steps")
 
-            # Cancel auto-advance timer
-            if _demo_state._advance_timer:
-                _demo_state._advance_timer.cancel()
+                # Cancel pending auto-advance
+                _demo_state.cancel_next_step()
+                step_index = _demo_state.current_step
 
             # Execute next step
-            self._execute_step(_demo_state.current_step)
+            self._execute_step(step_index)
 
-            # Reschedule if auto-advance
-            if _demo_state.auto_advance and not _demo_state.paused:
-                self._schedule_next_step()
+            with _demo_lock:
+                _demo_state.plan_deadlines()
 
-            return _demo_state.to_dict()
+                # Reschedule if auto-advance
+                if _demo_state.auto_advance and not _demo_state.paused:
+                    self._schedule_next_step()
+
+                return _demo_state.to_dict()
 
     def set_speed(self, speed: float) -> Dict[str, Any]:
         """Set the playback speed"""
@@ -276,14 +388,14 @@ class DemoService:
 
         with _demo_lock:
             _demo_state.speed = speed
+            _demo_state.invalidate()
+            _demo_state.plan_deadlines()
 
             # Reschedule next step with new timing
             if _demo_state.auto_advance and not _demo_state.paused:
-                if _demo_state._advance_timer:
-                    _demo_state._advance_timer.cancel()
                 self._schedule_next_step()
 
-            logger.info(f"Demo speed set to {speed}x")
+            logger.info("Demo speed set to %sx", speed)
             return _demo_state.to_dict()
 
     def _create_demo_alert(self, scenario: DemoScenario) -> Alert:
@@ -311,28 +423,95 @@ class DemoService:
         return alert
 
     def _execute_step(self, step_index: int):
-        """Execute a specific timeline step"""
+        """
+        Execute a specific timeline step (caller holds _demo_step_lock).
+
+        Each action makes at most one commit (its AlertService call, with any
+        notifications queued into the same transaction), and a failure rolls
+        the whole step back, so a step is applied atomically.
+        """
         global _demo_state
 
-        if step_index >= len(_demo_state.timeline_events):
-            logger.info("Demo complete - all steps executed")
-            return
+        with _demo_lock:
+            if step_index >= len(_demo_state.timeline_events):
+                logger.info("Demo complete - all steps executed")
+                return
 
-        event = _demo_state.timeline_events[step_index]
-        _demo_state.current_step = step_index + 1
+            event = _demo_state.timeline_events[step_index]
+            _demo_state.current_step = step_index + 1
+            _demo_state.invalidate()
+            alert_id = _demo_state.alert_id
+            cached_alert = _demo_state.cached_alert
 
-        logger.info(f"Executing demo step {_demo_state.current_step}: {event['action']} - {event['description']}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Executing demo step %d: %s - %s", step_index + 1, event.action, event.description)
 
         try:
-            self._execute_action(event)
+            alert = self._execute_action(event, alert_id, cached_alert)
         except Exception as e:
+            # Discard the step's pending writes so the next step starts clean,
+            # and reload the alert then since its state is now unknown
+            self.db.rollback()
+            with _demo_lock:
+                _demo_state.cached_alert = None
             logger.error(f"Error executing demo step: {e}")
+            return
 
-    def _execute_action(self, event: Dict[str, Any]):
-        """Execute the action for a timeline event"""
-        action = event["action"]
-        data = event.get("action_data") or {}
-        alert_id = _demo_state.alert_id
+        with _demo_lock:
+            if _demo_state.alert_id == alert_id:
+                _demo_state.cached_alert = alert
+
+        # Delivery happens on the scheduler thread, off the request path
+        _demo_notifications_pending.set()
+        _ensure_demo_worker()
+        _demo_wakeup.set()
+
+    def _load_demo_alert(self, alert_id: Optional[UUID], cached_alert: Optional[Alert]) -> Optional[Alert]:
+        """
+        Get the demo alert into this session, reusing the previous step's copy.
+
+        The copy is only reused if the alert's updated_at hasn't moved since,
+        since the REST routes can acknowledge, reassign or resolve the demo
+        alert between steps. merge(load=False) then places it in the
+        identity map without a full SELECT, so the AlertService lookups by
+        primary key that follow are served from it too.
+        """
+        if not alert_id:
+            return None
+
+        if cached_alert is not None:
+            cached_updated_at = inspect(cached_alert).dict.get("updated_at")
+            current_updated_at = self.db.execute(
+                select(Alert.updated_at).where(Alert.id == alert_id)
+            ).scalar_one_or_none()
+            if cached_updated_at is not None and cached_updated_at == current_updated_at:
+                return self.db.merge(cached_alert, load=False)
+
+        return self.alert_service.get_alert(alert_id)
+
+    def _execute_action(
+        self,
+        event: TimelineEvent,
+        alert_id: Optional[UUID],
+        cached_alert: Optional[Alert] = None,
+    ) -> Optional[Alert]:
+        """
+        Execute the action for a timeline event.
+
+        Notifications are queued with commit=False ahead of the AlertService
+        call that commits, so each step's alert change, audit entries and
+        notifications land in a single transaction.
+
+        Returns:
+            The alert as refreshed by the step's last change, for reuse by
+            the next step
+        """
+        action = event.action
+        data = event.action_data
+
+        # Working reference for every branch; AlertService methods operate on the
+        # same identity-mapped instance and return it refreshed after committing
+        alert = self._load_demo_alert(alert_id, cached_alert)
 
         if action == "create":
             # Alert already created, just log
@@ -342,66 +521,63 @@ class DemoService:
             staff_name = data.get("staff_name")
             staff = self._get_staff_by_name(staff_name)
             if staff:
-                self.alert_service.assign_alert(
+                # Queue notification; committed with the assignment
+                self.notification_service.notify_staff_of_assignment(staff, alert, commit=False)
+                alert = self.alert_service.assign_alert(
                     alert_id=alert_id,
                     staff_id=staff.id,
                     actor_type=ActorType.SYSTEM,
                     reason="demo_assignment",
-                )
-                # Queue notification
-                alert = self.alert_service.get_alert(alert_id)
-                self.notification_service.notify_staff_of_assignment(staff, alert)
+                ) or alert
 
         elif action == "multi_assign":
             staff_names = data.get("staff_names", [])
-            alert = self.alert_service.get_alert(alert_id)
-            for i, name in enumerate(staff_names):
-                staff = self._get_staff_by_name(name)
-                if staff:
-                    if i == 0:
-                        self.alert_service.assign_alert(
-                            alert_id=alert_id,
-                            staff_id=staff.id,
-                            actor_type=ActorType.SYSTEM,
-                            reason="demo_critical_primary",
-                        )
-                    self.notification_service.notify_staff_of_assignment(staff, alert, is_critical=True)
+            staff_map = self.staff_service.get_staff_by_names(staff_names)
+            notified = [staff_map[name] for name in staff_names if name in staff_map]
+            primary = staff_map.get(staff_names[0]) if staff_names else None
+            # Committed with the primary assignment when there is one
+            self.notification_service.notify_staff_batch(
+                notified, alert, is_critical=True, commit=primary is None,
+            )
+            if primary:
+                alert = self.alert_service.assign_alert(
+                    alert_id=alert_id,
+                    staff_id=primary.id,
+                    actor_type=ActorType.SYSTEM,
+                    reason="demo_critical_primary",
+                ) or alert
 
         elif action == "acknowledge":
-            alert = self.alert_service.get_alert(alert_id)
             if alert and alert.assigned_to:
-                self.alert_service.acknowledge_alert(
+                alert = self.alert_service.acknowledge_alert(
                     alert_id=alert_id,
                     staff_id=alert.assigned_to,
-                )
+                ) or alert
 
         elif action == "status_change":
             new_status = data.get("new_status", "investigating")
             note = data.get("note")
-            alert = self.alert_service.get_alert(alert_id)
             if alert:
-                self.alert_service.update_status(
+                alert = self.alert_service.update_status(
                     alert_id=alert_id,
                     new_status=AlertStatusEnum(new_status),
                     updated_by=alert.assigned_to,
                     actor_type=ActorType.STAFF,
                     notes=note,
-                )
+                ) or alert
 
         elif action == "note_add":
-            note = data.get("note", event["description"])
-            alert = self.alert_service.get_alert(alert_id)
+            note = data.get("note", event.description)
             if alert and alert.assigned_to:
-                self.alert_service.add_note(
+                alert = self.alert_service.add_note(
                     alert_id=alert_id,
                     note=note,
                     added_by=alert.assigned_to,
-                )
+                ) or alert
 
         elif action == "backup_request":
             staff_name = data.get("staff_name")
             staff = self._get_staff_by_name(staff_name)
-            alert = self.alert_service.get_alert(alert_id)
             if staff and alert:
                 self.notification_service.notify_staff_of_assignment(staff, alert, is_critical=True)
 
@@ -411,63 +587,47 @@ class DemoService:
             new_staff = self._get_staff_by_name(new_assignee_name) if new_assignee_name else None
 
             if new_staff:
-                self.alert_service.escalate_alert(
+                alert = self.alert_service.escalate_alert(
                     alert_id=alert_id,
                     escalate_to=new_staff.id,
                     reason=reason,
                     actor_type=ActorType.SYSTEM,
-                )
+                ) or alert
 
         elif action == "severity_change":
             new_severity = data.get("new_severity", "high")
             from models.schemas.alerts import AlertUpdate, AlertSeverityEnum
-            self.alert_service.update_alert(
+            alert = self.alert_service.update_alert(
                 alert_id=alert_id,
                 update_data=AlertUpdate(severity=AlertSeverityEnum(new_severity)),
                 actor_type=ActorType.SYSTEM,
-            )
+            ) or alert
 
         elif action == "resolve":
             resolution_type_str = data.get("resolution_type", "resolved")
             notes = data.get("notes", "Demo resolution")
-            alert = self.alert_service.get_alert(alert_id)
-            self.alert_service.resolve_alert(
+            alert = self.alert_service.resolve_alert(
                 alert_id=alert_id,
                 resolved_by=alert.assigned_to if alert else None,
                 resolution_type=ResolutionTypeEnum(resolution_type_str),
                 resolution_notes=notes,
-            )
+            ) or alert
 
-        # Process any queued notifications
-        self.notification_service.process_queue(batch_size=10)
+        return alert
 
     def _schedule_next_step(self):
-        """Schedule the next auto-advance step"""
+        """Schedule the next auto-advance step (caller holds _demo_lock)"""
         global _demo_state
 
         if _demo_state.current_step >= _demo_state.total_steps:
             return
 
-        next_event = _demo_state.timeline_events[_demo_state.current_step]
-
-        # Calculate delay based on speed
-        if _demo_state.current_step == 0:
-            delay = next_event["delay_seconds"] / _demo_state.speed
-        else:
-            prev_event = _demo_state.timeline_events[_demo_state.current_step - 1]
-            delay = (next_event["delay_seconds"] - prev_event["delay_seconds"]) / _demo_state.speed
-
+        delay = _demo_state.step_deadlines[_demo_state.current_step] - time.monotonic()
         delay = max(0.1, delay)  # Minimum delay
 
-        def advance():
-            with _demo_lock:
-                if not _demo_state.paused and _demo_state.scenario_id:
-                    self._execute_step(_demo_state.current_step)
-                    if _demo_state.current_step < _demo_state.total_steps:
-                        self._schedule_next_step()
-
-        _demo_state._advance_timer = threading.Timer(delay, advance)
-        _demo_state._advance_timer.start()
+        _demo_state.next_step_at = time.monotonic() + delay
+        _ensure_demo_worker()
+        _demo_wakeup.set()
 
     def _get_staff_by_name(self, name: str) -> Optional[StaffProfile]:
         """Get staff by name (for demo purposes)"""
@@ -498,6 +658,67 @@ class DemoService:
                     "description": e.description,
                     "narration": e.narration_text,
                 }
-                for e in sorted(scenario.timeline_events, key=lambda x: x.step_number)
+                for e in scenario.timeline_events
             ],
         }
+
+
+def _ensure_demo_worker():
+    """Start the demo scheduler thread on first use"""
+    global _demo_worker
+    if _demo_worker is None or not _demo_worker.is_alive():
+        _demo_worker = threading.Thread(target=_demo_worker_loop, name="demo-scheduler", daemon=True)
+        _demo_worker.start()
+
+
+def _demo_worker_loop():
+    """
+    Wait for the next scheduled step and run it, rescheduling on wakeups.
+    Also delivers notifications queued by steps since the last pass.
+    """
+    while True:
+        if _demo_notifications_pending.is_set():
+            _demo_notifications_pending.clear()
+            try:
+                run_notification_queue(batch_size=_DEMO_NOTIFICATION_BATCH)
+            except Exception as e:
+                logger.error(f"Error delivering demo notifications: {e}")
+
+        with _demo_lock:
+            next_step_at = _demo_state.next_step_at
+
+        delay = None if next_step_at is None else next_step_at - time.monotonic()
+        if delay is None or delay > 0:
+            # Woken early: the schedule changed, so re-read it
+            _demo_wakeup.wait(delay)
+            _demo_wakeup.clear()
+            continue
+
+        with _demo_step_lock:
+            with _demo_lock:
+                if _demo_state.next_step_at != next_step_at:
+                    continue
+                _demo_state.next_step_at = None
+                if _demo_state.paused or not _demo_state.scenario_id:
+                    continue
+                step_index = _demo_state.current_step
+
+            # Steps run outside any request, so use a dedicated session
+            db = SessionLocal()
+            try:
+                service = DemoService(db)
+                service._execute_step(step_index)
+
+                with _demo_lock:
+                    # Pause/resume may have changed the schedule meanwhile
+                    if (
+                        _demo_state.scenario_id
+                        and not _demo_state.paused
+                        and _demo_state.next_step_at is None
+                        and _demo_state.current_step < _demo_state.total_steps
+                    ):
+                        service._schedule_next_step()
+            except Exception as e:
+                logger.error(f"Error auto-advancing demo: {e}")
+            finally:
+                db.close()
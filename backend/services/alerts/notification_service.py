@@ -4,26 +4,149 @@ Supports email, SMS, and push notifications with queue-based processing.
 """
 
 import logging
+import math
+import string
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Callable
 from uuid import UUID
 from enum import Enum
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+import redis
+from sqlalchemy.orm import Session, SessionTransaction
+from sqlalchemy import and_, event, insert, update
 
 from models.db.alerts import (
     Alert,
+    AlertSeverity,
     StaffProfile,
     NotificationQueue,
     NotificationLog,
     NotificationChannel,
     NotificationStatus,
 )
+from database import SessionLocal
 from config import settings
+from .batch_writer import BatchWriter
 
 logger = logging.getLogger(__name__)
 
+# Rendered assignment content keyed by (alert id, updated_at). Any change to
+# an alert bumps updated_at, so a stale entry is never hit; entries are shared
+# across service instances so a fan-out (or a retry) formats each alert once.
+_ASSIGNMENT_CONTENT_CACHE_MAX_SIZE = 256
+_assignment_content_cache: Dict[Tuple[UUID, Optional[datetime]], Dict[str, str]] = {}
+_assignment_content_cache_lock = threading.Lock()
+
+# Provider clients are created once per process and shared by every
+# NotificationService (one is built per request)
+_firebase_app = None
+_firebase_lock = threading.Lock()
+_twilio_client = None
+_twilio_lock = threading.Lock()
+# One authenticated SMTP session, lent to one sender at a time
+_smtp_connection = None
+_smtp_lock = threading.Lock()
+
+# FCM accepts at most this many tokens per multicast request
+_FCM_MULTICAST_MAX_TOKENS = 500
+
+# Redis cache for get_queue_status counts; dropped whenever the queue changes
+_STATUS_COUNT_KEYS = ("notif:count:pending", "notif:count:failed", "notif:count:sent_today")
+_REDIS_RETRY_SECONDS = 60
+_redis_client = None
+_redis_retry_at = 0.0
+
+
+def _get_redis_client():
+    """Get or create the Redis client; None (retried later) if Redis is unreachable"""
+    global _redis_client, _redis_retry_at
+    if _redis_client is None and time.monotonic() >= _redis_retry_at:
+        try:
+            client = redis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB,
+                decode_responses=True,
+                socket_connect_timeout=0.5,
+                socket_timeout=0.5,
+            )
+            client.ping()
+            _redis_client = client
+        except Exception as e:
+            logger.warning(f"Redis connection failed: {e}. Queue status counts will not be cached.")
+            _redis_retry_at = time.monotonic() + _REDIS_RETRY_SECONDS
+    return _redis_client
+
+
+def _invalidate_status_counts() -> None:
+    """Drop the cached queue status counts after the queue changed"""
+    client = _get_redis_client()
+    if client is None:
+        return
+    try:
+        client.delete(*_STATUS_COUNT_KEYS)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to invalidate queue status cache: {e}")
+
+
+# Key in Session.info holding queue_notification rows waiting for the
+# caller's transaction to commit
+_PENDING_NOTIFICATIONS_KEY = "pending_notifications"
+
+# Standalone queue_notification rows waiting to be inserted by the background
+# writer, so the calling request doesn't wait on an INSERT and COMMIT
+_notification_writer = BatchWriter(
+    NotificationQueue,
+    name="notification",
+    max_size=settings.NOTIFICATION_BUFFER_MAX_SIZE,
+    batch_size=settings.NOTIFICATION_BUFFER_BATCH_SIZE,
+    flush_interval_seconds=settings.NOTIFICATION_BUFFER_FLUSH_INTERVAL_SECONDS,
+    on_written=_invalidate_status_counts,
+)
+
+
+def _buffer_notification(fields: Dict[str, Any]) -> bool:
+    """Hand a row to the background writer without blocking; False if it was dropped"""
+    if _notification_writer.offer(fields):
+        return True
+    _log_dropped_notification(fields)
+    return False
+
+
+def _log_dropped_notification(fields: Dict[str, Any]) -> None:
+    """Warn about a notification dropped because the buffer was full"""
+    logger.warning(
+        f"Notification buffer full, dropped {fields['channel'].value} notification for staff "
+        f"{fields['recipient_id']}, alert {fields['alert_id']} "
+        f"(total dropped={_notification_writer.dropped})"
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _buffer_committed_notifications(session: Session) -> None:
+    """Hand notifications to the writer once the alert they describe is committed"""
+    entries = session.info.pop(_PENDING_NOTIFICATIONS_KEY, None)
+    for fields in entries or ():
+        _buffer_notification(fields)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted_notifications(session: Session, transaction: SessionTransaction) -> None:
+    """Rows still pending when the transaction ends were rolled back or closed without a commit"""
+    if transaction.parent is not None:
+        return
+    entries = session.info.pop(_PENDING_NOTIFICATIONS_KEY, None)
+    if entries:
+        logger.warning(
+            f"Discarded {len(entries)} queued notification(s) whose transaction did not commit "
+            f"(alerts: {', '.join(sorted({str(fields['alert_id']) for fields in entries}))})"
+        )
+
 
 class NotificationPriority(str, Enum):
     """Priority levels for notifications"""
@@ -33,6 +156,53 @@ class NotificationPriority(str, Enum):
     CRITICAL = "critical"
 
 
+# Map priority to AlertSeverity enum (used by the model)
+_PRIORITY_SEVERITY = {
+    NotificationPriority.LOW: AlertSeverity.LOW,
+    NotificationPriority.NORMAL: AlertSeverity.MEDIUM,
+    NotificationPriority.HIGH: AlertSeverity.HIGH,
+    NotificationPriority.CRITICAL: AlertSeverity.CRITICAL,
+}
+
+# Message bodies, parsed once at import and filled in with a single substitute()
+_ASSIGNMENT_TEMPLATE = string.Template("""You have been assigned to respond to an alert.
+
+Alert: $title
+Severity: $severity
+Location: $building, Zone $zone_id
+Time: $time
+
+Description:
+$description
+
+Please acknowledge this alert and respond immediately.
+
+---
+Fazri Security System
+""")
+
+_SMS_TEMPLATE = string.Template(
+    "FAZRI ALERT [$severity]: $title. Location: $zone_id. Respond immediately."
+)
+
+_ESCALATION_TEMPLATE = string.Template("""ESCALATED ALERT - Immediate Response Required
+
+Alert: $title
+Severity: $severity
+Location: $building, Zone $zone_id
+Escalation Reason: $reason
+Escalation Count: $escalation_count
+
+Description:
+$description
+
+This alert has been escalated to you due to $reason. Please respond immediately.
+
+---
+Fazri Security System
+""")
+
+
 class NotificationService:
     """
     Service for managing and sending notifications.
@@ -69,7 +239,8 @@ class NotificationService:
         message: str,
         priority: NotificationPriority = NotificationPriority.NORMAL,
         metadata: Optional[Dict[str, Any]] = None,
-    ) -> NotificationQueue:
+        commit: bool = True,
+    ) -> Optional[NotificationQueue]:
         """
         Queue a notification for delivery.
 
@@ -81,44 +252,120 @@ class NotificationService:
             message: Notification body
             priority: Delivery priority
             metadata: Additional data for the notification
+            commit: Commit the session now; pass False to hold the row until
+                the caller commits (the alert or assignment it refers to
+                must exist first)
+
+        The row is handed to a background writer once the session commits;
+        it inserts buffered notifications in batches, reaching the queue
+        within NOTIFICATION_BUFFER_FLUSH_INTERVAL_SECONDS. If the session
+        rolls back or is closed without committing, the row is discarded
+        with a warning.
+
+        If the buffer is already full, HIGH and CRITICAL rows are inserted
+        straight into the caller's transaction instead, and NORMAL and LOW
+        rows are dropped with a warning. The commit itself never waits: a
+        row is still dropped if the buffer fills between this call and the
+        commit.
 
         Returns:
-            Created notification queue entry
+            Notification queue entry (not attached to the session), or None
+            if the buffer was full and the notification was dropped. With
+            commit=False it is not written until the caller commits.
         """
-        from models.db.alerts import AlertSeverity
-
-        # Map priority to AlertSeverity enum (used by the model)
-        priority_map = {
-            NotificationPriority.LOW: AlertSeverity.LOW,
-            NotificationPriority.NORMAL: AlertSeverity.MEDIUM,
-            NotificationPriority.HIGH: AlertSeverity.HIGH,
-            NotificationPriority.CRITICAL: AlertSeverity.CRITICAL,
-        }
-
-        notification = NotificationQueue(
-            recipient_id=staff_id,
+        fields = self._notification_values(
+            staff_id=staff_id,
             alert_id=alert_id,
             channel=channel,
-            title=subject,
-            body=message,
-            priority=priority_map.get(priority, AlertSeverity.MEDIUM),
-            data=metadata or {},
-            status=NotificationStatus.PENDING,
+            subject=subject,
+            message=message,
+            priority=priority,
+            metadata=metadata,
         )
-
-        self.db.add(notification)
-        self.db.commit()
-        self.db.refresh(notification)
+        # Generated here so the caller gets a complete entry without a round trip
+        fields["id"] = uuid.uuid4()
+        fields["created_at"] = datetime.utcnow()
+
+        # Decided now rather than in the commit hook, so the commit never
+        # waits for room and the caller sees None for a dropped row
+        inline = _notification_writer.full()
+        if inline:
+            if fields["priority"] not in (AlertSeverity.HIGH, AlertSeverity.CRITICAL):
+                _notification_writer.record_dropped()
+                _log_dropped_notification(fields)
+                return None
+            self.db.execute(insert(NotificationQueue), [fields])
+        else:
+            self.db.info.setdefault(_PENDING_NOTIFICATIONS_KEY, []).append(fields)
+
+        if commit:
+            self.db.commit()
+            if inline:
+                _invalidate_status_counts()
+
+        notification = NotificationQueue(**fields)
 
         logger.info(f"Queued {channel.value} notification for staff {staff_id}, alert {alert_id}")
         return notification
 
+    def queue_notifications_bulk(
+        self,
+        notifications: List[Dict[str, Any]],
+        commit: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Queue several notifications in one INSERT.
+
+        Rows are plain column dicts rather than ORM objects, so nothing is
+        tracked in the identity map; the Core insert runs straight away in
+        the session's transaction and still joins the caller's commit.
+
+        Args:
+            notifications: Column values from _notification_values
+            commit: Commit immediately; pass False to leave the notifications
+                pending in the caller's transaction
+
+        Returns:
+            The queued rows
+        """
+        if not notifications:
+            return notifications
+
+        self.db.execute(insert(NotificationQueue), notifications)
+        if commit:
+            self.db.commit()
+            _invalidate_status_counts()
+        return notifications
+
+    def _notification_values(
+        self,
+        staff_id: UUID,
+        alert_id: UUID,
+        channel: NotificationChannel,
+        subject: str,
+        message: str,
+        priority: NotificationPriority = NotificationPriority.NORMAL,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Column values for a new notification queue entry"""
+        return {
+            "recipient_id": staff_id,
+            "alert_id": alert_id,
+            "channel": channel,
+            "title": subject,
+            "body": message,
+            "priority": _PRIORITY_SEVERITY.get(priority, AlertSeverity.MEDIUM),
+            "data": metadata or {},
+            "status": NotificationStatus.PENDING,
+        }
+
     def notify_staff_of_assignment(
         self,
         staff: StaffProfile,
         alert: Alert,
         is_critical: bool = False,
-    ) -> List[NotificationQueue]:
+        commit: bool = True,
+    ) -> List[Dict[str, Any]]:
         """
         Send notifications to staff about a new alert assignment.
         Respects staff contact preferences.
@@ -127,57 +374,133 @@ class NotificationService:
             staff: Staff member being notified
             alert: The assigned alert
             is_critical: Whether this is a critical priority notification
+            commit: Commit immediately; pass False to leave the notifications
+                pending in the caller's transaction
 
         Returns:
-            List of queued notifications
+            List of queued notification rows
         """
+        return self.notify_staff_batch([staff], alert, is_critical=is_critical, commit=commit)
+
+    def notify_staff_batch(
+        self,
+        staff_list: List[StaffProfile],
+        alert: Alert,
+        is_critical: bool = False,
+        commit: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Notify several staff members of an assignment in one commit.
+
+        Args:
+            staff_list: Staff members being notified
+            alert: The assigned alert
+            is_critical: Whether this is a critical priority notification
+            commit: Commit immediately; pass False to leave the notifications
+                pending in the caller's transaction
+
+        Returns:
+            List of queued notification rows
+        """
+        # Content depends only on the alert, so build it once for everyone
+        content = self._build_assignment_content(alert)
+
         queued = []
-        priority = NotificationPriority.CRITICAL if is_critical else NotificationPriority.HIGH
+        for staff in staff_list:
+            queued.extend(self._build_assignment_notifications(staff, alert, is_critical, content))
+
+        if not queued:
+            return queued
+
+        self.queue_notifications_bulk(queued, commit=commit)
+
+        logger.info(
+            f"Queued {len(queued)} assignment notifications for {len(staff_list)} staff, alert {alert.id}"
+        )
+        return queued
+
+    def _build_assignment_content(self, alert: Alert) -> Dict[str, str]:
+        """Build (or reuse) the subject and message bodies shared by every assignee"""
+        cache_key = (alert.id, alert.updated_at)
+        with _assignment_content_cache_lock:
+            content = _assignment_content_cache.get(cache_key)
+        if content is not None:
+            return content
 
-        # Build notification content
-        subject = self._build_assignment_subject(alert)
         message = self._build_assignment_message(alert)
+        content = {
+            "subject": self._build_assignment_subject(alert),
+            "message": message,
+            "sms_message": self._build_sms_message(alert),
+            "push_message": message[:200],  # Push notifications are short
+        }
+
+        with _assignment_content_cache_lock:
+            if len(_assignment_content_cache) >= _ASSIGNMENT_CONTENT_CACHE_MAX_SIZE:
+                _assignment_content_cache.clear()
+            _assignment_content_cache[cache_key] = content
+
+        return content
 
+    def _build_assignment_notifications(
+        self,
+        staff: StaffProfile,
+        alert: Alert,
+        is_critical: bool,
+        content: Dict[str, str],
+    ) -> List[Dict[str, Any]]:
+        """Build assignment notification rows for one staff member"""
         preferences = staff.contact_preferences or {}
 
+        # Skip channels the provider would reject anyway for lack of an address
+        send_email = bool(staff.email) and preferences.get("email", True) and NotificationChannel.EMAIL in self.providers
+        send_sms = bool(staff.phone) and preferences.get("sms", True) and NotificationChannel.SMS in self.providers
+        send_push = (
+            bool(preferences.get("device_token") or settings.NOTIFICATION_MOCK_MODE)
+            and preferences.get("push", True)
+            and NotificationChannel.PUSH in self.providers
+        )
+        if not (send_email or send_sms or send_push):
+            return []
+
+        queued = []
+        priority = NotificationPriority.CRITICAL if is_critical else NotificationPriority.HIGH
+        subject = content["subject"]
+
         # Queue notifications based on staff preferences
-        if preferences.get("email", True) and NotificationChannel.EMAIL in self.providers:
-            notif = self.queue_notification(
+        if send_email:
+            queued.append(self._notification_values(
                 staff_id=staff.id,
                 alert_id=alert.id,
                 channel=NotificationChannel.EMAIL,
                 subject=subject,
-                message=message,
+                message=content["message"],
                 priority=priority,
                 metadata={"alert_severity": alert.severity.value, "zone_id": (alert.location or {}).get("zone_id")},
-            )
-            queued.append(notif)
+            ))
 
-        if preferences.get("sms", True) and NotificationChannel.SMS in self.providers:
+        if send_sms:
             # SMS gets shorter message
-            sms_message = self._build_sms_message(alert)
-            notif = self.queue_notification(
+            queued.append(self._notification_values(
                 staff_id=staff.id,
                 alert_id=alert.id,
                 channel=NotificationChannel.SMS,
                 subject=subject,
-                message=sms_message,
+                message=content["sms_message"],
                 priority=priority,
                 metadata={"alert_severity": alert.severity.value},
-            )
-            queued.append(notif)
+            ))
 
-        if preferences.get("push", True) and NotificationChannel.PUSH in self.providers:
-            notif = self.queue_notification(
+        if send_push:
+            queued.append(self._notification_values(
                 staff_id=staff.id,
                 alert_id=alert.id,
                 channel=NotificationChannel.PUSH,
                 subject=subject,
-                message=message[:200],  # Push notifications are short
+                message=content["push_message"],
                 priority=priority,
                 metadata={"alert_id": str(alert.id), "action": "view_alert"},
-            )
-            queued.append(notif)
+            ))
 
         return queued
 
@@ -186,7 +509,8 @@ class NotificationService:
         staff: StaffProfile,
         alert: Alert,
         escalation_reason: str,
-    ) -> List[NotificationQueue]:
+        commit: bool = True,
+    ) -> List[Dict[str, Any]]:
         """
         Send escalation notifications to staff.
 
@@ -194,20 +518,27 @@ class NotificationService:
             staff: Staff member receiving escalation
             alert: The escalated alert
             escalation_reason: Why the alert was escalated
+            commit: Commit immediately; pass False to leave the notifications
+                pending in the caller's transaction
 
         Returns:
-            List of queued notifications
+            List of queued notification rows
         """
+        preferences = staff.contact_preferences or {}
+
+        send_email = bool(staff.email) and NotificationChannel.EMAIL in self.providers
+        send_sms = bool(staff.phone) and preferences.get("sms", True) and NotificationChannel.SMS in self.providers
+        if not (send_email or send_sms):
+            return []
+
         queued = []
 
         subject = f"ESCALATED: {alert.title}"
         message = self._build_escalation_message(alert, escalation_reason)
 
-        preferences = staff.contact_preferences or {}
-
         # Always send email for escalations
-        if NotificationChannel.EMAIL in self.providers:
-            notif = self.queue_notification(
+        if send_email:
+            queued.append(self._notification_values(
                 staff_id=staff.id,
                 alert_id=alert.id,
                 channel=NotificationChannel.EMAIL,
@@ -215,23 +546,21 @@ class NotificationService:
                 message=message,
                 priority=NotificationPriority.CRITICAL,
                 metadata={"escalation_reason": escalation_reason},
-            )
-            queued.append(notif)
+            ))
 
         # SMS for escalations if enabled
-        if preferences.get("sms", True) and NotificationChannel.SMS in self.providers:
+        if send_sms:
             sms_message = f"ESCALATED ALERT: {alert.title}. {escalation_reason}. Immediate response required."
-            notif = self.queue_notification(
+            queued.append(self._notification_values(
                 staff_id=staff.id,
                 alert_id=alert.id,
                 channel=NotificationChannel.SMS,
                 subject=subject,
                 message=sms_message,
                 priority=NotificationPriority.CRITICAL,
-            )
-            queued.append(notif)
+            ))
 
-        return queued
+        return self.queue_notifications_bulk(queued, commit=commit)
 
     def process_queue(self, batch_size: int = 50) -> Dict[str, int]:
         """
@@ -245,7 +574,10 @@ class NotificationService:
         """
         results = {"sent": 0, "failed": 0, "skipped": 0}
 
-        # Get pending notifications ordered by priority and creation time
+        # Claim pending notifications ordered by priority and creation time.
+        # The row locks are held until the commit below, and SKIP LOCKED lets
+        # concurrent workers take the next rows instead of the same ones; a
+        # worker that dies releases its claim with its connection.
         pending = (
             self.db.query(NotificationQueue)
             .filter(NotificationQueue.status == NotificationStatus.PENDING)
@@ -254,81 +586,265 @@ class NotificationService:
                 NotificationQueue.created_at.asc()
             )
             .limit(batch_size)
+            .with_for_update(skip_locked=True, of=NotificationQueue)
             .all()
         )
 
-        for notification in pending:
-            try:
-                success = self._send_notification(notification)
-                if success:
-                    notification.status = NotificationStatus.SENT
-                    notification.sent_at = datetime.utcnow()
-                    results["sent"] += 1
-                else:
-                    notification.status = NotificationStatus.FAILED
-                    notification.retry_count += 1
+        # Load every recipient in the batch with one IN query
+        recipient_ids = {n.recipient_id for n in pending}
+        staff_map = {
+            staff.id: staff
+            for staff in self.db.query(StaffProfile).filter(StaffProfile.id.in_(recipient_ids)).all()
+        } if recipient_ids else {}
+        # Push targets, read once from the preloaded profiles for the push batch
+        push_tokens = {
+            staff_id: (staff.contact_preferences or {}).get("device_token")
+            for staff_id, staff in staff_map.items()
+        } if any(n.channel == NotificationChannel.PUSH for n in pending) else {}
+        # Delivery log rows, inserted together before the commit
+        log_rows: List[Dict[str, Any]] = []
+        # Outcomes are applied as one UPDATE per group rather than per row;
+        # failures are keyed by error message (None when the provider just
+        # returned False)
+        sent_ids: List[UUID] = []
+        failed_ids: Dict[Optional[str], List[UUID]] = {}
+
+        # Provider calls are network-bound and keep no per-call state, so they
+        # run concurrently; every DB update stays on this thread
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(settings.NOTIFICATION_SEND_WORKERS, len(pending))),
+            thread_name_prefix="notification-send",
+        )
+        try:
+            sends, rounds = self._start_sends(pending, staff_map, push_tokens, executor)
+            # One deadline for the whole batch: waiting on many results that
+            # share a hung call must not multiply the timeout (the claimed
+            # rows stay locked meanwhile)
+            deadline = time.monotonic() + rounds * settings.NOTIFICATION_SEND_TIMEOUT_SECONDS
+
+            for notification, send in sends:
+                try:
+                    success = False
+                    if send is not None:
+                        staff, get_result = send
+                        success = get_result(max(0.0, deadline - time.monotonic()))
+                        # Log the delivery attempt
+                        log_rows.append(self._build_log_row(notification, staff, success))
+
+                    if success:
+                        sent_ids.append(notification.id)
+                        results["sent"] += 1
+                    else:
+                        failed_ids.setdefault(None, []).append(notification.id)
+                        results["failed"] += 1
+                except Exception as e:
+                    logger.error(f"Error processing notification {notification.id}: {e}")
+                    failed_ids.setdefault(str(e), []).append(notification.id)
                     results["failed"] += 1
-            except Exception as e:
-                logger.error(f"Error processing notification {notification.id}: {e}")
-                notification.status = NotificationStatus.FAILED
-                notification.error_message = str(e)
-                notification.retry_count += 1
-                results["failed"] += 1
-
+        finally:
+            # Don't hold the batch up on sends that already timed out
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        # The commit expires the claimed objects, so skip syncing them here
+        if sent_ids:
+            self.db.execute(
+                update(NotificationQueue)
+                .where(NotificationQueue.id.in_(sent_ids))
+                .values(status=NotificationStatus.SENT, sent_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+        for error_message, ids in failed_ids.items():
+            values = {
+                "status": NotificationStatus.FAILED,
+                "retry_count": NotificationQueue.retry_count + 1,
+            }
+            if error_message is not None:
+                values["error_message"] = error_message
+            self.db.execute(
+                update(NotificationQueue)
+                .where(NotificationQueue.id.in_(ids))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+        if log_rows:
+            self.db.execute(insert(NotificationLog), log_rows)
         self.db.commit()
+        if pending:
+            _invalidate_status_counts()
         logger.info(f"Processed notification queue: {results}")
         return results
 
-    def _send_notification(self, notification: NotificationQueue) -> bool:
+    def _start_sends(
+        self,
+        pending: List[NotificationQueue],
+        staff_map: Dict[UUID, StaffProfile],
+        push_tokens: Dict[UUID, Optional[str]],
+        executor: ThreadPoolExecutor,
+    ) -> Tuple[List[Tuple[NotificationQueue, Optional[Tuple[StaffProfile, Callable[[float], bool]]]]], int]:
         """
-        Send a single notification through the appropriate provider.
+        Submit a batch of notifications to their providers.
 
-        Args:
-            notification: The notification to send
+        Emails go out together over one SMTP session (see
+        EmailProvider.send_many) and pushes together with their preloaded
+        device tokens (see PushProvider.send_many), in calls of at most
+        NOTIFICATION_SEND_MANY_MAX_MESSAGES; SMS are sent one call each.
 
         Returns:
-            True if sent successfully
+            Each notification with its recipient and a callable that waits
+            up to the given number of seconds for the send result (None if
+            it can't be sent), and how many NOTIFICATION_SEND_TIMEOUT_SECONDS
+            rounds the calls need: the pool runs its workers' worth per
+            round, and email calls take turns on the shared SMTP session
         """
+        sends = []
+        emails = []
+        pushes = []
+        for notification in pending:
+            if notification.channel == NotificationChannel.EMAIL:
+                emails.append(notification)
+            elif notification.channel == NotificationChannel.PUSH:
+                pushes.append(notification)
+            else:
+                sends.append((notification, self._start_send(notification, staff_map, executor)))
+
+        calls = len(sends)
+        email_calls = 0
+        if emails:
+            email_sends, email_calls = self._start_batch(emails, staff_map, executor)
+            sends.extend(email_sends)
+        if pushes:
+            push_sends, push_calls = self._start_batch(
+                pushes, staff_map, executor,
+                device_tokens=lambda staff: push_tokens.get(staff.id),
+            )
+            sends.extend(push_sends)
+            calls += push_calls
+        calls += email_calls
+
+        workers = max(1, min(settings.NOTIFICATION_SEND_WORKERS, len(pending)))
+        rounds = max(1, math.ceil(calls / workers), email_calls)
+        return sends, rounds
+
+    def _resolve_send(
+        self,
+        notification: NotificationQueue,
+        staff_map: Dict[UUID, StaffProfile],
+    ) -> Optional[Tuple['BaseNotificationProvider', StaffProfile]]:
+        """Find the provider and recipient for a notification, or None if either is missing"""
         provider = self.providers.get(notification.channel)
         if not provider:
             logger.warning(f"No provider for channel {notification.channel}")
-            return False
+            return None
 
         # Get staff details for sending
-        staff = self.db.query(StaffProfile).get(notification.recipient_id)
+        staff = staff_map.get(notification.recipient_id)
         if not staff:
             logger.error(f"Staff {notification.recipient_id} not found")
-            return False
+            return None
+
+        return provider, staff
+
+    def _start_send(
+        self,
+        notification: NotificationQueue,
+        staff_map: Dict[UUID, StaffProfile],
+        executor: ThreadPoolExecutor,
+    ) -> Optional[Tuple[StaffProfile, Callable[[float], bool]]]:
+        """
+        Submit a single notification to the appropriate provider.
+
+        Args:
+            notification: The notification to send
+            staff_map: Recipients of the current batch, by id
+            executor: Pool the provider call runs on
+
+        Returns:
+            The recipient and a callable that waits up to the given number
+            of seconds for the send result, or None if it can't be sent
+        """
+        resolved = self._resolve_send(notification, staff_map)
+        if resolved is None:
+            return None
+        provider, staff = resolved
 
         # Send through provider
-        success = provider.send(
+        future = executor.submit(
+            provider.send,
             recipient=staff,
             subject=notification.title,
             message=notification.body,
             metadata=notification.data,
         )
+        return staff, lambda timeout: future.result(timeout=timeout)
 
-        # Log the delivery attempt
-        self._log_notification(notification, staff, success)
-
-        return success
+    def _start_batch(
+        self,
+        notifications: List[NotificationQueue],
+        staff_map: Dict[UUID, StaffProfile],
+        executor: ThreadPoolExecutor,
+        device_tokens: Optional[Callable[[StaffProfile], Optional[str]]] = None,
+    ) -> Tuple[List[Tuple[NotificationQueue, Optional[Tuple[StaffProfile, Callable[[float], bool]]]]], int]:
+        """
+        Submit same-channel notifications as send_many calls of at most
+        NOTIFICATION_SEND_MANY_MAX_MESSAGES each; returns the sends and the
+        number of calls submitted.
 
-    def _log_notification(
+        device_tokens, when given, looks up each recipient's push token and is
+        passed through to PushProvider.send_many.
+        """
+        sends = []
+        targets = []
+        for notification in notifications:
+            resolved = self._resolve_send(notification, staff_map)
+            if resolved is None:
+                sends.append((notification, None))
+            else:
+                targets.append((notification, resolved))
+
+        if not targets:
+            return sends, 0
+
+        provider = targets[0][1][0]
+        chunk_size = max(1, settings.NOTIFICATION_SEND_MANY_MAX_MESSAGES)
+        calls = 0
+        for start in range(0, len(targets), chunk_size):
+            chunk = targets[start:start + chunk_size]
+            messages = [(staff, n.title, n.body, n.data) for n, (_, staff) in chunk]
+            if device_tokens is not None:
+                future: "Future[List[bool]]" = executor.submit(
+                    provider.send_many, messages,
+                    device_tokens=[device_tokens(staff) for _, (_, staff) in chunk],
+                )
+            else:
+                future = executor.submit(provider.send_many, messages)
+            calls += 1
+            for i, (notification, (_, staff)) in enumerate(chunk):
+                sends.append((
+                    notification,
+                    (staff, lambda timeout, future=future, i=i: future.result(timeout=timeout)[i]),
+                ))
+        return sends, calls
+
+    def _build_log_row(
         self,
         notification: NotificationQueue,
         staff: StaffProfile,
         success: bool,
-    ):
-        """Log notification delivery attempt"""
-        log = NotificationLog(
-            notification_id=notification.id,
-            recipient_id=staff.id,
-            channel=notification.channel,
-            recipient_address=self._get_recipient_address(staff, notification.channel),
-            status=NotificationStatus.SENT if success else NotificationStatus.FAILED,
-            sent_at=datetime.utcnow() if success else None,
-        )
-        self.db.add(log)
+    ) -> Dict[str, Any]:
+        """
+        Build the NotificationLog values for a delivery attempt.
+
+        The rows are written with a Core insert, so no ORM events fire; every
+        value is set explicitly here (only the id comes from its column default).
+        """
+        return {
+            "notification_id": notification.id,
+            "recipient_id": staff.id,
+            "channel": notification.channel,
+            "recipient_address": self._get_recipient_address(staff, notification.channel),
+            "status": NotificationStatus.SENT if success else NotificationStatus.FAILED,
+            "sent_at": datetime.utcnow() if success else None,
+        }
 
     def _get_recipient_address(self, staff: StaffProfile, channel: NotificationChannel) -> str:
         """Get recipient address based on channel"""
@@ -354,52 +870,35 @@ class NotificationService:
     def _build_assignment_message(self, alert: Alert) -> str:
         """Build full notification message for alert assignment"""
         location = alert.location or {}
-        building = location.get("building", "Unknown")
-        zone_id = location.get("zone_id", "Unknown")
-
-        return f"""You have been assigned to respond to an alert.
-
-Alert: {alert.title}
-Severity: {alert.severity.value.upper()}
-Location: {building}, Zone {zone_id}
-Time: {alert.created_at.strftime('%Y-%m-%d %H:%M:%S')}
-
-Description:
-{alert.description}
-
-Please acknowledge this alert and respond immediately.
-
----
-Fazri Security System
-"""
+        return _ASSIGNMENT_TEMPLATE.substitute(
+            title=alert.title,
+            severity=alert.severity.value.upper(),
+            building=location.get("building", "Unknown"),
+            zone_id=location.get("zone_id", "Unknown"),
+            time=alert.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            description=alert.description,
+        )
 
     def _build_sms_message(self, alert: Alert) -> str:
         """Build short SMS message for alert assignment"""
-        zone_id = (alert.location or {}).get("zone_id", "Unknown")
-        return f"FAZRI ALERT [{alert.severity.value.upper()}]: {alert.title}. Location: {zone_id}. Respond immediately."
+        return _SMS_TEMPLATE.substitute(
+            severity=alert.severity.value.upper(),
+            title=alert.title,
+            zone_id=(alert.location or {}).get("zone_id", "Unknown"),
+        )
 
     def _build_escalation_message(self, alert: Alert, reason: str) -> str:
         """Build escalation notification message"""
         location = alert.location or {}
-        building = location.get("building", "Unknown")
-        zone_id = location.get("zone_id", "Unknown")
-
-        return f"""ESCALATED ALERT - Immediate Response Required
-
-Alert: {alert.title}
-Severity: {alert.severity.value.upper()}
-Location: {building}, Zone {zone_id}
-Escalation Reason: {reason}
-Escalation Count: {alert.escalation_count}
-
-Description:
-{alert.description}
-
-This alert has been escalated to you due to {reason}. Please respond immediately.
-
----
-Fazri Security System
-"""
+        return _ESCALATION_TEMPLATE.substitute(
+            title=alert.title,
+            severity=alert.severity.value.upper(),
+            building=location.get("building", "Unknown"),
+            zone_id=location.get("zone_id", "Unknown"),
+            reason=reason,
+            escalation_count=alert.escalation_count,
+            description=alert.description,
+        )
 
     def get_notification_history(
         self,
@@ -428,7 +927,45 @@ Fazri Security System
         return query.order_by(NotificationLog.created_at.desc()).limit(limit).all()
 
     def get_queue_status(self) -> Dict[str, Any]:
-        """Get current notification queue status"""
+        """
+        Get current notification queue status.
+
+        The counts are cached in Redis for NOTIFICATION_STATUS_CACHE_TTL_SECONDS
+        (and dropped when the queue is written), so dashboard polling doesn't
+        re-run the COUNT queries each time.
+        """
+        client = _get_redis_client()
+        counts = None
+        if client is not None:
+            try:
+                cached = client.mget(_STATUS_COUNT_KEYS)
+                if all(value is not None for value in cached):
+                    counts = [int(value) for value in cached]
+            except redis.RedisError as e:
+                logger.warning(f"Failed to read queue status cache: {e}")
+
+        if counts is None:
+            counts = self._count_queue_status()
+            if client is not None:
+                try:
+                    pipe = client.pipeline()
+                    for key, value in zip(_STATUS_COUNT_KEYS, counts):
+                        pipe.setex(key, settings.NOTIFICATION_STATUS_CACHE_TTL_SECONDS, value)
+                    pipe.execute()
+                except redis.RedisError as e:
+                    logger.warning(f"Failed to cache queue status: {e}")
+
+        pending, failed, sent_today = counts
+        return {
+            "pending": pending,
+            "failed": failed,
+            "sent_today": sent_today,
+            "dropped": _notification_writer.dropped,
+            "providers_enabled": [c.value for c in self.providers.keys()],
+        }
+
+    def _count_queue_status(self) -> List[int]:
+        """Count pending, failed and sent-today notifications in the database"""
         from sqlalchemy import func
 
         pending = self.db.query(func.count(NotificationQueue.id)).filter(
@@ -442,16 +979,14 @@ Fazri Security System
         sent_today = self.db.query(func.count(NotificationLog.id)).filter(
             and_(
                 NotificationLog.status == NotificationStatus.SENT,
-                NotificationLog.sent_at >= datetime.utcnow().replace(hour=0, minute=0, second=0)
+                # Start of the current UTC day, computed by the database; the
+                # column is compared to a constant so ix_notification_logs_sent_at
+                # is usable (sent_at holds naive UTC timestamps)
+                NotificationLog.sent_at >= func.date_trunc("day", func.timezone("utc", func.now()))
             )
         ).scalar()
 
-        return {
-            "pending": pending,
-            "failed": failed,
-            "sent_today": sent_today,
-            "providers_enabled": [c.value for c in self.providers.keys()],
-        }
+        return [pending, failed, sent_today]
 
 
 class BaseNotificationProvider:
@@ -467,6 +1002,16 @@ class BaseNotificationProvider:
         """Send a notification. Override in subclasses."""
         raise NotImplementedError
 
+    def send_many(
+        self,
+        messages: List[Tuple[StaffProfile, str, str, Optional[Dict[str, Any]]]],
+    ) -> List[bool]:
+        """
+        Send several notifications given as (recipient, subject, message, metadata).
+        Providers that can share a connection override this.
+        """
+        return [self.send(*message) for message in messages]
+
 
 class EmailProvider(BaseNotificationProvider):
     """Email notification provider"""
@@ -496,21 +1041,8 @@ class EmailProvider(BaseNotificationProvider):
             return True
 
         try:
-            import smtplib
-            from email.mime.text import MIMEText
-            from email.mime.multipart import MIMEMultipart
-
-            msg = MIMEMultipart()
-            msg['From'] = self.from_address
-            msg['To'] = recipient.email
-            msg['Subject'] = subject
-            msg.attach(MIMEText(message, 'plain'))
-
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                if self.smtp_user and self.smtp_password:
-                    server.starttls()
-                    server.login(self.smtp_user, self.smtp_password)
-                server.send_message(msg)
+            with self._session() as server:
+                server.send_message(self._build_message(recipient, subject, message))
 
             logger.info(f"Email sent to {recipient.email}")
             return True
@@ -519,6 +1051,97 @@ class EmailProvider(BaseNotificationProvider):
             logger.error(f"Failed to send email to {recipient.email}: {e}")
             return False
 
+    def send_many(
+        self,
+        messages: List[Tuple[StaffProfile, str, str, Optional[Dict[str, Any]]]],
+    ) -> List[bool]:
+        """Send several emails over the shared SMTP connection"""
+        if settings.NOTIFICATION_MOCK_MODE or len(messages) < 2:
+            return super().send_many(messages)
+
+        results = [False] * len(messages)
+        try:
+            with self._session() as server:
+                for i, (recipient, subject, message, _metadata) in enumerate(messages):
+                    if not recipient.email:
+                        logger.warning(f"No email for staff {recipient.id}")
+                        continue
+                    try:
+                        server.send_message(self._build_message(recipient, subject, message))
+                        results[i] = True
+                        logger.info(f"Email sent to {recipient.email}")
+                    except Exception as e:
+                        logger.error(f"Failed to send email to {recipient.email}: {e}")
+        except Exception as e:
+            # Connection or login failed (or dropped); unsent emails stay failed
+            logger.error(f"SMTP session failed after {sum(results)}/{len(messages)} emails: {e}")
+
+        return results
+
+    @contextmanager
+    def _session(self):
+        """
+        Lend the process-wide SMTP connection, reconnecting only if a NOOP
+        shows it has gone stale, so the TLS/AUTH handshake is paid once
+        rather than per email or per batch.
+        """
+        global _smtp_connection
+        with _smtp_lock:
+            server = _smtp_connection
+            if server is not None:
+                try:
+                    alive = server.noop()[0] == 250
+                except Exception:
+                    alive = False
+                if not alive:
+                    self._close_quietly(server)
+                    server = None
+            if server is None:
+                server = self._connect()
+            _smtp_connection = server
+
+            try:
+                yield server
+            except Exception:
+                # The session may be left mid-command; start afresh next time
+                self._close_quietly(server)
+                _smtp_connection = None
+                raise
+
+    @staticmethod
+    def _close_quietly(server) -> None:
+        """Close an SMTP connection, ignoring errors from a dead socket"""
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _connect(self):
+        """Open an SMTP session, upgrading to TLS and logging in when configured"""
+        import smtplib
+
+        server = smtplib.SMTP(self.smtp_host, self.smtp_port)
+        try:
+            if self.smtp_user and self.smtp_password:
+                server.starttls()
+                server.login(self.smtp_user, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _build_message(self, recipient: StaffProfile, subject: str, message: str):
+        """Build the MIME message for one email"""
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+
+        msg = MIMEMultipart()
+        msg['From'] = self.from_address
+        msg['To'] = recipient.email
+        msg['Subject'] = subject
+        msg.attach(MIMEText(message, 'plain'))
+        return msg
+
 
 class SMSProvider(BaseNotificationProvider):
     """SMS notification provider (Twilio-compatible)"""
@@ -528,6 +1151,16 @@ class SMSProvider(BaseNotificationProvider):
         self.auth_token = settings.TWILIO_AUTH_TOKEN
         self.from_number = settings.TWILIO_FROM_NUMBER
 
+    def _get_client(self):
+        """Get the process-wide Twilio client, creating it on first use"""
+        global _twilio_client
+        if _twilio_client is None:
+            with _twilio_lock:
+                if _twilio_client is None:
+                    from twilio.rest import Client
+                    _twilio_client = Client(self.account_sid, self.auth_token)
+        return _twilio_client
+
     def send(
         self,
         recipient: StaffProfile,
@@ -546,9 +1179,7 @@ class SMSProvider(BaseNotificationProvider):
             return True
 
         try:
-            from twilio.rest import Client
-
-            client = Client(self.account_sid, self.auth_token)
+            client = self._get_client()
             sms = client.messages.create(
                 body=message,
                 from_=self.from_number,
@@ -568,36 +1199,124 @@ class PushProvider(BaseNotificationProvider):
 
     def __init__(self):
         self.firebase_credentials = settings.FIREBASE_CREDENTIALS_PATH
-        self._initialized = False
 
     def _init_firebase(self):
-        """Lazy initialization of Firebase"""
-        if self._initialized:
+        """Lazy, process-wide initialization of Firebase"""
+        global _firebase_app
+        if _firebase_app is not None or settings.NOTIFICATION_MOCK_MODE:
             return
 
+        with _firebase_lock:
+            if _firebase_app is not None:
+                return
+            try:
+                import firebase_admin
+                from firebase_admin import credentials
+
+                if self.firebase_credentials:
+                    cred = credentials.Certificate(self.firebase_credentials)
+                    _firebase_app = firebase_admin.initialize_app(cred)
+            except Exception as e:
+                logger.error(f"Failed to initialize Firebase: {e}")
+
+    def send(
+        self,
+        recipient: StaffProfile,
+        subject: str,
+        message: str,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Send push notification"""
+        # Get device token from staff profile (would be stored in contact_preferences)
+        device_token = (recipient.contact_preferences or {}).get("device_token")
+        return self._send_to_device(recipient, subject, message, metadata, device_token)
+
+    def send_many(
+        self,
+        messages: List[Tuple[StaffProfile, str, str, Optional[Dict[str, Any]]]],
+        device_tokens: Optional[List[Optional[str]]] = None,
+    ) -> List[bool]:
+        """
+        Send several pushes, using one FCM multicast per distinct content.
+
+        device_tokens (parallel to messages) saves reading each recipient's
+        contact preferences again.
+        """
+        if device_tokens is None:
+            device_tokens = [
+                (recipient.contact_preferences or {}).get("device_token")
+                for recipient, _, _, _ in messages
+            ]
         if settings.NOTIFICATION_MOCK_MODE:
-            self._initialized = True
-            return
+            return [
+                self._send_to_device(recipient, subject, message, metadata, device_token)
+                for (recipient, subject, message, metadata), device_token in zip(messages, device_tokens)
+            ]
+
+        results = [False] * len(messages)
+
+        # Fan-outs share content, so group by (title, body, data) and send each
+        # group to all of its devices in one multicast request
+        groups: Dict[Tuple[Any, ...], List[int]] = {}
+        for i, ((recipient, subject, message, metadata), device_token) in enumerate(zip(messages, device_tokens)):
+            if not device_token:
+                logger.warning(f"No device token for staff {recipient.id}")
+                continue
+            key = (subject, message, tuple(sorted((metadata or {}).items())))
+            groups.setdefault(key, []).append(i)
+
+        for (subject, message, data), indexes in groups.items():
+            for start in range(0, len(indexes), _FCM_MULTICAST_MAX_TOKENS):
+                chunk = indexes[start:start + _FCM_MULTICAST_MAX_TOKENS]
+                for i, success in zip(chunk, self._send_multicast(
+                    [device_tokens[i] for i in chunk], subject, message, dict(data),
+                )):
+                    results[i] = success
+
+        return results
+
+    def _send_multicast(
+        self,
+        tokens: List[str],
+        subject: str,
+        message: str,
+        data: Dict[str, Any],
+    ) -> List[bool]:
+        """Send one notification to up to _FCM_MULTICAST_MAX_TOKENS devices in a single request"""
+        self._init_firebase()
 
         try:
-            import firebase_admin
-            from firebase_admin import credentials
+            from firebase_admin import messaging
+
+            multicast = messaging.MulticastMessage(
+                notification=messaging.Notification(
+                    title=subject,
+                    body=message,
+                ),
+                data=data,
+                tokens=tokens,
+            )
+            # send_multicast was superseded by send_each_for_multicast in newer SDKs
+            send = getattr(messaging, "send_each_for_multicast", None) or messaging.send_multicast
+            response = send(multicast)
+            logger.info(
+                f"Push multicast sent: {response.success_count}/{len(tokens)} delivered"
+            )
+            return [r.success for r in response.responses]
 
-            if self.firebase_credentials:
-                cred = credentials.Certificate(self.firebase_credentials)
-                firebase_admin.initialize_app(cred)
-                self._initialized = True
         except Exception as e:
-            logger.error(f"Failed to initialize Firebase: {e}")
+            logger.error(f"Failed to send push multicast to {len(tokens)} devices: {e}")
+            return [False] * len(tokens)
 
-    def send(
+    def _send_to_device(
         self,
         recipient: StaffProfile,
         subject: str,
         message: str,
-        metadata: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]],
+        device_token: Optional[str],
     ) -> bool:
-        """Send push notification"""
+        """Send one push to a known device token"""
         # In demo/mock mode, just log the push
         if settings.NOTIFICATION_MOCK_MODE:
             logger.info(f"[MOCK PUSH] To: {recipient.name}, Title: {subject}")
@@ -608,8 +1327,6 @@ class PushProvider(BaseNotificationProvider):
         try:
             from firebase_admin import messaging
 
-            # Get device token from staff profile (would be stored in contact_preferences)
-            device_token = (recipient.contact_preferences or {}).get("device_token")
             if not device_token:
                 logger.warning(f"No device token for staff {recipient.id}")
                 return False
@@ -630,3 +1347,17 @@ class PushProvider(BaseNotificationProvider):
         except Exception as e:
             logger.error(f"Failed to send push to {recipient.name}: {e}")
             return False
+
+
+def run_notification_queue(batch_size: int = 50) -> Dict[str, int]:
+    """
+    Process pending notifications with a dedicated session.
+
+    Suitable for FastAPI BackgroundTasks, so provider calls (SMTP, Twilio,
+    FCM) run after the response has been sent rather than inside the request.
+    """
+    db = SessionLocal()
+    try:
+        return NotificationService(db).process_queue(batch_size=batch_size)
+    finally:
+        db.close()
@@ -3,13 +3,16 @@ Staff Service for managing security staff profiles and locations.
 Handles staff CRUD operations, location tracking, and availability.
 """
 
+import copy
 import logging
-from datetime import datetime
-from typing import Optional, List, Tuple
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional, List, Tuple, Dict, Iterable, Any
 from uuid import UUID
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc, func
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy import and_, bindparam, case, delete, desc, func, insert, inspect, or_, select, update
 
 from models.db.alerts import (
     StaffProfile,
@@ -28,12 +31,56 @@ from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Staff profile column values keyed by (lookup field, value) -> (expires_at, values).
+# Profiles change rarely but are looked up on every routing decision; entries
+# are dropped by the mutators below and otherwise age out after the TTL.
+# The cache is per process: with several API workers, a change made through
+# one worker can be served stale by the others until the TTL expires.
+_STAFF_PROFILE_CACHE_TTL_SECONDS = 30
+_STAFF_PROFILE_CACHE_MAX_SIZE = 1024
+_staff_profile_cache: Dict[Tuple[str, Any], Tuple[float, Dict[str, Any]]] = {}
+_staff_profile_cache_lock = threading.Lock()
+
+_STAFF_PROFILE_COLUMNS = [attr.key for attr in inspect(StaffProfile).column_attrs]
+
+# Hot lookups built once, so each call only binds parameters against an
+# already-compiled statement. They select plain column values rather than
+# entities, so the result never comes from (or lands in) a session's
+# identity map.
+_STAFF_LOOKUPS = {
+    field: select(*(getattr(StaffProfile, key) for key in _STAFF_PROFILE_COLUMNS))
+    .where(getattr(StaffProfile, field) == bindparam("value"))
+    .limit(1)
+    for field in ("id", "email", "entity_id")
+}
+# Old location rows are deleted this many at a time, one commit per batch
+_LOCATION_PRUNE_BATCH_SIZE = 5000
+
+_ACTIVE_COUNTS_BY_ASSIGNEE = (
+    select(Alert.assigned_to, func.count(Alert.id))
+    .where(
+        Alert.assigned_to.isnot(None),
+        Alert.status != AlertStatus.RESOLVED,
+    )
+    .group_by(Alert.assigned_to)
+)
+
+
+def _invalidate_staff_profile(staff_id: UUID) -> None:
+    """Drop every cached lookup that resolves to the given staff member"""
+    with _staff_profile_cache_lock:
+        stale = [key for key, (_, values) in _staff_profile_cache.items() if values["id"] == staff_id]
+        for key in stale:
+            del _staff_profile_cache[key]
+
 
 class StaffService:
     """Service for managing security staff"""
 
     def __init__(self, db: Session):
         self.db = db
+        # Active assignment counts for every assignee, loaded on first use
+        self._active_count_cache: Optional[Dict[UUID, int]] = None
 
     # =========================================================================
     # STAFF PROFILE CRUD
@@ -49,18 +96,7 @@ class StaffService:
         Returns:
             The created staff profile
         """
-        staff = StaffProfile(
-            entity_id=staff_data.entity_id,
-            name=staff_data.name,
-            email=staff_data.email,
-            phone=staff_data.phone,
-            role=StaffRole(staff_data.role.value),
-            department=staff_data.department,
-            on_duty=staff_data.on_duty,
-            max_concurrent_assignments=staff_data.max_concurrent_assignments,
-            contact_preferences=staff_data.contact_preferences.model_dump(),
-            is_mock_user=staff_data.is_mock_user,
-        )
+        staff = StaffProfile(**self._staff_values(staff_data))
 
         self.db.add(staff)
         self.db.commit()
@@ -70,17 +106,119 @@ class StaffService:
 
         return staff
 
+    def bulk_create_staff(self, staff_data: List[StaffProfileCreate]) -> List[UUID]:
+        """
+        Create several staff profiles in one INSERT and one commit.
+
+        Intended for seeding and imports, where create_staff per row would pay
+        for a flush, commit and refresh each time.
+
+        Args:
+            staff_data: Staff creation data
+
+        Returns:
+            IDs of the created profiles, in input order
+        """
+        if not staff_data:
+            return []
+
+        staff_ids = list(
+            self.db.execute(
+                insert(StaffProfile).returning(StaffProfile.id, sort_by_parameter_order=True),
+                [self._staff_values(data) for data in staff_data],
+            ).scalars()
+        )
+        self.db.commit()
+
+        logger.info(f"Staff created in bulk: count={len(staff_ids)}")
+
+        return staff_ids
+
+    def _staff_values(self, staff_data: StaffProfileCreate) -> Dict[str, Any]:
+        """Column values for a new staff profile"""
+        # The schema fields map one-to-one onto columns; one dump serializes
+        # the nested contact preferences along with everything else
+        values = staff_data.model_dump()
+        values["role"] = StaffRole(staff_data.role.value)
+        return values
+
     def get_staff(self, staff_id: UUID) -> Optional[StaffProfile]:
         """Get a staff profile by ID"""
-        return self.db.query(StaffProfile).filter(StaffProfile.id == staff_id).first()
+        return self._get_cached_staff("id", staff_id)
 
     def get_staff_by_email(self, email: str) -> Optional[StaffProfile]:
         """Get a staff profile by email"""
-        return self.db.query(StaffProfile).filter(StaffProfile.email == email).first()
+        return self._get_cached_staff("email", email)
 
     def get_staff_by_entity_id(self, entity_id: str) -> Optional[StaffProfile]:
         """Get a staff profile by campus entity ID"""
-        return self.db.query(StaffProfile).filter(StaffProfile.entity_id == entity_id).first()
+        return self._get_cached_staff("entity_id", entity_id)
+
+    def _get_cached_staff(self, field: str, value: Any) -> Optional[StaffProfile]:
+        """
+        Look a staff profile up through the shared profile cache.
+
+        Only column values are cached, so a hit is rebuilt as a fresh instance
+        and merged into this session without a SELECT; relationships still
+        lazy-load against this session as usual. A profile this session has
+        already loaded is returned untouched, cached values never overwrite
+        its state or pending changes.
+
+        The cache is only filled from rows this session has not loaded, read
+        without autoflush, so another request never sees changes this
+        session made but hasn't committed. It is per process, so other
+        workers may serve a profile up to _STAFF_PROFILE_CACHE_TTL_SECONDS
+        stale after a change.
+        """
+        cache_key = (field, value)
+        now = time.monotonic()
+
+        if field == "id":
+            existing = self.db.identity_map.get(self.db.identity_key(StaffProfile, value))
+            if existing is not None:
+                return existing
+
+        with _staff_profile_cache_lock:
+            cached = _staff_profile_cache.get(cache_key)
+        if cached and cached[0] > now:
+            return self._attach_staff(cached[1])
+
+        with self.db.no_autoflush:
+            row = self.db.execute(_STAFF_LOOKUPS[field], {"value": value}).mappings().first()
+        if row is None:
+            return None
+
+        values = dict(row)
+        existing = self.db.identity_map.get(self.db.identity_key(StaffProfile, values["id"]))
+        if existing is not None:
+            # Loaded (and possibly changed) by this session - don't cache its view
+            return existing
+
+        with _staff_profile_cache_lock:
+            if len(_staff_profile_cache) >= _STAFF_PROFILE_CACHE_MAX_SIZE:
+                _staff_profile_cache.clear()
+            _staff_profile_cache[cache_key] = (now + _STAFF_PROFILE_CACHE_TTL_SECONDS, values)
+
+        return self._attach_staff(values)
+
+    def _attach_staff(self, values: Dict[str, Any]) -> StaffProfile:
+        """Attach a profile built from known column values to this session without a SELECT"""
+        existing = self.db.identity_map.get(self.db.identity_key(StaffProfile, values["id"]))
+        if existing is not None:
+            return existing
+
+        staff = StaffProfile(**copy.deepcopy(values))
+        make_transient_to_detached(staff)
+        return self.db.merge(staff, load=False)
+
+    def get_staff_by_names(self, names: Iterable[str]) -> Dict[str, StaffProfile]:
+        """Get staff profiles for several names in one query, keyed by name"""
+        names = [name for name in names if name]
+        if not names:
+            return {}
+
+        staff_list = self.db.query(StaffProfile).filter(StaffProfile.name.in_(names)).all()
+        return {staff.name: staff for staff in staff_list}
 
     def get_all_staff(
         self,
@@ -89,6 +227,8 @@ class StaffService:
         is_mock: Optional[bool] = None,
         limit: int = 50,
         offset: int = 0,
+        after_name: Optional[str] = None,
+        after_id: Optional[UUID] = None,
     ) -> Tuple[List[StaffProfile], int]:
         """
         Get all staff with optional filters.
@@ -98,10 +238,13 @@ class StaffService:
             on_duty: Filter by on-duty status
             is_mock: Filter by mock flag
             limit: Maximum number of results
-            offset: Number of results to skip
+            offset: Number of results to skip (ignored when a cursor is given)
+            after_name: Keyset cursor - name of the last profile already seen
+            after_id: Keyset cursor - id of the last profile already seen
 
         Returns:
-            Tuple of (staff list, total count)
+            Tuple of (staff list, total count of matching staff); the total
+            ignores the cursor, so it is the same on every page
         """
         query = self.db.query(StaffProfile)
 
@@ -114,17 +257,37 @@ class StaffService:
         if is_mock is not None:
             query = query.filter(StaffProfile.is_mock_user == is_mock)
 
-        total = query.count()
+        if after_name is not None and after_id is not None:
+            # The window count would only see rows after the cursor, so the
+            # total comes from a separate count of the filtered query
+            staff_list = (
+                query
+                .filter(
+                    or_(
+                        StaffProfile.name > after_name,
+                        and_(StaffProfile.name == after_name, StaffProfile.id > after_id),
+                    )
+                )
+                .order_by(StaffProfile.name, StaffProfile.id)
+                .limit(limit)
+                .all()
+            )
+            return staff_list, query.count()
 
-        staff = (
+        # The filtered total rides along with each row as a window count
+        rows = (
             query
-            .order_by(StaffProfile.name)
+            .add_columns(func.count().over().label("total"))
+            .order_by(StaffProfile.name, StaffProfile.id)
             .offset(offset)
             .limit(limit)
             .all()
         )
+        if rows:
+            return [staff for staff, _ in rows], rows[0].total
 
-        return staff, total
+        # A page past the end has no rows to carry the total
+        return [], query.count() if offset else 0
 
     def update_staff(
         self,
@@ -141,38 +304,20 @@ class StaffService:
         Returns:
             The updated staff or None if not found
         """
-        staff = self.get_staff(staff_id)
-        if not staff:
-            return None
-
-        if update_data.name is not None:
-            staff.name = update_data.name
-
-        if update_data.email is not None:
-            staff.email = update_data.email
-
-        if update_data.phone is not None:
-            staff.phone = update_data.phone
-
+        # Fields left out or sent as None are not updated. exclude_none would
+        # also strip nulls nested inside contact_preferences, so only the top
+        # level is filtered
+        values = {
+            key: value
+            for key, value in update_data.model_dump(exclude_unset=True).items()
+            if value is not None
+        }
         if update_data.role is not None:
-            staff.role = StaffRole(update_data.role.value)
-
-        if update_data.department is not None:
-            staff.department = update_data.department
-
-        if update_data.on_duty is not None:
-            staff.on_duty = update_data.on_duty
-
-        if update_data.max_concurrent_assignments is not None:
-            staff.max_concurrent_assignments = update_data.max_concurrent_assignments
-
-        if update_data.contact_preferences is not None:
-            staff.contact_preferences = update_data.contact_preferences.model_dump()
+            values["role"] = StaffRole(update_data.role.value)
 
-        staff.updated_at = datetime.utcnow()
-
-        self.db.commit()
-        self.db.refresh(staff)
+        staff = self._update_staff_row(staff_id, values)
+        if not staff:
+            return None
 
         logger.info(f"Staff updated: id={staff_id}")
 
@@ -180,28 +325,48 @@ class StaffService:
 
     def update_duty_status(self, staff_id: UUID, on_duty: bool) -> Optional[StaffProfile]:
         """Update a staff member's on-duty status"""
-        staff = self.get_staff(staff_id)
+        staff = self._update_staff_row(staff_id, {"on_duty": on_duty})
         if not staff:
             return None
 
-        staff.on_duty = on_duty
-        staff.updated_at = datetime.utcnow()
-
-        self.db.commit()
-        self.db.refresh(staff)
-
         logger.info(f"Staff duty status updated: id={staff_id}, on_duty={on_duty}")
 
         return staff
 
+    def _update_staff_row(self, staff_id: UUID, values: Dict[str, Any]) -> Optional[StaffProfile]:
+        """
+        Apply column updates to one staff profile with a single UPDATE ... RETURNING.
+
+        The returned row is attached to the session like a profile cache hit,
+        so there is no SELECT before the write and no refresh after the commit.
+        updated_at is set by the column's onupdate and comes back with the row.
+        """
+        row = self.db.execute(
+            update(StaffProfile)
+            .where(StaffProfile.id == staff_id)
+            .values(**values)
+            .returning(*[getattr(StaffProfile, key) for key in _STAFF_PROFILE_COLUMNS])
+            .execution_options(synchronize_session=False)
+        ).first()
+        if row is None:
+            return None
+
+        self.db.commit()
+        _invalidate_staff_profile(staff_id)
+
+        return self._attach_staff(dict(zip(_STAFF_PROFILE_COLUMNS, row)))
+
     def delete_staff(self, staff_id: UUID) -> bool:
         """Delete a staff profile"""
-        staff = self.get_staff(staff_id)
+        # Loaded rather than deleted with a bare DELETE so the ORM clears
+        # actor_id on the staff member's audit logs, which have no ON DELETE rule
+        staff = self.db.get(StaffProfile, staff_id)
         if not staff:
             return False
 
         self.db.delete(staff)
         self.db.commit()
+        _invalidate_staff_profile(staff_id)
 
         logger.info(f"Staff deleted: id={staff_id}")
 
@@ -230,16 +395,31 @@ class StaffService:
         if not staff:
             return None
 
+        now = datetime.utcnow()
         location = StaffLocation(
             staff_id=staff_id,
             zone_id=location_data.zone_id,
             building=location_data.building,
             floor=location_data.floor,
             source=location_data.source,
+            timestamp=now,
         )
 
         self.db.add(location)
+        # Keep the profile's current zone in step with the history; a move is
+        # not a profile edit, so updated_at keeps its value
+        self.db.execute(
+            update(StaffProfile)
+            .where(StaffProfile.id == staff_id)
+            .values(
+                current_zone_id=location_data.zone_id,
+                current_zone_updated_at=now,
+                updated_at=StaffProfile.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
         self.db.commit()
+        _invalidate_staff_profile(staff_id)
         self.db.refresh(location)
 
         logger.debug(f"Staff location updated: staff={staff_id}, zone={location_data.zone_id}")
@@ -259,30 +439,127 @@ class StaffService:
         self,
         staff_id: UUID,
         limit: int = 20,
+        before_ts: Optional[datetime] = None,
+        before_id: Optional[UUID] = None,
     ) -> List[StaffLocation]:
-        """Get a staff member's recent location history"""
+        """
+        Get a staff member's recent location history, newest first.
+
+        Pass the timestamp and id of the last location already seen as
+        before_ts/before_id to fetch the next page by seeking the
+        (staff_id, timestamp) index rather than skipping rows.
+        """
+        query = self.db.query(StaffLocation).filter(StaffLocation.staff_id == staff_id)
+
+        if before_ts is not None and before_id is not None:
+            query = query.filter(
+                or_(
+                    StaffLocation.timestamp < before_ts,
+                    and_(StaffLocation.timestamp == before_ts, StaffLocation.id < before_id),
+                )
+            )
+
         return (
-            self.db.query(StaffLocation)
-            .filter(StaffLocation.staff_id == staff_id)
-            .order_by(desc(StaffLocation.timestamp))
+            query
+            .order_by(desc(StaffLocation.timestamp), desc(StaffLocation.id))
             .limit(limit)
             .all()
         )
 
+    def prune_location_history(self, retention_days: Optional[int] = None) -> int:
+        """
+        Delete location history older than the retention window.
+
+        Each staff member's newest location is always kept, however old, so
+        get_current_location still has an answer. Rows are removed in batches
+        of _LOCATION_PRUNE_BATCH_SIZE so no single statement holds locks on
+        a large part of the table.
+
+        Args:
+            retention_days: Days of history to keep (defaults to
+                STAFF_LOCATION_RETENTION_DAYS)
+
+        Returns:
+            Number of location rows deleted
+        """
+        if retention_days is None:
+            retention_days = settings.STAFF_LOCATION_RETENTION_DAYS
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+
+        newer = StaffLocation.__table__.alias("newer")
+        expired_ids = (
+            select(StaffLocation.id)
+            .where(
+                StaffLocation.timestamp < cutoff,
+                select(newer.c.id)
+                .where(
+                    newer.c.staff_id == StaffLocation.staff_id,
+                    newer.c.timestamp > StaffLocation.timestamp,
+                )
+                .exists(),
+            )
+            .limit(_LOCATION_PRUNE_BATCH_SIZE)
+            # Select from staff_locations itself rather than the DELETE target
+            .correlate(None)
+            .scalar_subquery()
+        )
+
+        deleted = 0
+        while True:
+            result = self.db.execute(
+                delete(StaffLocation)
+                .where(StaffLocation.id.in_(expired_ids))
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+            deleted += result.rowcount
+            if result.rowcount < _LOCATION_PRUNE_BATCH_SIZE:
+                break
+
+        logger.info(f"Pruned {deleted} staff locations older than {retention_days} days")
+
+        return deleted
+
     # =========================================================================
     # STAFF AVAILABILITY & WORKLOAD
     # =========================================================================
 
     def get_active_assignment_count(self, staff_id: UUID) -> int:
-        """Get count of active (non-resolved) alerts assigned to a staff member"""
-        return (
-            self.db.query(Alert)
+        """
+        Get count of active (non-resolved) alerts assigned to a staff member.
+
+        Counts for every assignee are loaded with one grouped query on first
+        use and reused for the life of this service, so call invalidate_counts()
+        after assigning or resolving alerts in the same session.
+        """
+        if self._active_count_cache is None:
+            self._active_count_cache = dict(self.db.execute(_ACTIVE_COUNTS_BY_ASSIGNEE).all())
+        return self._active_count_cache.get(staff_id, 0)
+
+    def invalidate_counts(self) -> None:
+        """Drop the cached active assignment counts"""
+        self._active_count_cache = None
+
+    def get_active_assignment_counts(self, staff_ids: Iterable[UUID]) -> Dict[UUID, int]:
+        """
+        Get active (non-resolved) alert counts for several staff members in one query.
+
+        Staff with no active alerts are omitted from the result.
+        """
+        staff_ids = list(staff_ids)
+        if not staff_ids:
+            return {}
+
+        rows = (
+            self.db.query(Alert.assigned_to, func.count(Alert.id))
             .filter(
-                Alert.assigned_to == staff_id,
+                Alert.assigned_to.in_(staff_ids),
                 Alert.status != AlertStatus.RESOLVED,
             )
-            .count()
+            .group_by(Alert.assigned_to)
+            .all()
         )
+        return {staff_id: count for staff_id, count in rows}
 
     def is_available_for_assignment(self, staff_id: UUID) -> bool:
         """
@@ -325,15 +602,33 @@ class StaffService:
         if exclude_ids:
             query = query.filter(~StaffProfile.id.in_(exclude_ids))
 
-        staff_list = query.all()
+        # Filter by availability (concurrent assignments) in the same query
+        active_counts = self._active_counts_subquery()
+        query = (
+            query
+            .outerjoin(active_counts, StaffProfile.id == active_counts.c.staff_id)
+            .filter(
+                func.coalesce(active_counts.c.active_count, 0)
+                < StaffProfile.max_concurrent_assignments
+            )
+        )
 
-        # Filter by availability (concurrent assignments)
-        available = []
-        for staff in staff_list:
-            if self.is_available_for_assignment(staff.id):
-                available.append(staff)
+        return query.all()
 
-        return available
+    def _active_counts_subquery(self):
+        """Subquery of active (non-resolved) alert counts per assigned staff member"""
+        return (
+            self.db.query(
+                Alert.assigned_to.label("staff_id"),
+                func.count(Alert.id).label("active_count"),
+            )
+            .filter(
+                Alert.assigned_to.isnot(None),
+                Alert.status != AlertStatus.RESOLVED,
+            )
+            .group_by(Alert.assigned_to)
+            .subquery()
+        )
 
     # =========================================================================
     # PROXIMITY-BASED QUERIES
@@ -341,38 +636,7 @@ class StaffService:
 
     def get_staff_in_zone(self, zone_id: str) -> List[StaffProfile]:
         """Get all staff currently in a specific zone"""
-        # Subquery to get latest location per staff
-        latest_locations = (
-            self.db.query(
-                StaffLocation.staff_id,
-                func.max(StaffLocation.timestamp).label("max_timestamp")
-            )
-            .group_by(StaffLocation.staff_id)
-            .subquery()
-        )
-
-        # Join with locations to get staff in zone
-        staff_ids = (
-            self.db.query(StaffLocation.staff_id)
-            .join(
-                latest_locations,
-                and_(
-                    StaffLocation.staff_id == latest_locations.c.staff_id,
-                    StaffLocation.timestamp == latest_locations.c.max_timestamp,
-                )
-            )
-            .filter(StaffLocation.zone_id == zone_id)
-            .all()
-        )
-
-        if not staff_ids:
-            return []
-
-        return (
-            self.db.query(StaffProfile)
-            .filter(StaffProfile.id.in_([s[0] for s in staff_ids]))
-            .all()
-        )
+        return self.db.query(StaffProfile).filter(StaffProfile.current_zone_id == zone_id).all()
 
     def get_nearby_staff(
         self,
@@ -380,6 +644,8 @@ class StaffService:
         adjacent_zones: List[str],
         exclude_ids: Optional[List[UUID]] = None,
         on_duty_only: bool = True,
+        available_only: bool = False,
+        limit: Optional[int] = None,
     ) -> List[Tuple[StaffProfile, str, int]]:
         """
         Get staff near a zone, sorted by proximity.
@@ -389,6 +655,8 @@ class StaffService:
             adjacent_zones: List of adjacent zone IDs (ordered by distance)
             exclude_ids: Staff IDs to exclude
             on_duty_only: Only include on-duty staff
+            available_only: Only include staff below their max concurrent assignments
+            limit: Maximum number of staff to return (closest first)
 
         Returns:
             List of tuples: (staff, current_zone, distance_rank)
@@ -400,29 +668,12 @@ class StaffService:
             zone_distances[adj_zone] = i + 1
 
         all_zones = [zone_id] + adjacent_zones
-
-        # Get latest locations for all staff
-        latest_locations = (
-            self.db.query(
-                StaffLocation.staff_id,
-                func.max(StaffLocation.timestamp).label("max_timestamp")
-            )
-            .group_by(StaffLocation.staff_id)
-            .subquery()
-        )
+        zone_distance = case(zone_distances, value=StaffProfile.current_zone_id, else_=999).label("zone_distance")
 
         # Get staff with their current zones
         results = (
-            self.db.query(StaffProfile, StaffLocation.zone_id)
-            .join(StaffLocation, StaffProfile.id == StaffLocation.staff_id)
-            .join(
-                latest_locations,
-                and_(
-                    StaffLocation.staff_id == latest_locations.c.staff_id,
-                    StaffLocation.timestamp == latest_locations.c.max_timestamp,
-                )
-            )
-            .filter(StaffLocation.zone_id.in_(all_zones))
+            self.db.query(StaffProfile, StaffProfile.current_zone_id, zone_distance)
+            .filter(StaffProfile.current_zone_id.in_(all_zones))
         )
 
         if on_duty_only:
@@ -431,18 +682,24 @@ class StaffService:
         if exclude_ids:
             results = results.filter(~StaffProfile.id.in_(exclude_ids))
 
-        results = results.all()
-
-        # Add distance rank and sort
-        nearby = []
-        for staff, current_zone in results:
-            distance = zone_distances.get(current_zone, 999)
-            nearby.append((staff, current_zone, distance))
+        if available_only:
+            active_counts = self._active_counts_subquery()
+            results = (
+                results
+                .outerjoin(active_counts, StaffProfile.id == active_counts.c.staff_id)
+                .filter(
+                    func.coalesce(active_counts.c.active_count, 0)
+                    < StaffProfile.max_concurrent_assignments
+                )
+            )
 
         # Sort by distance, then by name
-        nearby.sort(key=lambda x: (x[2], x[0].name))
+        results = results.order_by(zone_distance, StaffProfile.name)
 
-        return nearby
+        if limit:
+            results = results.limit(limit)
+
+        return [(staff, current_zone, distance) for staff, current_zone, distance in results.all()]
 
     def get_staff_with_location(self, staff_id: UUID) -> Optional[Tuple[StaffProfile, Optional[StaffLocation]]]:
         """Get a staff profile with their current location"""
@@ -468,26 +725,69 @@ class StaffService:
         if not staff:
             return {}
 
-        # Count alerts by status
-        active_count = self.get_active_assignment_count(staff_id)
-
-        resolved_count = (
-            self.db.query(Alert)
-            .filter(
-                Alert.resolved_by == staff_id,
-                Alert.status == AlertStatus.RESOLVED,
+        # Count alerts by status in one pass with conditional aggregates
+        assigned = Alert.assigned_to == staff_id
+        active_count, resolved_count, total_assigned = (
+            self.db.query(
+                func.count(case((and_(assigned, Alert.status != AlertStatus.RESOLVED), 1))),
+                func.count(case((and_(Alert.resolved_by == staff_id, Alert.status == AlertStatus.RESOLVED), 1))),
+                func.count(case((assigned, 1))),
             )
-            .count()
+            .filter(or_(assigned, Alert.resolved_by == staff_id))
+            .one()
         )
 
-        total_assigned = (
-            self.db.query(Alert)
-            .filter(Alert.assigned_to == staff_id)
-            .count()
+        return self._build_statistics(staff, active_count, resolved_count, total_assigned)
+
+    def get_staff_statistics_for(self, staff_ids: Iterable[UUID]) -> Dict[UUID, dict]:
+        """
+        Get statistics for several staff members at once.
+
+        Profiles are loaded with one IN query and the alert counts for all of
+        them with one grouped query, instead of running get_staff_statistics
+        per staff member. Unknown IDs are omitted from the result.
+
+        Returns:
+            Dictionary mapping staff ID to the same stats get_staff_statistics returns
+        """
+        staff_ids = list(staff_ids)
+        if not staff_ids:
+            return {}
+
+        staff_list = self.db.query(StaffProfile).filter(StaffProfile.id.in_(staff_ids)).all()
+        if not staff_list:
+            return {}
+
+        assigned = Alert.assigned_to == StaffProfile.id
+        rows = (
+            self.db.query(
+                StaffProfile.id,
+                func.count(case((and_(assigned, Alert.status != AlertStatus.RESOLVED), 1))),
+                func.count(case((and_(Alert.resolved_by == StaffProfile.id, Alert.status == AlertStatus.RESOLVED), 1))),
+                func.count(case((assigned, 1))),
+            )
+            .outerjoin(Alert, or_(assigned, Alert.resolved_by == StaffProfile.id))
+            .filter(StaffProfile.id.in_([staff.id for staff in staff_list]))
+            .group_by(StaffProfile.id)
+            .all()
         )
+        counts = {staff_id: (active, resolved, total) for staff_id, active, resolved, total in rows}
+
+        return {
+            staff.id: self._build_statistics(staff, *counts.get(staff.id, (0, 0, 0)))
+            for staff in staff_list
+        }
 
+    def _build_statistics(
+        self,
+        staff: StaffProfile,
+        active_count: int,
+        resolved_count: int,
+        total_assigned: int,
+    ) -> dict:
+        """Shape the statistics returned for one staff member"""
         return {
-            "staff_id": str(staff_id),
+            "staff_id": str(staff.id),
             "name": staff.name,
             "role": staff.role.value,
             "on_duty": staff.on_duty,
@@ -497,3 +797,12 @@ class StaffService:
             "max_concurrent": staff.max_concurrent_assignments,
             "available_capacity": staff.max_concurrent_assignments - active_count,
         }
+
+
+def run_location_retention(db: Session) -> int:
+    """
+    Prune staff location history past STAFF_LOCATION_RETENTION_DAYS.
+
+    This function can be called by a background scheduler (e.g., a nightly cron job).
+    """
+    return StaffService(db).prune_location_history()
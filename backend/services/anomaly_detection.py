@@ -1,12 +1,273 @@
 # backend/app/services/anomaly_detection_fixed.py
-from neo4j import GraphDatabase
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional, Tuple
 from enum import Enum
+import heapq
 import logging
+import threading
+import time
+
+from neo4j import unit_of_work
+
+from config import settings
+from services.neo4j_pool import get_driver
 
 logger = logging.getLogger(__name__)
 
+# Zone detectors plus the entity pass run concurrently, one Neo4j session each
+_DETECTION_WORKERS = 4
+
+# Records per Bolt PULL for the detector queries
+_FETCH_SIZE = 1000
+
+# Sort rank per severity (most severe first); unknown severities rank with low
+_SEVERITY_RANK = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+
+def _anomaly_sort_key(anomaly: Dict) -> Tuple[int, float]:
+    """Most severe first, then newest first"""
+    return (_SEVERITY_RANK.get(anomaly['severity'], 3), -anomaly['timestamp'].timestamp())
+
+# Cypher is kept in module constants so every call sends byte-identical
+# text and Neo4j reuses the cached plan; only the parameters vary.
+_Q_DATASET_RANGE = """
+    MATCH (sa:SpatialActivity)
+    WHERE sa.timestamp IS NOT NULL
+    RETURN min(sa.timestamp) as earliest_data,
+           max(sa.timestamp) as latest_data,
+           count(sa) as total_activities
+"""
+
+_Q_OVERCROWDING = """
+    MATCH (z:Zone)<-[:OCCURRED_IN]-(sa:SpatialActivity)
+    WHERE sa.timestamp >= $start_time
+    AND sa.timestamp <= $end_time
+    AND sa.occupancy > z.capacity
+    WITH z, sa,
+         sa.timestamp.year as year,
+         sa.timestamp.month as month,
+         sa.timestamp.day as day,
+         sa.hour as hour
+    WITH z, year, month, day, hour,
+         max(sa.occupancy) as max_occupancy,
+         avg(sa.occupancy) as avg_occupancy,
+         count(sa) as incident_count
+    WITH z, year, month, day, hour, max_occupancy, avg_occupancy, incident_count,
+         toString(date({year: year, month: month, day: day})) as date_str
+    RETURN z.zone_id as zone_id,
+           z.name as zone_name,
+           z.capacity as capacity,
+           year,
+           month,
+           day,
+           hour,
+           date_str,
+           max_occupancy,
+           avg_occupancy,
+           incident_count,
+           CASE WHEN max_occupancy > z.capacity * 1.5
+                THEN $critical ELSE $high END as severity,
+           'overcrowding_' + z.zone_id + '_' + date_str + '_' + toString(hour) as id,
+           'Overcrowding in ' + z.name + ': ' + toString(max_occupancy) +
+               ' people (capacity: ' + toString(z.capacity) + ')' as description
+    ORDER BY max_occupancy DESC
+"""
+
+_Q_UNDERUTILIZATION = """
+    MATCH (z:Zone)<-[:OCCURRED_IN]-(sa:SpatialActivity)
+    WHERE sa.timestamp >= $start_time
+    AND sa.timestamp <= $end_time
+    AND sa.hour IN [9, 10, 11, 14, 15, 16, 17]  /* Peak hours */
+    AND NOT sa.is_weekend
+    WITH z,
+         avg(sa.occupancy) as avg_occupancy,
+         max(sa.occupancy) as max_occupancy,
+         count(sa) as data_points
+    WHERE avg_occupancy < (z.capacity * 0.2)  /* Less than 20% capacity */
+    AND data_points > 5  /* Ensure we have enough data */
+    RETURN z.zone_id as zone_id,
+           z.name as zone_name,
+           z.capacity as capacity,
+           avg_occupancy,
+           max_occupancy,
+           data_points
+    ORDER BY avg_occupancy ASC
+"""
+
+_Q_DATA_INTEGRITY = """
+    MATCH (sa:SpatialActivity)
+    WHERE sa.timestamp >= $start_time
+    AND sa.timestamp <= $end_time
+    AND sa.timestamp IS NULL
+    WITH count(sa) as null_count
+    RETURN 'null_ts' as kind, {null_count: null_count} as payload
+
+    UNION ALL
+
+    /* Negative net flow (more exits than entries - possible tailgating or data issue) */
+    MATCH (z:Zone)<-[:OCCURRED_IN]-(sa:SpatialActivity)
+    WHERE sa.timestamp >= $start_time
+    AND sa.timestamp <= $end_time
+    AND sa.net_flow IS NOT NULL
+    AND sa.net_flow < -5
+    WITH z, sa
+    ORDER BY sa.net_flow ASC
+    LIMIT 20
+    RETURN 'neg_flow' as kind, {
+               zone_id: z.zone_id,
+               zone_name: z.name,
+               timestamp: sa.timestamp,
+               hour: sa.hour,
+               entries: sa.entry_count,
+               exits: sa.exit_count,
+               net_flow: sa.net_flow,
+               date_str: toString(date(sa.timestamp)),
+               id: 'negative_flow_' + z.zone_id + '_' + toString(date(sa.timestamp)) +
+                   '_' + toString(sa.hour),
+               description: 'Negative occupancy flow in ' + z.name + ': ' +
+                   toString(sa.exit_count) + ' exits vs ' + toString(sa.entry_count) +
+                   ' entries (net: ' + toString(sa.net_flow) + ')'
+           } as payload
+
+    UNION ALL
+
+    /* Legacy negative occupancy values */
+    MATCH (sa:SpatialActivity)
+    WHERE sa.timestamp >= $start_time
+    AND sa.timestamp <= $end_time
+    AND sa.occupancy < 0
+    WITH count(sa) as negative_count, collect(DISTINCT sa.zone_id) as affected_zones
+    RETURN 'neg_occ' as kind, {negative_count: negative_count, affected_zones: affected_zones} as payload
+"""
+
+# Counts matching the three zone detectors above, one (type, severity, count)
+# row per group; keep the rules in step with those queries
+_Q_ANOMALY_COUNTS = """
+    MATCH (z:Zone)<-[:OCCURRED_IN]-(sa:SpatialActivity)
+    WHERE sa.timestamp >= $start_time
+    AND sa.timestamp <= $end_time
+    AND sa.occupancy > z.capacity
+    WITH z, sa.timestamp.year as year, sa.timestamp.month as month,
+         sa.timestamp.day as day, sa.hour as hour,
+         max(sa.occupancy) as max_occupancy
+    WITH CASE WHEN max_occupancy > z.capacity * 1.5 THEN $critical ELSE $high END as severity
+    RETURN $overcrowding as type, severity, count(*) as count
+
+    UNION ALL
+
+    MATCH (z:Zone)<-[:OCCURRED_IN]-(sa:SpatialActivity)
+    WHERE sa.timestamp >= $start_time
+    AND sa.timestamp <= $end_time
+    AND sa.hour IN [9, 10, 11, 14, 15, 16, 17]
+    AND NOT sa.is_weekend
+    WITH z, avg(sa.occupancy) as avg_occupancy, count(sa) as data_points
+    WHERE avg_occupancy < (z.capacity * 0.2)
+    AND data_points > 5
+    WITH CASE WHEN avg_occupancy * 100.0 / z.capacity > 10 THEN $low ELSE $medium END as severity
+    RETURN $underutilization as type, severity, count(*) as count
+
+    UNION ALL
+
+    /* The detector reports at most 20 negative-flow records */
+    MATCH (z:Zone)<-[:OCCURRED_IN]-(sa:SpatialActivity)
+    WHERE sa.timestamp >= $start_time
+    AND sa.timestamp <= $end_time
+    AND sa.net_flow IS NOT NULL
+    AND sa.net_flow < -5
+    WITH count(sa) as flows
+    RETURN $negative_occupancy as type, $high as severity,
+           CASE WHEN flows > 20 THEN 20 ELSE flows END as count
+
+    UNION ALL
+
+    MATCH (sa:SpatialActivity)
+    WHERE sa.timestamp >= $start_time
+    AND sa.timestamp <= $end_time
+    AND sa.occupancy < 0
+    WITH count(sa) as negative_count
+    RETURN $data_integrity as type, $high as severity,
+           CASE WHEN negative_count > 0 THEN 1 ELSE 0 END as count
+"""
+
+# Fallback zone capacities, written onto Zone nodes that have none; the
+# queries only ever read z.capacity
+_DEFAULT_ZONE_CAPACITIES = {
+    "LAB_101": 40,  # Updated to match your zone data
+    "LAB_306": 30,  # Updated to match your zone data
+    "LIB_ENT": 20,
+    "AUDITORIUM": 300,
+    "ADMIN_LOBBY": 50,
+    "GYM": 80,
+    "CAF_01": 200,
+    "HOSTEL_GATE": 25
+}
+
+_Q_ENSURE_ZONE_CAPACITIES = """
+    UNWIND $capacities AS c
+    MATCH (z:Zone {zone_id: c.zone_id})
+    WHERE z.capacity IS NULL
+    SET z.capacity = c.capacity
+    RETURN count(z) as updated
+"""
+
+@unit_of_work(timeout=settings.NEO4J_QUERY_TIMEOUT_SECONDS)
+def _fetch_records(tx, query: str, params: Optional[Dict] = None) -> List:
+    """Transaction function: run a query and pull every record before commit"""
+    return list(tx.run(query, params))
+
+# Recommended actions are identical for every anomaly of a kind, so each
+# anomaly references one shared immutable tuple
+_OVERCROWDING_ACTIONS = (
+    "Implement capacity management",
+    "Deploy crowd control measures",
+    "Send real-time alerts to administrators",
+    "Monitor exit patterns to manage flow",
+)
+
+_UNDERUTILIZATION_ACTIONS = (
+    "Review space allocation strategy",
+    "Consider repurposing underused areas",
+    "Analyze scheduling patterns",
+)
+
+_NULL_TIMESTAMP_ACTIONS = (
+    "Review data collection processes",
+    "Check database constraints",
+    "Investigate data source reliability",
+)
+
+_NEGATIVE_FLOW_ACTIONS = (
+    "Review CCTV footage for tailgating/piggybacking on entry",
+    "Check card reader hardware at entry points",
+    "Audit IN swipe compliance at entry gates",
+    "Consider turnstile or mantrap installation",
+)
+
+_NEGATIVE_OCCUPANCY_ACTIONS = (
+    "Fix data validation rules",
+    "Correct negative occupancy values",
+    "Review sensor calibration",
+)
+
+def _window_params(start_time: datetime, end_time: datetime) -> Dict[str, datetime]:
+    """Query window widened to whole seconds, so near-identical requests bind identical values
+
+    Bound as native temporal parameters, so the server compares them directly
+    instead of parsing a string per query. Naive times are taken as UTC, the
+    same zone datetime() assumed for the ISO strings previously sent.
+    """
+    start = start_time.replace(microsecond=0)
+    end = end_time.replace(microsecond=0)
+    if end != end_time:
+        end += timedelta(seconds=1)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    return {'start_time': start, 'end_time': end}
+
 class AnomalyType(Enum):
     OVERCROWDING = "overcrowding"
     UNAUTHORIZED_ACCESS = "unauthorized_access"
@@ -28,56 +289,65 @@ class SeverityLevel(Enum):
     CRITICAL = "critical"
 
 class AnomalyDetectionService:
+    # Dataset time range per Neo4j URI -> (expires_at, range). The aggregation
+    # scans every SpatialActivity node, so it is shared across instances for
+    # ANOMALY_CACHE_TTL_SECONDS.
+    _dataset_range_cache: Dict[str, Tuple[float, Dict]] = {}
+    _dataset_range_cache_lock = threading.Lock()
+
     def __init__(self, neo4j_uri: str, neo4j_user: str, neo4j_password: str):
-        self.driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+        self.driver = get_driver(neo4j_uri, neo4j_user, neo4j_password)
         self.neo4j_uri = neo4j_uri
         self.neo4j_user = neo4j_user
         self.neo4j_password = neo4j_password
-        
-        # Zone capacity definitions
-        self.zone_capacities = {
-            "LAB_101": 40,  # Updated to match your zone data
-            "LAB_306": 30,  # Updated to match your zone data
-            "LIB_ENT": 20,
-            "AUDITORIUM": 300,
-            "ADMIN_LOBBY": 50,
-            "GYM": 80,
-            "CAF_01": 200,
-            "HOSTEL_GATE": 25
-        }
+
+    def ensure_zone_capacities(self) -> int:
+        """Give Zone nodes without a capacity the default one; returns how many were set"""
+        capacities = [
+            {'zone_id': zone_id, 'capacity': capacity}
+            for zone_id, capacity in _DEFAULT_ZONE_CAPACITIES.items()
+        ]
+        with self.driver.session() as session:
+            records = session.execute_write(_fetch_records, _Q_ENSURE_ZONE_CAPACITIES, {'capacities': capacities})
+        return records[0]['updated'] if records else 0
+
+    @classmethod
+    def invalidate_dataset_cache(cls) -> None:
+        """Drop the cached dataset time range, e.g. after loading new activity data"""
+        with cls._dataset_range_cache_lock:
+            cls._dataset_range_cache.clear()
 
     def get_dataset_time_range(self) -> Dict:
+        """Get the full time range of available data (cached with a TTL)"""
+        now = time.monotonic()
+        with self._dataset_range_cache_lock:
+            cached = self._dataset_range_cache.get(self.neo4j_uri)
+        if cached and cached[0] > now:
+            return dict(cached[1])
+
+        dataset_range = self._query_dataset_time_range()
+        with self._dataset_range_cache_lock:
+            self._dataset_range_cache[self.neo4j_uri] = (now + settings.ANOMALY_CACHE_TTL_SECONDS, dataset_range)
+        return dict(dataset_range)
+
+    def _query_dataset_time_range(self) -> Dict:
         """Get the full time range of available data - FIXED"""
         with self.driver.session() as session:
             # Only check SpatialActivity since Activity nodes don't exist
-            result = session.run("""
-                MATCH (sa:SpatialActivity)
-                WHERE sa.timestamp IS NOT NULL
-                RETURN min(sa.timestamp) as earliest_data,
-                       max(sa.timestamp) as latest_data,
-                       count(sa) as total_activities
-            """)
-            
-            record = result.single()
+            records = session.execute_read(_fetch_records, _Q_DATASET_RANGE)
+
+            record = records[0] if records else None
             if record and record['earliest_data']:
-                earliest = record['earliest_data']
-                latest = record['latest_data']
-                total = record['total_activities']
-                
-                # Calculate days difference properly
-                if hasattr(earliest, 'to_native') and hasattr(latest, 'to_native'):
-                    earliest_native = earliest.to_native()
-                    latest_native = latest.to_native()
-                    days_diff = (latest_native - earliest_native).days
-                else:
-                    # Fallback calculation
-                    days_diff = 30  # Default span
-                
+                # Convert the driver's temporal types once, at the boundary;
+                # everything downstream works with Python datetimes
+                earliest = record['earliest_data'].to_native()
+                latest = record['latest_data'].to_native()
+
                 return {
                     'earliest_timestamp': earliest,
                     'latest_timestamp': latest,
-                    'total_activities': total,
-                    'dataset_span_days': days_diff
+                    'total_activities': record['total_activities'],
+                    'dataset_span_days': (latest - earliest).days
                 }
             else:
                 return {
@@ -90,15 +360,76 @@ class AnomalyDetectionService:
     def detect_all_anomalies(self, time_window_hours: Optional[int] = None,
                            start_date: Optional[str] = None,
                            end_date: Optional[str] = None,
-                           include_entity_anomalies: bool = True) -> List[Dict]:
+                           include_entity_anomalies: bool = True,
+                           limit: Optional[int] = None) -> List[Dict]:
         """Detect anomalies - SIMPLIFIED for current data structure
 
         Note: Uses local time (no timezone) to match how data is stored in Neo4j.
         The simulator creates SpatialActivity nodes with local timestamps.
+
+        With ``limit``, only the top ``limit`` anomalies are returned, selected
+        with a bounded heap instead of sorting the full list.
         """
+        anomalies = self._collect_anomalies(time_window_hours, start_date, end_date,
+                                            include_entity_anomalies)
+        if limit is not None:
+            return heapq.nsmallest(limit, anomalies, key=_anomaly_sort_key)
+
+        anomalies.sort(key=_anomaly_sort_key)
+        return anomalies
+
+    def _collect_anomalies(self, time_window_hours: Optional[int],
+                           start_date: Optional[str],
+                           end_date: Optional[str],
+                           include_entity_anomalies: bool) -> List[Dict]:
+        """Run every detector over the requested window; the result is unsorted"""
         anomalies = []
+        start_time, end_time = self._resolve_time_window(time_window_hours, start_date, end_date)
+
+        # Query parameters are built once and shared by the zone detectors
+        window = _window_params(start_time, end_time)
+
+        try:
+            logger.info(f"Detecting anomalies from {start_time} to {end_time}")
+
+            # Each detector opens its own session, so the independent Neo4j
+            # round-trips overlap instead of running back to back
+            with ThreadPoolExecutor(max_workers=_DETECTION_WORKERS) as executor:
+                zone_futures = [
+                    executor.submit(detector, start_time, end_time, window)
+                    for detector in (
+                        self._detect_overcrowding_simplified,
+                        self._detect_underutilization_simplified,
+                        self._detect_data_integrity_anomalies_simplified,
+                    )
+                ]
+                entity_future = (
+                    executor.submit(self._detect_entity_anomalies, start_time, end_time)
+                    if include_entity_anomalies else None
+                )
+
+                # Collect in submission order so ties keep a stable order
+                for future in zone_futures:
+                    anomalies.extend(future.result())
+                if entity_future is not None:
+                    anomalies.extend(entity_future.result())
+
+            # Convert all timestamps to datetime objects before sorting
+            for anomaly in anomalies:
+                if isinstance(anomaly['timestamp'], str):
+                    anomaly['timestamp'] = datetime.fromisoformat(anomaly['timestamp'].replace('Z', '+00:00'))
+
+            logger.info(f"Detected {len(anomalies)} total anomalies")
+            return anomalies
+
+        except Exception as e:
+            logger.error(f"Error detecting anomalies: {str(e)}")
+            return []
 
-        # Determine time range - use local time to match Neo4j data
+    def _resolve_time_window(self, time_window_hours: Optional[int],
+                             start_date: Optional[str],
+                             end_date: Optional[str]) -> Tuple[datetime, datetime]:
+        """Determine time range - use local time to match Neo4j data"""
         if start_date and end_date:
             # Parse as local time (no timezone) to match Neo4j data
             start_time = datetime.fromisoformat(f"{start_date}T00:00:00")
@@ -112,11 +443,6 @@ class AnomalyDetectionService:
             if dataset_range['earliest_timestamp'] and dataset_range['latest_timestamp']:
                 start_time = dataset_range['earliest_timestamp']
                 end_time = dataset_range['latest_timestamp']
-                # Convert Neo4j DateTime to Python datetime if needed
-                if hasattr(start_time, 'to_native'):
-                    start_time = start_time.to_native()
-                if hasattr(end_time, 'to_native'):
-                    end_time = end_time.to_native()
                 # Strip timezone if present to match local data
                 if start_time.tzinfo is not None:
                     start_time = start_time.replace(tzinfo=None)
@@ -127,99 +453,45 @@ class AnomalyDetectionService:
                 end_time = datetime.now()  # Local time
                 start_time = end_time - timedelta(days=30)
 
-        try:
-            logger.info(f"Detecting anomalies from {start_time} to {end_time}")
-
-            # Detect overcrowding (works with SpatialActivity data)
-            anomalies.extend(self._detect_overcrowding_simplified(start_time, end_time))
-
-            # Detect underutilization
-            anomalies.extend(self._detect_underutilization_simplified(start_time, end_time))
-
-            # Detect data integrity issues
-            anomalies.extend(self._detect_data_integrity_anomalies_simplified(start_time, end_time))
-
-            # Add entity-level anomalies if requested
-            if include_entity_anomalies:
-                try:
-                    from services.entity_anomaly_detection import EntityAnomalyDetectionService
-                    entity_service = EntityAnomalyDetectionService(
-                        self.neo4j_uri, self.neo4j_user, self.neo4j_password
-                    )
-                    entity_anomalies = entity_service.detect_entity_anomalies(start_time, end_time)
-                    anomalies.extend(entity_anomalies)
-                    logger.info(f"Detected {len(entity_anomalies)} entity-level anomalies")
-                except Exception as e:
-                    logger.warning(f"Could not detect entity anomalies: {str(e)}")
-
-            # Convert all timestamps to datetime objects before sorting
-            for anomaly in anomalies:
-                if isinstance(anomaly['timestamp'], str):
-                    anomaly['timestamp'] = datetime.fromisoformat(anomaly['timestamp'].replace('Z', '+00:00'))
-
-            # Sort by severity and timestamp
-            anomalies.sort(key=lambda x: (
-                x['severity'] == 'critical',
-                x['severity'] == 'high',
-                x['severity'] == 'medium',
-                x['timestamp']
-            ), reverse=True)
-
-            logger.info(f"Detected {len(anomalies)} total anomalies")
-            return anomalies
+        return start_time, end_time
 
+    def _detect_entity_anomalies(self, start_time: datetime, end_time: datetime) -> List[Dict]:
+        """Entity-level anomalies; failures are logged rather than failing the whole run"""
+        try:
+            from services.entity_anomaly_detection import EntityAnomalyDetectionService
+            entity_service = EntityAnomalyDetectionService(driver=self.driver)
+            entity_anomalies = entity_service.detect_entity_anomalies(start_time, end_time)
+            logger.info(f"Detected {len(entity_anomalies)} entity-level anomalies")
+            return entity_anomalies
         except Exception as e:
-            logger.error(f"Error detecting anomalies: {str(e)}")
+            logger.warning(f"Could not detect entity anomalies: {str(e)}")
             return []
 
-    def _detect_overcrowding_simplified(self, start_time: datetime, end_time: datetime) -> List[Dict]:
+    def _detect_overcrowding_simplified(self, start_time: datetime, end_time: datetime,
+                                        window: Optional[Dict[str, datetime]] = None) -> List[Dict]:
         """Detect overcrowding using SpatialActivity data based on occupancy exceeding capacity"""
         anomalies = []
 
-        with self.driver.session() as session:
-            # Find periods where occupancy exceeds capacity
-            result = session.run("""
-                MATCH (z:Zone)<-[:OCCURRED_IN]-(sa:SpatialActivity)
-                WHERE sa.timestamp >= datetime($start_time)
-                AND sa.timestamp <= datetime($end_time)
-                AND sa.occupancy > z.capacity
-                WITH z, sa,
-                     sa.timestamp.year as year,
-                     sa.timestamp.month as month,
-                     sa.timestamp.day as day,
-                     sa.hour as hour
-                RETURN z.zone_id as zone_id,
-                       z.name as zone_name,
-                       z.capacity as capacity,
-                       year,
-                       month,
-                       day,
-                       hour,
-                       max(sa.occupancy) as max_occupancy,
-                       avg(sa.occupancy) as avg_occupancy,
-                       count(sa) as incident_count
-                ORDER BY max_occupancy DESC
-            """, {
-                'start_time': start_time.isoformat(),
-                'end_time': end_time.isoformat()
+        with self.driver.session(fetch_size=_FETCH_SIZE) as session:
+            # Find periods where occupancy exceeds capacity; severity, id and
+            # description are projected by Neo4j so the loop only assembles dicts
+            result = session.execute_read(_fetch_records, _Q_OVERCROWDING, {
+                **(window or _window_params(start_time, end_time)),
+                'critical': SeverityLevel.CRITICAL.value,
+                'high': SeverityLevel.HIGH.value
             })
 
             for record in result:
                 max_occupancy = record['max_occupancy']
                 capacity = record['capacity']
-                severity = SeverityLevel.CRITICAL.value if max_occupancy > capacity * 1.5 else SeverityLevel.HIGH.value
-
-                # Construct date string and timestamp from components
-                date_str = f"{record['year']}-{record['month']:02d}-{record['day']:02d}"
-                timestamp = datetime(record['year'], record['month'], record['day'], record['hour'], 0)
 
                 anomalies.append({
-                    'id': f"overcrowding_{record['zone_id']}_{date_str}_{record['hour']}",
+                    'id': record['id'],
                     'type': AnomalyType.OVERCROWDING.value,
                     'location': record['zone_id'],
-                    'severity': severity,
-                    'timestamp': timestamp,
-                    'description': f"Overcrowding in {record['zone_name']}: {max_occupancy} people (capacity: {capacity})",
+                    'severity': record['severity'],
+                    'timestamp': datetime(record['year'], record['month'], record['day'], record['hour'], 0),
+                    'description': record['description'],
                     'details': {
                         'zone_name': record['zone_name'],
                         'max_occupancy': max_occupancy,
@@ -227,48 +499,23 @@ class AnomalyDetectionService:
                         'capacity': capacity,
                         'occupancy_rate': round((max_occupancy / capacity) * 100, 1),
                         'incident_count': record['incident_count'],
-                        'date': date_str,
+                        'date': record['date_str'],
                         'hour': record['hour']
                     },
-                    'recommended_actions': [
-                        "Implement capacity management",
-                        "Deploy crowd control measures",
-                        "Send real-time alerts to administrators",
-                        "Monitor exit patterns to manage flow"
-                    ]
+                    'recommended_actions': _OVERCROWDING_ACTIONS
                 })
 
         return anomalies
 
-    def _detect_underutilization_simplified(self, start_time: datetime, end_time: datetime) -> List[Dict]:
+    def _detect_underutilization_simplified(self, start_time: datetime, end_time: datetime,
+                                            window: Optional[Dict[str, datetime]] = None) -> List[Dict]:
         """Detect underutilized spaces"""
         anomalies = []
         
-        with self.driver.session() as session:
+        with self.driver.session(fetch_size=_FETCH_SIZE) as session:
             # Find zones with consistently low occupancy during peak hours
-            result = session.run("""
-                MATCH (z:Zone)<-[:OCCURRED_IN]-(sa:SpatialActivity)
-                WHERE sa.timestamp >= datetime($start_time) 
-                AND sa.timestamp <= datetime($end_time)
-                AND sa.hour IN [9, 10, 11, 14, 15, 16, 17]  // Peak hours
-                AND NOT sa.is_weekend
-                WITH z, 
-                     avg(sa.occupancy) as avg_occupancy,
-                     max(sa.occupancy) as max_occupancy,
-                     count(sa) as data_points
-                WHERE avg_occupancy < (z.capacity * 0.2)  // Less than 20% capacity
-                AND data_points > 5  // Ensure we have enough data
-                RETURN z.zone_id as zone_id,
-                       z.name as zone_name,
-                       z.capacity as capacity,
-                       avg_occupancy,
-                       max_occupancy,
-                       data_points
-                ORDER BY avg_occupancy ASC
-            """, {
-                'start_time': start_time.isoformat(),
-                'end_time': end_time.isoformat()
-            })
+            result = session.execute_read(_fetch_records, _Q_UNDERUTILIZATION,
+                                          window or _window_params(start_time, end_time))
             
             for record in result:
                 utilization_rate = (record['avg_occupancy'] / record['capacity']) * 100
@@ -288,138 +535,86 @@ class AnomalyDetectionService:
                         'utilization_rate': round(utilization_rate, 1),
                         'data_points': record['data_points']
                     },
-                    'recommended_actions': [
-                        "Review space allocation strategy",
-                        "Consider repurposing underused areas",
-                        "Analyze scheduling patterns"
-                    ]
+                    'recommended_actions': _UNDERUTILIZATION_ACTIONS
                 })
         
         return anomalies
 
-    def _detect_data_integrity_anomalies_simplified(self, start_time: datetime, end_time: datetime) -> List[Dict]:
+    def _detect_data_integrity_anomalies_simplified(self, start_time: datetime, end_time: datetime,
+                                                    window: Optional[Dict[str, datetime]] = None) -> List[Dict]:
         """Detect data integrity issues including direction-based anomalies"""
-        anomalies = []
+        null_anomalies = []
+        flow_anomalies = []
+        occupancy_anomalies = []
 
-        with self.driver.session() as session:
-            # Check for missing timestamps
-            null_timestamps = session.run("""
-                MATCH (sa:SpatialActivity)
-                WHERE sa.timestamp >= datetime($start_time)
-                AND sa.timestamp <= datetime($end_time)
-                AND sa.timestamp IS NULL
-                RETURN count(sa) as null_count
-            """, {
-                'start_time': start_time.isoformat(),
-                'end_time': end_time.isoformat()
-            }).single()['null_count']
-
-            if null_timestamps > 0:
-                anomalies.append({
-                    'id': f"data_integrity_null_timestamps_{start_time.date()}",
-                    'type': AnomalyType.DATA_INTEGRITY_ANOMALY.value,
-                    'location': 'SYSTEM_WIDE',
-                    'severity': SeverityLevel.MEDIUM.value,
-                    'timestamp': start_time,
-                    'description': f"Data integrity issue: {null_timestamps} spatial activities with missing timestamps",
-                    'details': {
-                        'null_timestamp_count': null_timestamps,
-                        'check_period': f"{start_time.date()} to {end_time.date()}"
-                    },
-                    'recommended_actions': [
-                        "Review data collection processes",
-                        "Check database constraints",
-                        "Investigate data source reliability"
-                    ]
-                })
+        with self.driver.session(fetch_size=_FETCH_SIZE) as session:
+            # All three checks run as one UNION ALL query, one Bolt round-trip;
+            # each branch yields a (kind, payload) row
+            result = session.execute_read(_fetch_records, _Q_DATA_INTEGRITY,
+                                          window or _window_params(start_time, end_time))
 
-            # Check for negative net flow (more exits than entries - possible tailgating or data issue)
-            negative_flow = session.run("""
-                MATCH (z:Zone)<-[:OCCURRED_IN]-(sa:SpatialActivity)
-                WHERE sa.timestamp >= datetime($start_time)
-                AND sa.timestamp <= datetime($end_time)
-                AND sa.net_flow IS NOT NULL
-                AND sa.net_flow < -5
-                RETURN z.zone_id as zone_id,
-                       z.name as zone_name,
-                       sa.timestamp as timestamp,
-                       sa.hour as hour,
-                       sa.entry_count as entries,
-                       sa.exit_count as exits,
-                       sa.net_flow as net_flow,
-                       date(sa.timestamp) as date
-                ORDER BY sa.net_flow ASC
-                LIMIT 20
-            """, {
-                'start_time': start_time.isoformat(),
-                'end_time': end_time.isoformat()
-            })
-
-            for record in negative_flow:
-                date_str = str(record['date'])
-                timestamp = record['timestamp']
-                if hasattr(timestamp, 'to_native'):
-                    timestamp = timestamp.to_native()
-                if timestamp.tzinfo is None:
-                    timestamp = timestamp.replace(tzinfo=timezone.utc)
-
-                anomalies.append({
-                    'id': f"negative_flow_{record['zone_id']}_{date_str}_{record['hour']}",
-                    'type': AnomalyType.NEGATIVE_OCCUPANCY.value,
-                    'location': record['zone_id'],
-                    'severity': SeverityLevel.HIGH.value,
-                    'timestamp': timestamp,
-                    'description': f"Negative occupancy flow in {record['zone_name']}: {record['exits']} exits vs {record['entries']} entries (net: {record['net_flow']})",
-                    'details': {
-                        'zone_name': record['zone_name'],
-                        'entry_count': record['entries'],
-                        'exit_count': record['exits'],
-                        'net_flow': record['net_flow'],
-                        'date': date_str,
-                        'hour': record['hour'],
-                        'anomaly_reason': 'More people exiting than entered - indicates tailgating on entry or data issue'
-                    },
-                    'recommended_actions': [
-                        "Review CCTV footage for tailgating/piggybacking on entry",
-                        "Check card reader hardware at entry points",
-                        "Audit IN swipe compliance at entry gates",
-                        "Consider turnstile or mantrap installation"
-                    ]
-                })
-
-            # Check for legacy negative occupancy values
-            negative_occupancy = session.run("""
-                MATCH (sa:SpatialActivity)
-                WHERE sa.timestamp >= datetime($start_time)
-                AND sa.timestamp <= datetime($end_time)
-                AND sa.occupancy < 0
-                RETURN count(sa) as negative_count, collect(DISTINCT sa.zone_id) as affected_zones
-            """, {
-                'start_time': start_time.isoformat(),
-                'end_time': end_time.isoformat()
-            }).single()
-
-            if negative_occupancy['negative_count'] > 0:
-                anomalies.append({
-                    'id': f"data_integrity_negative_occupancy_{start_time.date()}",
-                    'type': AnomalyType.DATA_INTEGRITY_ANOMALY.value,
-                    'location': 'SYSTEM_WIDE',
-                    'severity': SeverityLevel.HIGH.value,
-                    'timestamp': start_time,
-                    'description': f"Data integrity issue: {negative_occupancy['negative_count']} records with negative occupancy",
-                    'details': {
-                        'negative_count': negative_occupancy['negative_count'],
-                        'affected_zones': negative_occupancy['affected_zones'],
-                        'check_period': f"{start_time.date()} to {end_time.date()}"
-                    },
-                    'recommended_actions': [
-                        "Fix data validation rules",
-                        "Correct negative occupancy values",
-                        "Review sensor calibration"
-                    ]
-                })
-
-        return anomalies
+            for record in result:
+                kind = record['kind']
+                payload = record['payload']
+
+                if kind == 'null_ts':
+                    null_timestamps = payload['null_count']
+                    if null_timestamps > 0:
+                        null_anomalies.append({
+                            'id': f"data_integrity_null_timestamps_{start_time.date()}",
+                            'type': AnomalyType.DATA_INTEGRITY_ANOMALY.value,
+                            'location': 'SYSTEM_WIDE',
+                            'severity': SeverityLevel.MEDIUM.value,
+                            'timestamp': start_time,
+                            'description': f"Data integrity issue: {null_timestamps} spatial activities with missing timestamps",
+                            'details': {
+                                'null_timestamp_count': null_timestamps,
+                                'check_period': f"{start_time.date()} to {end_time.date()}"
+                            },
+                            'recommended_actions': _NULL_TIMESTAMP_ACTIONS
+                        })
+
+                elif kind == 'neg_flow':
+                    timestamp = payload['timestamp'].to_native()
+                    if timestamp.tzinfo is None:
+                        timestamp = timestamp.replace(tzinfo=timezone.utc)
+
+                    flow_anomalies.append({
+                        'id': payload['id'],
+                        'type': AnomalyType.NEGATIVE_OCCUPANCY.value,
+                        'location': payload['zone_id'],
+                        'severity': SeverityLevel.HIGH.value,
+                        'timestamp': timestamp,
+                        'description': payload['description'],
+                        'details': {
+                            'zone_name': payload['zone_name'],
+                            'entry_count': payload['entries'],
+                            'exit_count': payload['exits'],
+                            'net_flow': payload['net_flow'],
+                            'date': payload['date_str'],
+                            'hour': payload['hour'],
+                            'anomaly_reason': 'More people exiting than entered - indicates tailgating on entry or data issue'
+                        },
+                        'recommended_actions': _NEGATIVE_FLOW_ACTIONS
+                    })
+
+                elif kind == 'neg_occ' and payload['negative_count'] > 0:
+                    occupancy_anomalies.append({
+                        'id': f"data_integrity_negative_occupancy_{start_time.date()}",
+                        'type': AnomalyType.DATA_INTEGRITY_ANOMALY.value,
+                        'location': 'SYSTEM_WIDE',
+                        'severity': SeverityLevel.HIGH.value,
+                        'timestamp': start_time,
+                        'description': f"Data integrity issue: {payload['negative_count']} records with negative occupancy",
+                        'details': {
+                            'negative_count': payload['negative_count'],
+                            'affected_zones': payload['affected_zones'],
+                            'check_period': f"{start_time.date()} to {end_time.date()}"
+                        },
+                        'recommended_actions': _NEGATIVE_OCCUPANCY_ACTIONS
+                    })
+
+        return null_anomalies + flow_anomalies + occupancy_anomalies
 
     def get_all_historical_anomalies(self) -> List[Dict]:
         """Get all anomalies from the entire dataset"""
@@ -429,11 +624,19 @@ class AnomalyDetectionService:
         """Get anomalies within a specific date range"""
         return self.detect_all_anomalies(start_date=start_date, end_date=end_date)
 
-    def get_anomaly_summary(self, time_window_hours: Optional[int] = None, 
-                          start_date: Optional[str] = None, 
-                          end_date: Optional[str] = None) -> Dict:
-        """Get summary of anomalies by type and severity"""
-        anomalies = self.detect_all_anomalies(time_window_hours, start_date, end_date)
+    def get_anomaly_summary(self, time_window_hours: Optional[int] = None,
+                          start_date: Optional[str] = None,
+                          end_date: Optional[str] = None,
+                          include_entity_anomalies: bool = False) -> Dict:
+        """Get summary of anomalies by type and severity
+
+        Entity-level detection is the slowest step and is skipped unless
+        ``include_entity_anomalies`` is set.
+        """
+        # Counts need every anomaly, but only the top five are returned, so
+        # skip the full sort and pick them with a bounded heap
+        anomalies = self._collect_anomalies(time_window_hours, start_date, end_date,
+                                            include_entity_anomalies)
         
         # Determine actual time range used
         if start_date and end_date:
@@ -443,45 +646,70 @@ class AnomalyDetectionService:
         else:
             dataset_range = self.get_dataset_time_range()
             if dataset_range['earliest_timestamp'] and dataset_range['latest_timestamp']:
-                earliest = dataset_range['earliest_timestamp']
-                latest = dataset_range['latest_timestamp']
-                # Handle Neo4j DateTime objects
-                if hasattr(earliest, 'to_native'):
-                    earliest = earliest.to_native()
-                if hasattr(latest, 'to_native'):
-                    latest = latest.to_native()
-                earliest_str = earliest.strftime("%Y-%m-%d")
-                latest_str = latest.strftime("%Y-%m-%d")
+                earliest_str = dataset_range['earliest_timestamp'].strftime("%Y-%m-%d")
+                latest_str = dataset_range['latest_timestamp'].strftime("%Y-%m-%d")
                 time_range_description = f"Entire dataset ({earliest_str} to {latest_str})"
             else:
                 time_range_description = "No data available"
         
+        # Count by severity, type and location in a single pass
+        by_severity = Counter()
+        by_type = Counter()
+        by_location = Counter()
+        for anomaly in anomalies:
+            by_severity[anomaly['severity']] += 1
+            by_type[anomaly['type']] += 1
+            by_location[anomaly['location']] += 1
+
         summary = {
             'total_anomalies': len(anomalies),
             'time_range': time_range_description,
-            'by_severity': {
-                'critical': len([a for a in anomalies if a['severity'] == 'critical']),
-                'high': len([a for a in anomalies if a['severity'] == 'high']),
-                'medium': len([a for a in anomalies if a['severity'] == 'medium']),
-                'low': len([a for a in anomalies if a['severity'] == 'low'])
-            },
-            'by_type': {},
-            'by_location': {},
-            'recent_anomalies': anomalies[:5],  # Most recent 5
+            'by_severity': {level: by_severity[level] for level in ('critical', 'high', 'medium', 'low')},
+            'by_type': dict(by_type),
+            'by_location': dict(by_location),
+            'recent_anomalies': heapq.nsmallest(5, anomalies, key=_anomaly_sort_key),  # Top 5
             'generated_at': datetime.now().isoformat(),
             'dataset_info': self.get_dataset_time_range()
         }
-        
-        # Count by type
-        for anomaly in anomalies:
-            anomaly_type = anomaly['type']
-            location = anomaly['location']
-            
-            summary['by_type'][anomaly_type] = summary['by_type'].get(anomaly_type, 0) + 1
-            summary['by_location'][location] = summary['by_location'].get(location, 0) + 1
-        
+
         return summary
 
+    def get_anomaly_counts(self, time_window_hours: Optional[int] = None,
+                           start_date: Optional[str] = None,
+                           end_date: Optional[str] = None) -> Dict:
+        """Zone-level anomaly counts by severity and type, aggregated in Neo4j
+
+        Cheap enough for dashboard polling: no anomaly dicts are built and
+        entity-level detection is not run.
+        """
+        start_time, end_time = self._resolve_time_window(time_window_hours, start_date, end_date)
+
+        with self.driver.session() as session:
+            records = session.execute_read(_fetch_records, _Q_ANOMALY_COUNTS, {
+                **_window_params(start_time, end_time),
+                'critical': SeverityLevel.CRITICAL.value,
+                'high': SeverityLevel.HIGH.value,
+                'medium': SeverityLevel.MEDIUM.value,
+                'low': SeverityLevel.LOW.value,
+                'overcrowding': AnomalyType.OVERCROWDING.value,
+                'underutilization': AnomalyType.UNDERUTILIZATION.value,
+                'negative_occupancy': AnomalyType.NEGATIVE_OCCUPANCY.value,
+                'data_integrity': AnomalyType.DATA_INTEGRITY_ANOMALY.value
+            })
+
+        by_severity = Counter()
+        by_type = Counter()
+        for record in records:
+            by_severity[record['severity']] += record['count']
+            by_type[record['type']] += record['count']
+
+        return {
+            'total_anomalies': sum(by_type.values()),
+            'by_severity': {level: by_severity[level] for level in ('critical', 'high', 'medium', 'low')},
+            'by_type': {anomaly_type: count for anomaly_type, count in by_type.items() if count},
+            'generated_at': datetime.now().isoformat()
+        }
+
     def get_anomaly_trends(self, granularity: str = "daily") -> Dict:
         """Get anomaly trends over time"""
         all_anomalies = self.get_all_historical_anomalies()
@@ -495,38 +723,39 @@ class AnomalyDetectionService:
             'granularity': granularity
         }
         
+        # Bucket key for a calendar date, chosen once for the granularity
+        if granularity == "weekly":
+            bucket_of = lambda d: (d - timedelta(days=d.weekday())).strftime("%Y-%m-%d")
+        elif granularity == "monthly":
+            bucket_of = lambda d: d.strftime("%Y-%m")
+        else:
+            bucket_of = lambda d: d.strftime("%Y-%m-%d")
+
+        # Anomalies cluster on few dates, so format each date only once
+        bucket_keys = {}
+        by_date = trends['by_date']
+        by_type_over_time = trends['by_type_over_time']
+        by_severity_over_time = trends['by_severity_over_time']
+
         for anomaly in all_anomalies:
             # Parse timestamp
             timestamp = anomaly['timestamp']
             if isinstance(timestamp, str):
                 timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            
-            # Group by date based on granularity
-            if granularity == "daily":
-                date_key = timestamp.strftime("%Y-%m-%d")
-            elif granularity == "weekly":
-                week_start = timestamp - timedelta(days=timestamp.weekday())
-                date_key = week_start.strftime("%Y-%m-%d")
-            elif granularity == "monthly":
-                date_key = timestamp.strftime("%Y-%m")
-            else:
-                date_key = timestamp.strftime("%Y-%m-%d")
-            
-            # Count by date
-            trends['by_date'][date_key] = trends['by_date'].get(date_key, 0) + 1
-            
-            # Count by type over time
-            anomaly_type = anomaly['type']
-            if anomaly_type not in trends['by_type_over_time']:
-                trends['by_type_over_time'][anomaly_type] = {}
-            trends['by_type_over_time'][anomaly_type][date_key] = trends['by_type_over_time'][anomaly_type].get(date_key, 0) + 1
-            
-            # Count by severity over time
-            severity = anomaly['severity']
-            if severity not in trends['by_severity_over_time']:
-                trends['by_severity_over_time'][severity] = {}
-            trends['by_severity_over_time'][severity][date_key] = trends['by_severity_over_time'][severity].get(date_key, 0) + 1
-        
+
+            day = timestamp.date()
+            date_key = bucket_keys.get(day)
+            if date_key is None:
+                date_key = bucket_keys[day] = bucket_of(day)
+
+            by_date[date_key] = by_date.get(date_key, 0) + 1
+
+            type_counts = by_type_over_time.setdefault(anomaly['type'], {})
+            type_counts[date_key] = type_counts.get(date_key, 0) + 1
+
+            severity_counts = by_severity_over_time.setdefault(anomaly['severity'], {})
+            severity_counts[date_key] = severity_counts.get(date_key, 0) + 1
+
         # Find peak periods (top 5 dates with most anomalies)
         sorted_dates = sorted(trends['by_date'].items(), key=lambda x: x[1], reverse=True)
         trends['peak_periods'] = [
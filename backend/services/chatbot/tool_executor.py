@@ -150,7 +150,9 @@ class ToolExecutor:
         anomalies = self.anomaly_service.detect_all_anomalies(
             start_date=start_time.strftime("%Y-%m-%d"),
             end_date=end_time.strftime("%Y-%m-%d"),
-            include_entity_anomalies=True
+            include_entity_anomalies=True,
+            # Filters are applied below, so only bound the selection when there are none
+            limit=None if (zone_id or severity or anomaly_type or entity_id) else limit
         )
 
         # Apply filters
@@ -3,12 +3,14 @@ Entity-Level Anomaly Detection Service
 Detects anomalies based on individual entity behavior
 """
 
-from neo4j import GraphDatabase
+from neo4j import Driver
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import logging
 import hashlib
 
+from services.neo4j_pool import get_driver
+
 logger = logging.getLogger(__name__)
 
 def serialize_neo4j_datetime(dt):
@@ -34,8 +36,10 @@ def generate_unique_id(anomaly_type: str, entity_id: str, location: str, timesta
     return f"{anomaly_type}_{entity_id}_{short_hash}"
 
 class EntityAnomalyDetectionService:
-    def __init__(self, neo4j_uri: str, neo4j_user: str, neo4j_password: str):
-        self.driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+    def __init__(self, neo4j_uri: Optional[str] = None, neo4j_user: Optional[str] = None,
+                 neo4j_password: Optional[str] = None, driver: Optional[Driver] = None):
+        # Reuse the caller's driver when given, otherwise the shared one for these credentials
+        self.driver = driver or get_driver(neo4j_uri, neo4j_user, neo4j_password)
 
         # Zone access restrictions
         self.restricted_zones = {
@@ -911,5 +915,4 @@ class EntityAnomalyDetectionService:
         return anomalies
 
     def close(self):
-        """Close database connection"""
-        self.driver.close()
+        """Release the service; the driver is shared and closed at process exit"""
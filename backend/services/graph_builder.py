@@ -60,6 +60,8 @@ class CampusGraphBuilder:
             "CREATE INDEX face_id_index IF NOT EXISTS FOR (e:Entity) ON (e.face_id)",
             "CREATE INDEX email_index IF NOT EXISTS FOR (e:Entity) ON (e.email)",
             "CREATE INDEX timestamp_index IF NOT EXISTS FOR (e:Event) ON (e.timestamp)",
+            "CREATE RANGE INDEX spatial_activity_timestamp_index IF NOT EXISTS FOR (sa:SpatialActivity) ON (sa.timestamp)",
+            "CREATE RANGE INDEX zone_id_index IF NOT EXISTS FOR (z:Zone) ON (z.zone_id)",
         ]
         
         with self.driver.session() as session:
@@ -0,0 +1,57 @@
+"""
+Shared Neo4j drivers.
+
+A driver owns a Bolt connection pool, so services reuse one driver per
+(uri, user) instead of constructing their own on every request.
+"""
+
+import atexit
+import logging
+import threading
+from typing import Dict, Tuple
+
+from neo4j import Driver, GraphDatabase
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_drivers: Dict[Tuple[str, str], Driver] = {}
+_drivers_lock = threading.Lock()
+
+
+def get_driver(uri: str, user: str, password: str) -> Driver:
+    """Return the shared driver for (uri, user), creating it on first use"""
+    key = (uri, user)
+    driver = _drivers.get(key)
+    if driver is not None:
+        return driver
+
+    with _drivers_lock:
+        driver = _drivers.get(key)
+        if driver is None:
+            driver = GraphDatabase.driver(
+                uri,
+                auth=(user, password),
+                max_connection_pool_size=settings.NEO4J_MAX_CONNECTION_POOL_SIZE,
+                max_connection_lifetime=settings.NEO4J_MAX_CONNECTION_LIFETIME_SECONDS,
+                connection_acquisition_timeout=settings.NEO4J_CONNECTION_ACQUISITION_TIMEOUT_SECONDS,
+            )
+            _drivers[key] = driver
+            logger.info(f"Created shared Neo4j driver for {uri}")
+    return driver
+
+
+def close_drivers() -> None:
+    """Close every shared driver"""
+    with _drivers_lock:
+        drivers = list(_drivers.values())
+        _drivers.clear()
+    for driver in drivers:
+        try:
+            driver.close()
+        except Exception as e:
+            logger.warning(f"Error closing Neo4j driver: {e}")
+
+
+atexit.register(close_drivers)